@@ -6,7 +6,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('locales', 'locales')],
     hiddenimports=[
         'anthropic',
         'pynput',
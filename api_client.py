@@ -1,20 +1,32 @@
 """Client API Claude pour le traitement du texte."""
 
 import os
+import threading
+from typing import Optional
 from anthropic import Anthropic, APIError, APIConnectionError
 
 from config import MODEL
 import prompt_manager
 import translations
+from prompt_template import PromptTemplate
 import settings_manager
 import usage_tracker
 
 
+# Intervalle de vérification de l'annulation pendant une requête (en secondes)
+CANCEL_POLL_INTERVAL = 0.05
+
+
 class APIClientError(Exception):
     """Erreur du client API."""
     pass
 
 
+class RequestCancelledError(APIClientError):
+    """Requête annulée par l'utilisateur."""
+    pass
+
+
 def get_client() -> Anthropic:
     """
     Crée et retourne un client Anthropic.
@@ -31,7 +43,28 @@ def get_client() -> Anthropic:
     return Anthropic(api_key=api_key)
 
 
-def process_text(text: str, action: str, language: str = None) -> str:
+def resolve_prompt_template(action: str, language: str) -> Optional[PromptTemplate]:
+    """
+    Résout le template compilé d'une action dans la table de la langue.
+    Priorité : override de la langue > custom > prompt traduit par défaut.
+
+    Args:
+        action: Nom de l'action (ex: "correct", "summarize").
+        language: Code langue (fr, en, es, de).
+
+    Returns:
+        Template compilé, ou None si l'action est inconnue.
+    """
+    return prompt_manager.resolve_prompt(action, language)
+
+
+def process_text(
+    text: str,
+    action: str,
+    language: str = None,
+    cancel_event: Optional[threading.Event] = None,
+    prompt_template: Optional[PromptTemplate] = None
+) -> str:
     """
     Traite le texte avec l'API Claude selon l'action demandée.
 
@@ -39,44 +72,112 @@ def process_text(text: str, action: str, language: str = None) -> str:
         text: Le texte à traiter.
         action: L'action à effectuer ('correct', 'format', 'reformulate', 'professional').
         language: Code langue (fr, en, es, de). Si None, utilise la langue configurée.
+        cancel_event: Event qui, une fois levé, abandonne la requête en cours.
+        prompt_template: Template compilé déjà résolu (évite toute relecture des fichiers).
 
     Returns:
         Le texte traité.
 
     Raises:
+        RequestCancelledError: Si cancel_event a été levé avant la fin.
         APIClientError: En cas d'erreur API.
     """
     # Récupérer la langue configurée si non spécifiée
     if language is None:
-        language = settings_manager.get("language", "fr")
-
-    # Essayer d'abord avec prompt_manager (custom prompts ou overrides)
-    prompt_template = prompt_manager.get_prompt(action)
+        language = settings_manager.get_language()
 
-    # Si pas trouvé, essayer avec translations (prompts par défaut traduits)
     if prompt_template is None:
-        prompt_template = translations.get_prompt(action, language)
+        prompt_template = resolve_prompt_template(action, language)
 
     # Si toujours pas trouvé, erreur
     if prompt_template is None:
         raise APIClientError(f"Action inconnue : {action}")
 
-    prompt = prompt_template.format(text=text)
+    prompt = prompt_template.render(text, translations.get_language_name(language))
+    client = get_client()
+
+    if cancel_event is None:
+        return _request(client, prompt)
+    return _request_cancellable(client, prompt, cancel_event)
 
+
+def _request_cancellable(client: Anthropic, prompt: str, cancel_event: threading.Event) -> str:
+    """
+    Exécute la requête dans un thread et rend la main dès l'annulation.
+
+    Le thread appelant n'attend pas la fin de la réponse : en cas d'annulation,
+    le client HTTP est fermé pour couper la connexion et le résultat est ignoré.
+
+    Raises:
+        RequestCancelledError: Si cancel_event a été levé avant la fin.
+        APIClientError: En cas d'erreur API.
+    """
+    outcome = {}
+    finished = threading.Event()
+
+    def worker():
+        try:
+            outcome["text"] = _request(client, prompt, cancel_event)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            finished.set()
+
+    threading.Thread(target=worker, daemon=True).start()
+
+    while not finished.wait(CANCEL_POLL_INTERVAL):
+        if cancel_event.is_set():
+            try:
+                client.close()
+            except Exception:
+                pass
+            raise RequestCancelledError("Requête annulée")
+
+    if cancel_event.is_set():
+        raise RequestCancelledError("Requête annulée")
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["text"]
+
+
+def _request(client: Anthropic, prompt: str, cancel_event: Optional[threading.Event] = None) -> str:
+    """
+    Envoie le prompt en streaming et retourne la réponse complète.
+
+    Le streaming permet d'interrompre la génération côté serveur dès
+    l'annulation (fermeture du flux) au lieu de payer la réponse entière.
+    L'utilisation n'est enregistrée que pour les requêtes menées à terme.
+
+    Raises:
+        RequestCancelledError: Si cancel_event a été levé pendant le flux.
+        APIClientError: En cas d'erreur API.
+    """
     try:
-        client = get_client()
-        response = client.messages.create(
+        with client.messages.stream(
             model=MODEL,
             max_tokens=2048,
             messages=[{"role": "user", "content": prompt}]
-        )
+        ) as stream:
+            chunks = []
+            for chunk in stream.text_stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RequestCancelledError("Requête annulée")
+                chunks.append(chunk)
+            response = stream.get_final_message()
+
+        # Escape arrivé après le dernier fragment : la réponse est abandonnée, pas comptée
+        if cancel_event is not None and cancel_event.is_set():
+            raise RequestCancelledError("Requête annulée")
 
         # Tracker l'utilisation de l'API
         input_tokens = response.usage.input_tokens
         output_tokens = response.usage.output_tokens
         usage_tracker.track_request(input_tokens, output_tokens)
 
-        return response.content[0].text
+        return "".join(chunks)
+
+    except APIClientError:
+        raise
 
     except APIConnectionError as e:
         raise APIClientError(
@@ -94,3 +94,17 @@ def select_pasted_text(length: int) -> None:
         keyboard_controller.release(Key.left)
     keyboard_controller.release(Key.shift)
     time.sleep(0.05)
+
+
+def erase_typed_text(length: int) -> None:
+    """
+    Efface les derniers caractères tapés en simulant Retour arrière.
+
+    Args:
+        length: Nombre de caractères à effacer.
+    """
+    time.sleep(0.05)
+    for _ in range(length):
+        keyboard_controller.press(Key.backspace)
+        keyboard_controller.release(Key.backspace)
+    time.sleep(0.05)
@@ -0,0 +1,572 @@
+"""Backend SQLite optionnel pour l'état de l'application.
+
+Une base unique (typo.db, mode WAL) dans le répertoire de configuration
+remplace config.json, prompts.json, snippets.json et usage_stats.json :
+- chaque document est réparti dans une table (une ligne par entrée), et
+  une écriture ne touche que les lignes modifiées ;
+- l'utilisation est un journal d'événements agrégé par mois ;
+- chaque fichier JSON existant est importé une seule fois ;
+- les migrations de schéma des documents s'appliquent aussi aux lignes en base.
+
+Activé par TYPO_STORAGE=sqlite, puis automatiquement tant que typo.db existe.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, TypeVar
+
+from storage import DB_FILENAME, JsonStore, Store, thaw
+
+# Délai d'attente d'un verrou tenu par un autre processus (en secondes)
+BUSY_TIMEOUT = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS config (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prompts (
+    scope TEXT NOT NULL,
+    language TEXT NOT NULL,
+    action TEXT NOT NULL,
+    label TEXT,
+    prompt TEXT NOT NULL,
+    enabled INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (scope, language, action)
+);
+CREATE TABLE IF NOT EXISTS snippets (
+    id TEXT PRIMARY KEY,
+    label TEXT NOT NULL,
+    content TEXT NOT NULL,
+    hotkey_slot INTEGER,
+    hash TEXT,
+    size INTEGER,
+    abbreviation TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_snippets_slot ON snippets (hotkey_slot) WHERE hotkey_slot IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_snippets_label ON snippets (label COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS usage_events (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    month TEXT NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 1,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usage_month ON usage_events (month);
+"""
+
+# Colonnes ajoutées après la création initiale des tables : {table: [(colonne, type)]}
+ADDED_COLUMNS = {
+    "snippets": [("hash", "TEXT"), ("size", "INTEGER"), ("abbreviation", "TEXT")],
+}
+
+T = TypeVar("T")
+
+# Connexion partagée (les accès sont sérialisés par _lock)
+_lock = threading.RLock()
+_connection: Optional[sqlite3.Connection] = None
+_connection_path: Optional[Path] = None
+
+Rows = Dict[Tuple, Tuple]
+
+
+class TableCodec:
+    """
+    Correspondance entre un document et les lignes d'une table.
+
+    Une ligne est identifiée par ses colonnes de clé ; le document est
+    reconstruit dans l'ordre d'insertion (rowid).
+    """
+
+    def __init__(
+        self,
+        table: str,
+        key_columns: Tuple[str, ...],
+        value_columns: Tuple[str, ...],
+        to_rows: Callable[[Dict[str, Any]], Rows],
+        to_document: Callable[[Rows], Dict[str, Any]]
+    ):
+        self.table = table
+        self.key_columns = key_columns
+        self.value_columns = value_columns
+        self.to_rows = to_rows
+        self.to_document = to_document
+
+        columns = key_columns + value_columns
+        self.select_sql = f"SELECT {', '.join(columns)} FROM {table} ORDER BY rowid"
+        self.upsert_sql = (
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET "
+            + ", ".join(f"{column} = excluded.{column}" for column in value_columns)
+        )
+        self.delete_sql = (
+            f"DELETE FROM {table} WHERE "
+            + " AND ".join(f"{column} = ?" for column in key_columns)
+        )
+
+    def load(self, connection: sqlite3.Connection) -> Rows:
+        """Lit toutes les lignes de la table."""
+        size = len(self.key_columns)
+        return {
+            tuple(row[:size]): tuple(row[size:])
+            for row in connection.execute(self.select_sql)
+        }
+
+    def apply(self, connection: sqlite3.Connection, old: Rows, new: Rows) -> None:
+        """Écrit uniquement les lignes ajoutées, modifiées ou supprimées."""
+        removed = [key for key in old if key not in new]
+        changed = [key + values for key, values in new.items() if old.get(key) != values]
+        if removed:
+            connection.executemany(self.delete_sql, removed)
+        if changed:
+            connection.executemany(self.upsert_sql, changed)
+
+
+def _config_rows(document: Dict[str, Any]) -> Rows:
+    return {(key,): (json.dumps(value, ensure_ascii=False),) for key, value in document.items()}
+
+
+def _config_document(rows: Rows) -> Dict[str, Any]:
+    return {key: json.loads(value) for (key,), (value,) in rows.items()}
+
+
+def _prompts_rows(document: Dict[str, Any]) -> Rows:
+    rows = {}
+    for action_id, custom in document.get("custom", {}).items():
+        rows[("custom", "", action_id)] = (
+            custom.get("label", action_id),
+            custom.get("prompt", ""),
+            int(custom.get("enabled", True))
+        )
+    for language, prompts in document.get("overrides", {}).items():
+        for action, prompt in prompts.items():
+            if prompt is not None:
+                rows[("override", language, action)] = (None, prompt, 1)
+    return rows
+
+
+def _prompts_document(rows: Rows) -> Dict[str, Any]:
+    document: Dict[str, Any] = {"custom": {}, "overrides": {}}
+    for (scope, language, action), (label, prompt, enabled) in rows.items():
+        if scope == "custom":
+            document["custom"][action] = {"label": label, "prompt": prompt, "enabled": bool(enabled)}
+        else:
+            document["overrides"].setdefault(language, {})[action] = prompt
+    return document
+
+
+def _snippets_rows(document: Dict[str, Any]) -> Rows:
+    # Contenu dans la colonne content, ou hors base (hash, size) s'il est stocké à part
+    return {
+        (snippet["id"],): (
+            snippet.get("label", ""),
+            snippet.get("content", ""),
+            snippet.get("hotkey_slot"),
+            snippet.get("hash"),
+            snippet.get("size"),
+            snippet.get("abbreviation")
+        )
+        for snippet in document.get("snippets", [])
+    }
+
+
+def _snippets_document(rows: Rows) -> Dict[str, Any]:
+    snippets = []
+    for (snippet_id,), (label, content, hotkey_slot, content_hash, size, abbreviation) in rows.items():
+        snippet = {"id": snippet_id, "label": label, "hotkey_slot": hotkey_slot}
+        if abbreviation is not None:
+            snippet["abbreviation"] = abbreviation
+        if content_hash is None:
+            snippet["content"] = content
+        else:
+            snippet["hash"] = content_hash
+            snippet["size"] = size
+        snippets.append(snippet)
+    return {"snippets": snippets}
+
+
+CODECS = {
+    "config": TableCodec("config", ("key",), ("value",), _config_rows, _config_document),
+    "prompts": TableCodec(
+        "prompts", ("scope", "language", "action"), ("label", "prompt", "enabled"),
+        _prompts_rows, _prompts_document
+    ),
+    "snippets": TableCodec(
+        "snippets", ("id",), ("label", "content", "hotkey_slot", "hash", "size", "abbreviation"),
+        _snippets_rows, _snippets_document
+    ),
+}
+
+
+def connect(directory: Path) -> sqlite3.Connection:
+    """
+    Retourne la connexion à typo.db (créée et initialisée au premier appel).
+
+    Args:
+        directory: Répertoire de configuration.
+
+    Returns:
+        Connexion en mode autocommit (transactions explicites), à utiliser sous _lock.
+    """
+    global _connection, _connection_path
+    path = directory / DB_FILENAME
+    with _lock:
+        if _connection is not None and _connection_path == path:
+            return _connection
+        if _connection is not None:
+            _connection.close()
+
+        directory.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(
+            str(path), timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        _add_columns(connection)
+        _connection, _connection_path = connection, path
+        return connection
+
+
+def _add_columns(connection: sqlite3.Connection) -> None:
+    """Ajoute aux tables d'une base existante les colonnes apparues depuis sa création."""
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+        for column, column_type in columns:
+            if column not in existing:
+                connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def _data_version(connection: sqlite3.Connection) -> int:
+    """Compteur incrémenté quand un autre processus valide une transaction."""
+    return connection.execute("PRAGMA data_version").fetchone()[0]
+
+
+def _is_imported(connection: sqlite3.Connection, name: str) -> bool:
+    row = connection.execute("SELECT 1 FROM meta WHERE key = ?", (f"imported:{name}",)).fetchone()
+    return row is not None
+
+
+def _mark_imported(connection: sqlite3.Connection, name: str) -> None:
+    connection.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, datetime('now'))",
+        (f"imported:{name}",)
+    )
+
+
+def _schema_version(connection: sqlite3.Connection, name: str) -> int:
+    """Version du schéma d'un document en base (1 : documents importés avant le suivi des versions)."""
+    row = connection.execute("SELECT value FROM meta WHERE key = ?", (f"schema:{name}",)).fetchone()
+    return int(row[0]) if row is not None else 1
+
+
+def _set_schema_version(connection: sqlite3.Connection, name: str, version: int) -> None:
+    connection.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+        (f"schema:{name}", str(version))
+    )
+
+
+class _Transaction:
+    """Transaction d'écriture (BEGIN IMMEDIATE : verrou d'écriture inter-processus)."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        _lock.acquire()
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            _lock.release()
+            raise
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        try:
+            self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            _lock.release()
+
+
+class SqliteStore(Store):
+    """
+    Document stocké dans une table de typo.db, même interface que JsonStore.
+
+    Le cache est invalidé par PRAGMA data_version (commit d'un autre
+    processus) ; une écriture n'applique que la différence avec les lignes
+    déjà en base.
+
+    Tous les stores partagent le verrou de la connexion (_lock) : un seul
+    verrou, donc pas d'ordre d'acquisition à respecter entre lecture,
+    écriture et transaction.
+    """
+
+    def __init__(self, name: str, default: Callable[[], Dict[str, Any]], source: JsonStore, write_delay: float = 0.0):
+        """
+        Args:
+            name: Nom du document (clé de CODECS).
+            default: Fonction retournant le contenu initial.
+            source: Store JSON du même document, importé une seule fois.
+            write_delay: Si > 0, les écritures sont différées et regroupées (en secondes).
+        """
+        super().__init__(default, write_delay)
+        self._lock = _lock
+        self.name = name
+        self.codec = CODECS[name]
+        self.source = source
+        self._rows: Rows = {}
+        self._data_version: Optional[int] = None
+
+    @property
+    def path(self) -> Path:
+        """Chemin de la base."""
+        return self.source.path.parent / DB_FILENAME
+
+    def exists(self) -> bool:
+        """Indique si le document est en base (ou encore à importer depuis son fichier JSON)."""
+        if self.source.path.exists():
+            return True
+        if not self.path.exists():
+            return False
+        with _lock:
+            return _is_imported(self._connection(), self.name)
+
+    def _connection(self) -> sqlite3.Connection:
+        return connect(self.source.path.parent)
+
+    def read(self, revalidate: bool = True, strict: bool = False) -> Mapping[str, Any]:
+        """
+        Retourne le document (snapshot immuable).
+
+        Args:
+            revalidate: Si True, relit la table si un autre processus l'a modifiée.
+            strict: Si True, propage les erreurs SQLite au lieu de retomber sur le contenu par défaut.
+
+        Returns:
+            Mapping immuable.
+
+        Raises:
+            sqlite3.Error: En mode strict, si la base ne peut pas être lue.
+        """
+        data = self._data
+        if data is not None and not revalidate:
+            return data
+
+        with self._lock:
+            try:
+                connection = self._connection()
+                if self._data is not None and _data_version(connection) == self._data_version:
+                    return self._data
+                return self._load(connection)
+            except sqlite3.Error as e:
+                if strict:
+                    raise
+                print(f"Erreur lecture {DB_FILENAME} ({self.name}): {e}")
+                if self._data is None:
+                    self._publish(self.default())
+                return self._data
+
+    def update(
+        self,
+        mutate: Callable[[Dict[str, Any]], T],
+        derive: Optional[Callable[[Any, Mapping[str, Any]], Any]] = None
+    ) -> T:
+        """
+        Lecture-modification-écriture dans une transaction d'écriture.
+
+        Args:
+            mutate: Fonction modifiant le dict reçu ; sa valeur de retour est retournée.
+            derive: Voir JsonStore.update.
+
+        Returns:
+            Valeur retournée par mutate.
+        """
+        connection = self._connection()
+        with self._lock, _Transaction(connection):
+            if self._data is None or _data_version(connection) != self._data_version:
+                self._load(connection, in_transaction=True)
+            data = thaw(self._data)
+            generation = self.generation
+            result = mutate(data)
+            self._publish(data)
+            self._rederive(generation, derive)
+            self._discard_pending_write()
+            self._apply(connection)
+        return result
+
+    def _load(self, connection: sqlite3.Connection, in_transaction: bool = False) -> Mapping[str, Any]:
+        """Lit la table, après l'import unique du fichier JSON et les migrations (appelé sous les verrous)."""
+        if (not _is_imported(connection, self.name)
+                or _schema_version(connection, self.name) < self.source.schema_version):
+            if in_transaction:
+                self._import(connection)
+                self._migrate(connection)
+            else:
+                with _Transaction(connection):
+                    self._import(connection)
+                    self._migrate(connection)
+
+        rows = self.codec.load(connection)
+        self._data_version = _data_version(connection)
+        if self._data is not None and rows == self._rows:
+            # Commit d'un autre processus sur une autre table : snapshot et écriture différée conservés
+            return self._data
+        self._rows = rows
+        self._discard_pending_write()
+        self._publish(self.codec.to_document(rows) if rows else self.default())
+        return self._data
+
+    def _import(self, connection: sqlite3.Connection) -> None:
+        """Importe le fichier JSON existant (une seule fois, sous transaction)."""
+        if _is_imported(connection, self.name):
+            return
+        # Lecture seule : le fichier JSON (et son journal) reste tel quel
+        document = self.source.read_detached()
+        if document is not None:
+            self.codec.apply(connection, self.codec.load(connection), self.codec.to_rows(document))
+        _mark_imported(connection, self.name)
+        # Le fichier JSON est déjà migré par sa lecture
+        _set_schema_version(connection, self.name, self.source.schema_version)
+
+    def _migrate(self, connection: sqlite3.Connection) -> None:
+        """Applique aux lignes en base les migrations du document (sous transaction)."""
+        version = _schema_version(connection, self.name)
+        if version >= self.source.schema_version:
+            return
+        rows = self.codec.load(connection)
+        document = self.codec.to_document(rows)
+        while version < self.source.schema_version:
+            version += 1
+            migration = self.source.migrations.get(version)
+            if migration is not None:
+                document = migration(document)
+        self.codec.apply(connection, rows, self.codec.to_rows(document))
+        _set_schema_version(connection, self.name, version)
+
+    def _apply(self, connection: sqlite3.Connection) -> None:
+        """Écrit la différence entre le snapshot et les lignes en base (sous transaction)."""
+        rows = self.codec.to_rows(thaw(self._data))
+        self.codec.apply(connection, self._rows, rows)
+        self._rows = rows
+
+    def _write_current(self) -> bool:
+        """Persiste le snapshot courant dans une transaction."""
+        try:
+            connection = self._connection()
+            with self._lock, _Transaction(connection):
+                if self._data is None:
+                    return False
+                self._apply(connection)
+            return True
+        except sqlite3.Error as e:
+            print(f"Erreur sauvegarde {DB_FILENAME} ({self.name}): {e}")
+            return False
+
+
+def import_usage_file(directory: Path, source: JsonStore) -> None:
+    """
+    Importe usage_stats.json une seule fois (un événement agrégé pour le mois).
+
+    Args:
+        directory: Répertoire de configuration.
+        source: Store JSON de usage_stats.json.
+    """
+    connection = connect(directory)
+    with _Transaction(connection):
+        if _is_imported(connection, "usage"):
+            return
+        if source.path.exists():
+            stats = source.read()
+            if stats.get("requests_count") and stats.get("month"):
+                connection.execute(
+                    "INSERT INTO usage_events (created_at, month, requests, input_tokens, output_tokens) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        stats.get("last_updated", ""),
+                        stats["month"],
+                        stats["requests_count"],
+                        stats.get("input_tokens", 0),
+                        stats.get("output_tokens", 0)
+                    )
+                )
+        _mark_imported(connection, "usage")
+
+
+def record_usage(directory: Path, created_at: str, month: str, input_tokens: int, output_tokens: int) -> None:
+    """
+    Ajoute un événement d'utilisation (une requête API).
+
+    Args:
+        directory: Répertoire de configuration.
+        created_at: Horodatage ISO.
+        month: Mois au format YYYY-MM.
+        input_tokens: Tokens en entrée.
+        output_tokens: Tokens en sortie.
+    """
+    connection = connect(directory)
+    with _Transaction(connection):
+        connection.execute(
+            "INSERT INTO usage_events (created_at, month, input_tokens, output_tokens) VALUES (?, ?, ?, ?)",
+            (created_at, month, input_tokens, output_tokens)
+        )
+
+
+def get_usage_totals(directory: Path, month: str) -> Dict[str, Any]:
+    """
+    Agrège les événements d'un mois (index sur month).
+
+    Args:
+        directory: Répertoire de configuration.
+        month: Mois au format YYYY-MM.
+
+    Returns:
+        Dict au format de usage_stats.json.
+    """
+    connection = connect(directory)
+    with _lock:
+        requests, input_tokens, output_tokens, last_updated = connection.execute(
+            "SELECT COALESCE(SUM(requests), 0), COALESCE(SUM(input_tokens), 0), "
+            "COALESCE(SUM(output_tokens), 0), MAX(created_at) FROM usage_events WHERE month = ?",
+            (month,)
+        ).fetchone()
+    return {
+        "requests_count": requests,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "month": month,
+        "last_updated": last_updated or ""
+    }
+
+
+def replace_usage_totals(directory: Path, stats: Mapping[str, Any]) -> None:
+    """
+    Remplace les événements d'un mois par un seul événement agrégé (reset, correction).
+
+    Args:
+        directory: Répertoire de configuration.
+        stats: Dict au format de usage_stats.json.
+    """
+    connection = connect(directory)
+    with _Transaction(connection):
+        connection.execute("DELETE FROM usage_events WHERE month = ?", (stats["month"],))
+        if stats.get("requests_count"):
+            connection.execute(
+                "INSERT INTO usage_events (created_at, month, requests, input_tokens, output_tokens) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    stats.get("last_updated", ""),
+                    stats["month"],
+                    stats["requests_count"],
+                    stats.get("input_tokens", 0),
+                    stats.get("output_tokens", 0)
+                )
+            )
@@ -0,0 +1,164 @@
+"""Surveillance des fichiers de configuration pour le rechargement à chaud."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+# Délai sans nouvel événement avant de notifier (en secondes)
+DEBOUNCE_DELAY = 0.3
+
+# Intervalle de scrutation du mode polling (en secondes)
+POLL_INTERVAL = 1.0
+
+# Constantes inotify (linux/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_inotify():
+    """Retourne la libc si inotify est disponible, None sinon."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class ConfigWatcher:
+    """
+    Surveille un ensemble de fichiers d'un répertoire et notifie les changements.
+
+    Utilise inotify sous Linux, et une scrutation périodique (mtime + taille)
+    ailleurs. Les rafales d'événements (écriture temp + rename, sauvegardes
+    successives) sont regroupées : le callback reçoit l'ensemble des noms de
+    fichiers modifiés une fois le répertoire calme depuis DEBOUNCE_DELAY.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        filenames: Iterable[str],
+        on_change: Callable[[Set[str]], None],
+        debounce: float = DEBOUNCE_DELAY,
+        poll_interval: float = POLL_INTERVAL
+    ):
+        """
+        Initialise le watcher.
+
+        Args:
+            directory: Répertoire à surveiller.
+            filenames: Noms des fichiers à suivre (les autres sont ignorés).
+            on_change: Callback appelé avec l'ensemble des fichiers modifiés.
+            debounce: Délai de regroupement des événements (en secondes).
+            poll_interval: Intervalle de scrutation du mode polling (en secondes).
+        """
+        self.directory = Path(directory)
+        self.filenames = frozenset(filenames)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pending: Set[str] = set()
+        self._last_event = 0.0
+
+    def start(self) -> None:
+        """Démarre la surveillance dans un thread dédié."""
+        if self._thread is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        libc = _load_inotify()
+        target = self._run_inotify if libc else self._run_polling
+        self._thread = threading.Thread(target=target, args=(libc,) if libc else (), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête la surveillance."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _record(self, name: str) -> None:
+        """Enregistre un événement sur un fichier suivi."""
+        if name in self.filenames:
+            self._pending.add(name)
+            self._last_event = time.monotonic()
+
+    def _flush_if_quiet(self) -> None:
+        """Notifie les changements accumulés si le délai de debounce est écoulé."""
+        if self._pending and time.monotonic() - self._last_event >= self.debounce:
+            changed, self._pending = self._pending, set()
+            try:
+                self.on_change(changed)
+            except Exception as e:
+                print(f"Erreur rechargement ({', '.join(sorted(changed))}): {e}")
+
+    def _run_inotify(self, libc) -> None:
+        """Boucle de surveillance basée sur inotify."""
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0 or libc.inotify_add_watch(fd, os.fsencode(self.directory), _WATCH_MASK) < 0:
+            if fd >= 0:
+                os.close(fd)
+            self._run_polling()
+            return
+
+        try:
+            while not self._stop.is_set():
+                timeout = self.debounce if self._pending else 0.5
+                readable, _, _ = select.select([fd], [], [], timeout)
+                if readable:
+                    try:
+                        data = os.read(fd, 64 * 1024)
+                    except BlockingIOError:
+                        data = b""
+                    offset = 0
+                    while offset + _EVENT_HEADER.size <= len(data):
+                        _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                        offset += _EVENT_HEADER.size
+                        name = data[offset:offset + length].rstrip(b"\0")
+                        offset += length
+                        self._record(os.fsdecode(name))
+                self._flush_if_quiet()
+        finally:
+            os.close(fd)
+
+    def _stat_all(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        """Retourne la signature (mtime, taille) de chaque fichier suivi."""
+        signatures = {}
+        for name in self.filenames:
+            try:
+                stat = (self.directory / name).stat()
+                signatures[name] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                signatures[name] = None
+        return signatures
+
+    def _run_polling(self) -> None:
+        """Boucle de surveillance par scrutation périodique."""
+        previous = self._stat_all()
+        while not self._stop.wait(self.debounce if self._pending else self.poll_interval):
+            current = self._stat_all()
+            for name, signature in current.items():
+                if signature != previous.get(name):
+                    self._record(name)
+            previous = current
+            self._flush_if_quiet()
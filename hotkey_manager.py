@@ -2,6 +2,8 @@
 
 from typing import Dict, List, Optional, Set, Tuple
 import settings_manager
+import prompt_manager
+from snippet_manager import MAX_HOTKEY_SLOT
 
 
 # Mapping des caractères vers les VK codes Windows
@@ -25,6 +27,33 @@ CHAR_TO_VK = {
 # VK codes vers caractères (reverse mapping)
 VK_TO_CHAR = {v: k for k, v in CHAR_TO_VK.items()}
 
+# Bits des modificateurs (masque combiné pour l'indexation des raccourcis)
+MOD_CTRL = 1
+MOD_ALT = 2
+MOD_SHIFT = 4
+MOD_COUNT = 8  # Nombre de combinaisons possibles de modificateurs
+
+# Modificateurs des raccourcis snippets (Ctrl+Shift+1 à 9)
+SNIPPET_SLOT_MODIFIERS = MOD_CTRL | MOD_SHIFT
+
+# VK codes des chiffres 1-9 : rangée supérieure (49-57) et pavé numérique (97-105)
+SNIPPET_SLOT_VKS = {slot: (48 + slot, 96 + slot) for slot in range(1, 10)}
+
+# VK code -> chiffre (rangée supérieure et pavé numérique), pour les accords snippets
+DIGIT_VKS = {**{48 + digit: digit for digit in range(10)}, **{96 + digit: digit for digit in range(10)}}
+
+# Accord snippet : raccourci "snippet_chord" puis le numéro du slot sur ce nombre de chiffres
+SNIPPET_CHORD_DIGITS = len(str(MAX_HOTKEY_SLOT))
+
+# Délai maximum entre deux touches d'un accord (en secondes)
+SNIPPET_CHORD_TIMEOUT = 2.0
+
+# Actions principales, dans l'ordre d'affichage (aide et menu tray)
+MAIN_ACTIONS = ['correct', 'format', 'reformulate', 'professional', 'translate', 'help']
+
+# Actions traitées localement (pas de prompt associé)
+SPECIAL_ACTIONS = {'help', 'snippet_search'}
+
 # Raccourcis système réservés (ne pas autoriser)
 RESERVED_COMBINATIONS = {
     # Windows shortcuts
@@ -57,6 +86,175 @@ def parse_hotkey(hotkey_config: Dict[str, any]) -> Optional[int]:
     return CHAR_TO_VK.get(key)
 
 
+def get_modifier_mask(hotkey_config: Dict[str, any]) -> int:
+    """
+    Convertit les modificateurs d'un hotkey config en masque de bits.
+
+    Args:
+        hotkey_config: Dict avec clés "ctrl", "alt", "shift" (bool).
+
+    Returns:
+        Masque combinant MOD_CTRL, MOD_ALT et MOD_SHIFT.
+
+    Example:
+        >>> get_modifier_mask({"ctrl": True, "alt": True, "key": "c"})
+        3
+    """
+    mask = 0
+    if hotkey_config.get("ctrl"):
+        mask |= MOD_CTRL
+    if hotkey_config.get("alt"):
+        mask |= MOD_ALT
+    if hotkey_config.get("shift"):
+        mask |= MOD_SHIFT
+    return mask
+
+
+def compile_hotkey_table(
+    hotkeys: Optional[Dict[str, Dict[str, any]]] = None
+) -> List[Dict[int, str]]:
+    """
+    Précompile les raccourcis en table indexée par (masque, VK code).
+
+    La table est une liste de MOD_COUNT dicts : table[masque][vk] -> action.
+    La résolution d'une touche se fait donc en O(1), sans allocation.
+    Les slots snippets (Ctrl+Shift+1-9, rangée et pavé numérique) sont
+    ajoutés sans écraser une action configurée sur la même combinaison.
+
+    Args:
+        hotkeys: Dict {action: hotkey_config}, ou None pour la configuration actuelle.
+
+    Returns:
+        Liste de dicts {vk: action}, indexée par masque de modificateurs.
+    """
+    if hotkeys is None:
+        hotkeys = get_all_hotkeys()
+
+    table: List[Dict[int, str]] = [{} for _ in range(MOD_COUNT)]
+
+    for action, hotkey_config in hotkeys.items():
+        vk = parse_hotkey(hotkey_config)
+        mask = get_modifier_mask(hotkey_config)
+        if vk and mask:
+            table[mask][vk] = action
+
+    snippet_actions = table[SNIPPET_SLOT_MODIFIERS]
+    for slot, vks in SNIPPET_SLOT_VKS.items():
+        for vk in vks:
+            snippet_actions.setdefault(vk, f"snippet_{slot}")
+
+    return table
+
+
+def is_special_action(action: str) -> bool:
+    """
+    Vérifie si une action est traitée localement (aide, snippets).
+
+    Args:
+        action: Nom de l'action.
+
+    Returns:
+        True si l'action n'utilise pas de prompt, False sinon.
+    """
+    return action in SPECIAL_ACTIONS or action.startswith('snippet_')
+
+
+class SnippetChord:
+    """
+    Automate des accords snippets : raccourci "snippet_chord" puis
+    SNIPPET_CHORD_DIGITS chiffres (ex : Ctrl+Alt+N, 4, 2 -> slot 42).
+
+    Une touche qui n'est pas un chiffre, ou un délai dépassé entre deux
+    touches, abandonne l'accord ; la touche est alors traitée normalement.
+    Utilisé par le seul thread du hook clavier.
+    """
+
+    __slots__ = ("pending", "value", "digits", "typed", "deadline")
+
+    def __init__(self):
+        self.pending = False
+        self.value = 0
+        self.digits = 0
+        self.typed = 0  # Chiffres tapés sans Ctrl ni Alt (insérés dans l'application)
+        self.deadline = 0.0
+
+    def start(self, now: float) -> None:
+        """
+        Commence un accord (raccourci "snippet_chord" pressé).
+
+        Args:
+            now: Horloge monotone (time.monotonic()).
+        """
+        self.pending = True
+        self.value = 0
+        self.digits = 0
+        self.typed = 0
+        self.deadline = now + SNIPPET_CHORD_TIMEOUT
+
+    def feed(self, vk: Optional[int], now: float, typed: bool = False) -> Optional[int]:
+        """
+        Avance l'accord en cours d'une touche.
+
+        Args:
+            vk: VK code de la touche (None : touche spéciale).
+            now: Horloge monotone (time.monotonic()).
+            typed: True si le chiffre est inséré dans l'application (ni Ctrl ni Alt).
+
+        Returns:
+            None si la touche ne fait pas partie de l'accord (abandonné),
+            0 si elle est consommée sans slot à déclencher (accord incomplet
+            ou slot 0), sinon le numéro du slot.
+        """
+        digit = DIGIT_VKS.get(vk)
+        if digit is None or now > self.deadline:
+            self.pending = False
+            return None
+
+        self.value = self.value * 10 + digit
+        self.digits += 1
+        self.typed += typed
+        if self.digits < SNIPPET_CHORD_DIGITS:
+            self.deadline = now + SNIPPET_CHORD_TIMEOUT
+            return 0
+        self.pending = False
+        return self.value
+
+
+def format_snippet_slot(slot: int) -> str:
+    """
+    Formate le raccourci d'un slot snippet pour l'affichage.
+
+    Args:
+        slot: Numéro de slot (1 à MAX_HOTKEY_SLOT).
+
+    Returns:
+        String formaté, ex: "Ctrl+Shift+4" ou "Ctrl+Alt+N, 4 2".
+    """
+    if slot <= 9:
+        return f"Ctrl+Shift+{slot}"
+    chord = get_all_hotkeys().get("snippet_chord")
+    leader = format_hotkey_display(chord) if chord else "Accord"
+    return f"{leader}, {' '.join(str(slot).zfill(SNIPPET_CHORD_DIGITS))}"
+
+
+def get_main_actions() -> List[str]:
+    """
+    Retourne les actions à afficher dans l'aide et le menu tray.
+    Actions principales d'abord, puis les prompts custom activés ayant un raccourci.
+
+    Returns:
+        Liste des noms d'actions ayant un raccourci configuré.
+    """
+    all_hotkeys = get_all_hotkeys()
+    available = set(prompt_manager.get_all_actions())
+    actions = [action for action in MAIN_ACTIONS if action in all_hotkeys]
+    actions.extend(sorted(
+        action for action in all_hotkeys
+        if action not in MAIN_ACTIONS and action in available
+    ))
+    return actions
+
+
 def format_hotkey_display(hotkey_config: Dict[str, any]) -> str:
     """
     Formate un hotkey config en string lisible pour l'affichage.
@@ -244,11 +442,34 @@ def update_hotkey(action: str, hotkey_config: Dict[str, any]) -> Tuple[bool, str
     return True, ""
 
 
+def save_hotkeys(hotkeys: Dict[str, Dict[str, any]]) -> None:
+    """
+    Enregistre un ensemble de raccourcis en une seule modification atomique.
+
+    Seuls les raccourcis modifiés sont réécrits, dans une transaction
+    (config.json écrit une fois) ; les actions absentes de hotkeys sont retirées.
+
+    Args:
+        hotkeys: Dict {action: hotkey_config} complet.
+    """
+    current = get_all_hotkeys()
+    changed = {action: config for action, config in hotkeys.items() if current.get(action) != config}
+    removed = set(current) - set(hotkeys)
+    if not changed and not removed:
+        return
+
+    with settings_manager.transaction():
+        if removed:
+            settings_manager.set("hotkeys", hotkeys)
+            return
+        for action, hotkey_config in changed.items():
+            settings_manager.set(f"hotkeys.{action}", hotkey_config)
+
+
 def reset_to_defaults() -> None:
     """Réinitialise tous les hotkeys aux valeurs par défaut."""
     from settings_manager import DEFAULT_CONFIG
-    default_hotkeys = DEFAULT_CONFIG["hotkeys"].copy()
-    settings_manager.set("hotkeys", default_hotkeys)
+    save_hotkeys(DEFAULT_CONFIG["hotkeys"])
 
 
 def get_action_label(action: str) -> str:
@@ -277,6 +498,11 @@ def get_action_label(action: str) -> str:
         "snippet_7": "Snippet 7",
         "snippet_8": "Snippet 8",
         "snippet_9": "Snippet 9",
-        "snippet_search": "Rechercher un snippet"
+        "snippet_search": "Rechercher un snippet",
+        "snippet_chord": f"Snippet par numéro (suivi de {SNIPPET_CHORD_DIGITS} chiffres)"
     }
-    return labels.get(action, action)
+    if action in labels:
+        return labels[action]
+
+    # Prompts custom : label défini par l'utilisateur
+    return prompt_manager.get_action_label(action)
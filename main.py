@@ -2,20 +2,55 @@
 
 import sys
 import threading
+import time
 from pynput import keyboard
 from pynput.keyboard import Key, KeyCode
 
 import settings_manager
 import snippet_manager
+import storage
 import hotkey_manager
-from clipboard import get_selected_text, paste_text, select_pasted_text
+from perf_monitor import hook_profiler
+from clipboard import erase_typed_text, get_selected_text, paste_text, select_pasted_text
+import prompt_manager
 from api_client import process_text, APIClientError
 from ui import show_error, ask_api_key
 from tray import TrayIcon
+from file_watcher import ConfigWatcher
 
 # Texte affiché pendant le traitement
 LOADING_TEXT = "..."
 
+# Fichiers de la base SQLite (backend sqlite : config, prompts et snippets y sont stockés)
+DATABASE_FILES = frozenset((storage.DB_FILENAME, f"{storage.DB_FILENAME}-wal"))
+
+# Bit par touche modificatrice physique (gauche/droite suivies séparément
+# pour qu'un relâchement de Ctrl droit n'efface pas Ctrl gauche encore tenu)
+MODIFIER_KEY_BITS = {
+    Key.ctrl: 1 << 0,
+    Key.ctrl_l: 1 << 1,
+    Key.ctrl_r: 1 << 2,
+    Key.alt: 1 << 3,
+    Key.alt_l: 1 << 4,
+    Key.alt_r: 1 << 5,
+    Key.alt_gr: 1 << 6,
+    Key.shift: 1 << 7,
+    Key.shift_l: 1 << 8,
+    Key.shift_r: 1 << 9,
+}
+
+_CTRL_KEYS = (1 << 0) | (1 << 1) | (1 << 2)
+_ALT_KEYS = (1 << 3) | (1 << 4) | (1 << 5) | (1 << 6)
+_SHIFT_KEYS = (1 << 7) | (1 << 8) | (1 << 9)
+
+# Masque physique -> masque logique (MOD_CTRL | MOD_ALT | MOD_SHIFT), précalculé
+MODIFIER_MASKS = tuple(
+    (hotkey_manager.MOD_CTRL if held & _CTRL_KEYS else 0)
+    | (hotkey_manager.MOD_ALT if held & _ALT_KEYS else 0)
+    | (hotkey_manager.MOD_SHIFT if held & _SHIFT_KEYS else 0)
+    for held in range(1 << len(MODIFIER_KEY_BITS))
+)
+
 
 class TypoApp:
     """Application principale du correcteur orthographique."""
@@ -23,33 +58,103 @@ class TypoApp:
     def __init__(self):
         self.active = True
         self.processing = False
+        self.cancel_event = None  # Levé par Échap pour annuler le traitement en cours
         self.hotkey_listener = None
+        self.config_watcher = None
         self.tray = None
-        self.pressed_keys = set()
-        self.hotkey_vk_actions = {}  # Mapping VK code -> action (Ctrl+Alt)
-        self.snippet_vk_actions = {}  # Mapping VK code -> action (Ctrl+Shift) pour snippets
+        self.held_modifiers = 0  # Masque des touches modificatrices physiques enfoncées
+        self.configured_table = []  # Table compilée depuis config.json (avant résolution des prompts)
+        self.hotkey_table = []  # table[masque modificateurs][vk] -> action
+        self.snippet_chord = hotkey_manager.SnippetChord()  # Accord en cours (raccourci puis numéro de slot)
+        self.action_prompts = {}  # Mapping action -> template de prompt résolu
+        self.abbreviations = snippet_manager.get_abbreviation_matcher()  # Expansion à la frappe
+        self.document_generations = storage.get_generations()  # Pour savoir quel document de typo.db a changé
         self._build_hotkey_map()
 
     def _build_hotkey_map(self) -> None:
-        """Construit le mapping VK code -> action depuis la configuration."""
-        self.hotkey_vk_actions = {}
-        self.snippet_vk_actions = {}
-        all_hotkeys = hotkey_manager.get_all_hotkeys()
+        """Construit la table (masque modificateurs, VK code) -> action depuis la configuration."""
+        self.configured_table = hotkey_manager.compile_hotkey_table()
+        self._resolve_action_prompts()
 
-        for action, hotkey_config in all_hotkeys.items():
-            vk = hotkey_manager.parse_hotkey(hotkey_config)
-            if vk:
-                self.hotkey_vk_actions[vk] = action
-
-        # Ajouter les hotkeys pour les snippets (Ctrl+Shift+1 à 9)
-        # VK codes: rangée supérieure 49-57, numpad 97-105
-        for slot in range(1, 10):
-            # Rangée supérieure (1-9 = VK 49-57)
-            vk_top = 48 + slot
-            self.snippet_vk_actions[vk_top] = f"snippet_{slot}"
-            # Numpad (1-9 = VK 97-105)
-            vk_numpad = 96 + slot
-            self.snippet_vk_actions[vk_numpad] = f"snippet_{slot}"
+    def _resolve_action_prompts(self) -> None:
+        """
+        Résout une fois les templates des actions liées à un raccourci.
+        Les actions sans prompt (custom supprimé ou désactivé) sont retirées
+        de la table pour ne rien déclencher. La table active est remplacée
+        d'un bloc pour que le listener ne voie jamais un état intermédiaire.
+        """
+        prompt_table = prompt_manager.get_prompt_table()
+        action_prompts = {}
+        hotkey_table = []
+
+        for configured in self.configured_table:
+            actions = {}
+            for vk, action in configured.items():
+                if not hotkey_manager.is_special_action(action):
+                    template = prompt_table.get(action)
+                    if template is None:
+                        continue
+                    action_prompts[action] = template
+                actions[vk] = action
+            hotkey_table.append(actions)
+
+        self.action_prompts = action_prompts
+        self.hotkey_table = hotkey_table
+
+    def start_config_watcher(self) -> None:
+        """Démarre la surveillance des fichiers de configuration (rechargement à chaud)."""
+        self.config_watcher = ConfigWatcher(
+            settings_manager.get_config_dir(),
+            ("config.json", "prompts.json", "snippets.json", "snippets.journal", *DATABASE_FILES),
+            self._on_config_files_changed
+        )
+        self.config_watcher.start()
+
+    def _on_config_files_changed(self, changed: set) -> None:
+        """
+        Recharge uniquement ce qui dépend des fichiers modifiés.
+
+        Args:
+            changed: Noms des fichiers modifiés (config.json, prompts.json, snippets.json,
+                snippets.journal, typo.db, typo.db-wal).
+        """
+        if changed & DATABASE_FILES:
+            # Base SQLite : documents modifiés (par ce processus ou un autre) d'après leur génération
+            generations = storage.get_generations()
+            changed = changed | {
+                f"{name}.json" for name, generation in generations.items()
+                if generation != self.document_generations.get(name)
+            }
+            self.document_generations = generations
+        if "config.json" in changed:
+            try:
+                # Recompile les raccourcis et résout les prompts
+                self.reload_settings()
+            except Exception as e:
+                if self.tray:
+                    self.tray.notify("Typo - Erreur", f"Échec du rechargement : {str(e)}")
+                return
+        elif "prompts.json" in changed:
+            # Seuls les templates changent : la table compilée est conservée
+            self._resolve_action_prompts()
+
+        if "snippets.json" in changed or "snippets.journal" in changed:
+            # Nouvel automate publié d'un bloc (la frappe en cours est oubliée)
+            self.abbreviations = snippet_manager.get_abbreviation_matcher()
+
+        # Le menu tray affiche raccourcis, prompts custom et snippets
+        if self.tray:
+            self.tray.refresh_menu()
+
+    def on_language_change(self, language: str) -> None:
+        """
+        Callback quand l'utilisateur change de langue via le tray.
+
+        Args:
+            language: Nouveau code langue.
+        """
+        prompt_manager.rebuild_prompt_table(language)
+        self._resolve_action_prompts()
 
     def reload_settings(self) -> None:
         """Recharge les paramètres depuis les fichiers JSON."""
@@ -84,7 +189,8 @@ class TypoApp:
                 f"Conflits de raccourcis : {conflict_text}"
             )
 
-        # Reconstruire la map hotkeys
+        # Reconstruire la table des prompts (langue) et la map hotkeys
+        prompt_manager.rebuild_prompt_table()
         self._build_hotkey_map()
 
     def generate_help_message(self) -> str:
@@ -92,14 +198,11 @@ class TypoApp:
         lines = []
         all_hotkeys = hotkey_manager.get_all_hotkeys()
 
-        # Filtrer les actions principales (pas les snippets)
-        main_actions = ['correct', 'format', 'reformulate', 'professional', 'translate', 'help']
-
-        for action in main_actions:
-            if action in all_hotkeys:
-                display = hotkey_manager.format_hotkey_display(all_hotkeys[action])
-                label = hotkey_manager.get_action_label(action)
-                lines.append(f"{display} : {label}")
+        # Actions principales et prompts custom (pas les snippets)
+        for action in hotkey_manager.get_main_actions():
+            display = hotkey_manager.format_hotkey_display(all_hotkeys[action])
+            label = hotkey_manager.get_action_label(action)
+            lines.append(f"{display} : {label}")
 
         return "\n".join(lines)
 
@@ -132,42 +235,52 @@ class TypoApp:
             return
 
         self.processing = True
+        cancel_event = threading.Event()
+        self.cancel_event = cancel_event
 
         try:
             # Récupérer le texte sélectionné
             text = get_selected_text()
-            if not text:
-                self.processing = False
+            if not text or cancel_event.is_set():
                 return
 
             # Afficher le texte de chargement (remplace la sélection)
             paste_text(LOADING_TEXT)
 
-            # Appeler l'API Claude avec la langue configurée
+            # Appeler l'API Claude avec la langue configurée (annulable par Échap)
             try:
-                language = settings_manager.get("language", "fr")
-                corrected = process_text(text, action, language)
-            except APIClientError as e:
-                # En cas d'erreur, restaurer le texte original
+                language = settings_manager.get_language()
+                corrected = process_text(
+                    text,
+                    action,
+                    language,
+                    cancel_event=cancel_event,
+                    prompt_template=self.action_prompts.get(action)
+                )
+            except APIClientError:
+                # En cas d'erreur ou d'annulation, restaurer le texte original
                 select_pasted_text(len(LOADING_TEXT))
                 paste_text(text)
-                self.processing = False
                 return
 
             # Sélectionner le texte de chargement et le remplacer par le résultat
             select_pasted_text(len(LOADING_TEXT))
             paste_text(corrected)
-            self.processing = False
 
         except Exception:
+            pass
+
+        finally:
+            self.cancel_event = None
             self.processing = False
 
-    def _handle_snippet(self, action: str) -> None:
+    def _handle_snippet(self, action: str, typed: int = 0) -> None:
         """
         Gère l'insertion d'un snippet.
 
         Args:
-            action: Action snippet (ex: "snippet_1").
+            action: Action snippet (ex: "snippet_1", "snippet_42").
+            typed: Chiffres d'un accord insérés dans l'application, effacés avant le collage.
         """
         # Extraire le numéro de slot
         try:
@@ -183,7 +296,31 @@ class TypoApp:
         # Coller le contenu
         content = snippet.get('content', '')
         if content:
+            if typed:
+                erase_typed_text(typed)
             paste_text(content)
+            self._record_snippet_use(snippet)
+
+    def _expand_abbreviation(self, snippet_id: str, length: int) -> None:
+        """
+        Remplace une abréviation qui vient d'être tapée par son snippet.
+
+        Args:
+            snippet_id: ID du snippet.
+            length: Longueur de l'abréviation (caractères à effacer).
+        """
+        if self.processing:
+            return
+
+        snippet = snippet_manager.get_snippet(snippet_id)
+        if not snippet:
+            return
+
+        content = snippet.get('content', '')
+        if content:
+            erase_typed_text(length)
+            paste_text(content)
+            self._record_snippet_use(snippet)
 
     def _open_snippet_search(self) -> None:
         """Ouvre la fenêtre de recherche de snippets."""
@@ -200,6 +337,13 @@ class TypoApp:
         content = snippet.get('content', '')
         if content:
             paste_text(content)
+            self._record_snippet_use(snippet)
+
+    def _record_snippet_use(self, snippet: dict) -> None:
+        """Enregistre l'utilisation d'un snippet (classement) et met à jour le menu tray."""
+        snippet_manager.record_use(snippet.get('id', ''))
+        if self.tray:
+            self.tray.refresh_menu()
 
     def on_toggle(self, active: bool) -> None:
         """
@@ -212,55 +356,89 @@ class TypoApp:
 
     def on_quit(self) -> None:
         """Callback quand l'utilisateur quitte via le tray."""
+        if self.config_watcher:
+            self.config_watcher.stop()
         if self.hotkey_listener:
             self.hotkey_listener.stop()
+        # Écrire les fichiers dont la sauvegarde est encore différée
+        storage.flush_all()
         sys.exit(0)
 
     def on_key_press(self, key) -> None:
         """Callback quand une touche est pressée."""
-        self.pressed_keys.add(key)
+        bit = MODIFIER_KEY_BITS.get(key)
+        if bit:
+            self.held_modifiers |= bit
+            return
+        if key is Key.esc and self.cancel_event is not None:
+            self.cancel_event.set()
+            return
+        if self.snippet_chord.pending and self._feed_chord(key):
+            return
         self._check_hotkey(key)
+        if self.active:
+            self._feed_abbreviation(key)
 
     def on_key_release(self, key) -> None:
         """Callback quand une touche est relâchée."""
-        self.pressed_keys.discard(key)
+        bit = MODIFIER_KEY_BITS.get(key)
+        if bit:
+            self.held_modifiers &= ~bit
 
     def _check_hotkey(self, key) -> None:
         """Vérifie si un raccourci est pressé."""
-        # Vérifier les modificateurs
-        ctrl_pressed = Key.ctrl_l in self.pressed_keys or Key.ctrl_r in self.pressed_keys
-        alt_pressed = Key.alt_l in self.pressed_keys or Key.alt_r in self.pressed_keys or Key.alt_gr in self.pressed_keys
-        shift_pressed = Key.shift_l in self.pressed_keys or Key.shift_r in self.pressed_keys or Key.shift in self.pressed_keys
-
-        # Récupérer le virtual key code de la touche
-        vk = None
-        if isinstance(key, KeyCode):
-            vk = getattr(key, 'vk', None)
-
-        # Vérifier Ctrl+Shift pour les snippets (1-9)
-        if ctrl_pressed and shift_pressed and not alt_pressed and vk:
-            if vk in self.snippet_vk_actions:
-                action = self.snippet_vk_actions[vk]
-                threading.Thread(target=self.on_hotkey, args=(action,), daemon=True).start()
-                return
-
-        # Vérifier Ctrl+Alt pour les autres actions
-        if not (ctrl_pressed and alt_pressed):
+        mask = MODIFIER_MASKS[self.held_modifiers]
+        if not mask or not isinstance(key, KeyCode):
             return
 
-        if vk and vk in self.hotkey_vk_actions:
-            action = self.hotkey_vk_actions[vk]
+        action = self.hotkey_table[mask].get(key.vk)
+        if action == 'snippet_chord':
+            self.snippet_chord.start(time.monotonic())
+        elif action:
             threading.Thread(
                 target=self.on_hotkey,
                 args=(action,),
                 daemon=True
             ).start()
 
+    def _feed_chord(self, key) -> bool:
+        """
+        Transmet une touche à l'accord snippet en cours.
+
+        Returns:
+            True si la touche fait partie de l'accord (à ne pas traiter comme raccourci).
+        """
+        typed = not MODIFIER_MASKS[self.held_modifiers] & (hotkey_manager.MOD_CTRL | hotkey_manager.MOD_ALT)
+        slot = self.snippet_chord.feed(getattr(key, 'vk', None), time.monotonic(), typed)
+        if slot is None:
+            return False
+        self.abbreviations.reset()
+        if slot:
+            threading.Thread(
+                target=self._handle_snippet,
+                args=(f"snippet_{slot}", self.snippet_chord.typed),
+                daemon=True
+            ).start()
+        return True
+
+    def _feed_abbreviation(self, key) -> None:
+        """Avance l'automate des abréviations (une touche sans caractère imprimable l'interrompt)."""
+        char = getattr(key, 'char', None)
+        if char is not None and not char.isprintable():
+            char = None
+        match = self.abbreviations.feed(char)
+        if match:
+            threading.Thread(
+                target=self._expand_abbreviation,
+                args=match,
+                daemon=True
+            ).start()
+
     def start_hotkey_listener(self) -> None:
         """Démarre le listener de raccourcis clavier."""
         self.hotkey_listener = keyboard.Listener(
-            on_press=self.on_key_press,
-            on_release=self.on_key_release
+            on_press=hook_profiler.instrument("on_key_press", self.on_key_press),
+            on_release=hook_profiler.instrument("on_key_release", self.on_key_release)
         )
         self.hotkey_listener.start()
 
@@ -280,11 +458,15 @@ class TypoApp:
         # Démarrer le listener de raccourcis
         self.start_hotkey_listener()
 
+        # Recharger automatiquement config, prompts et snippets modifiés
+        self.start_config_watcher()
+
         # Créer et lancer l'icône tray
         self.tray = TrayIcon(
             on_toggle=self.on_toggle,
             on_quit=self.on_quit,
-            on_reload=self.reload_settings
+            on_reload=self.reload_settings,
+            on_language_change=self.on_language_change
         )
 
         # Vérifier les mises à jour au démarrage (en arrière-plan)
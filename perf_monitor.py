@@ -0,0 +1,288 @@
+"""Instrumentation des callbacks du hook clavier global.
+
+Chaque touche tapée sur la machine passe par le listener pynput : le coût
+de ces callbacks retarde la saisie de tout le système. Ce module mesure
+chaque appel (compteur, temps cumulé, max, histogramme) et fournit un
+benchmark de frappe synthétique.
+
+Usage du benchmark :
+    python perf_monitor.py [--rate 150] [--duration 3] [--budget 200]
+"""
+
+import bisect
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Bornes supérieures des buckets de l'histogramme (en microsecondes)
+HISTOGRAM_BOUNDS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Budget de coût par événement clavier (en microsecondes, p99)
+EVENT_BUDGET_US = 200
+
+# Cadence de frappe par défaut du benchmark (touches par seconde)
+BENCHMARK_RATE = 150
+
+_BOUNDS_NS = tuple(bound * 1000 for bound in HISTOGRAM_BOUNDS_US)
+
+
+class CallbackStats:
+    """Statistiques cumulées d'un callback."""
+
+    __slots__ = ("name", "count", "total_ns", "max_ns", "buckets")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        # Un bucket par borne + un bucket de débordement
+        self.buckets = [0] * (len(_BOUNDS_NS) + 1)
+
+    def record(self, elapsed_ns: int) -> None:
+        """Enregistre la durée d'un appel."""
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.buckets[bisect.bisect_left(_BOUNDS_NS, elapsed_ns)] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Retourne les statistiques sous forme sérialisable (durées en µs)."""
+        mean_us = (self.total_ns / self.count / 1000) if self.count else 0.0
+        histogram = {}
+        for bound, hits in zip(HISTOGRAM_BOUNDS_US, self.buckets):
+            histogram[f"<={bound}us"] = hits
+        histogram[f">{HISTOGRAM_BOUNDS_US[-1]}us"] = self.buckets[-1]
+
+        return {
+            "count": self.count,
+            "mean_us": round(mean_us, 2),
+            "max_us": round(self.max_ns / 1000, 2),
+            "total_ms": round(self.total_ns / 1_000_000, 3),
+            "histogram": histogram
+        }
+
+
+class HookProfiler:
+    """Collecte les temps d'exécution des callbacks du hook clavier."""
+
+    def __init__(self):
+        self.enabled = True
+        self.started_at = datetime.now()
+        self._stats: Dict[str, CallbackStats] = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, name: str, callback: Callable) -> Callable:
+        """
+        Enveloppe un callback pour mesurer chacun de ses appels.
+
+        Args:
+            name: Nom affiché dans les statistiques.
+            callback: Callback à mesurer.
+
+        Returns:
+            Callback instrumenté (même signature).
+        """
+        with self._lock:
+            stats = self._stats.setdefault(name, CallbackStats(name))
+        clock = time.perf_counter_ns
+
+        def wrapper(*args):
+            if not self.enabled:
+                return callback(*args)
+            start = clock()
+            try:
+                return callback(*args)
+            finally:
+                stats.record(clock() - start)
+
+        return wrapper
+
+    def reset(self) -> None:
+        """Remet toutes les statistiques à zéro (les callbacks restent instrumentés)."""
+        with self._lock:
+            for stats in self._stats.values():
+                stats.__init__(stats.name)
+            self.started_at = datetime.now()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retourne les statistiques actuelles.
+
+        Returns:
+            Dict {nom_callback: {count, mean_us, max_us, total_ms, histogram}}.
+        """
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+    def format_summary(self) -> str:
+        """
+        Formate les statistiques pour une notification.
+
+        Returns:
+            Une ligne par callback (ex: "on_key_press : 1200 év. • moy 8µs • max 310µs").
+        """
+        lines = []
+        for name, data in self.snapshot().items():
+            lines.append(
+                f"{name} : {data['count']} év. • moy {data['mean_us']:.0f}µs "
+                f"• max {data['max_us']:.0f}µs"
+            )
+        return "\n".join(lines) or "Aucun événement enregistré"
+
+    def dump(self, path: Optional[Path] = None) -> Path:
+        """
+        Écrit les statistiques dans un fichier JSON.
+
+        Args:
+            path: Fichier de destination, par défaut hook_stats.json dans le dossier de config.
+
+        Returns:
+            Chemin du fichier écrit.
+        """
+        if path is None:
+            from settings_manager import ensure_config_dir
+            path = ensure_config_dir() / "hook_stats.json"
+
+        data = {
+            "since": self.started_at.isoformat(),
+            "dumped_at": datetime.now().isoformat(),
+            "budget_us": EVENT_BUDGET_US,
+            "callbacks": self.snapshot()
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return path
+
+
+# Instance globale utilisée par le listener et le menu tray
+hook_profiler = HookProfiler()
+
+
+def _percentile(sorted_values: List[int], percent: float) -> int:
+    """Retourne le percentile d'une liste triée (méthode du rang le plus proche)."""
+    if not sorted_values:
+        return 0
+    rank = max(0, min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_typing_benchmark(
+    rate: int = BENCHMARK_RATE,
+    duration: float = 3.0,
+    budget_us: int = EVENT_BUDGET_US,
+    abbreviations: int = 0
+) -> Dict[str, Any]:
+    """
+    Simule une frappe continue et mesure le coût des callbacks du listener.
+
+    Les événements (appui + relâchement, avec des majuscules via Shift) sont
+    envoyés directement à TypoApp.on_key_press / on_key_release à la cadence
+    demandée, sans listener système ni appel API.
+
+    Args:
+        rate: Touches par seconde.
+        duration: Durée de la simulation (en secondes).
+        budget_us: Budget maximum par événement (p99, en microsecondes).
+        abbreviations: Nombre d'abréviations générées (0 : celles des snippets) ;
+            elles commencent comme les mots tapés, pour parcourir l'automate en profondeur.
+
+    Returns:
+        Dict avec events, mean_us, p50_us, p99_us, max_us, budget_us, passed.
+    """
+    from pynput.keyboard import Key, KeyCode
+    from main import TypoApp
+
+    app = TypoApp()
+    app.on_hotkey = lambda action: None  # Aucun effet de bord si un raccourci matche
+
+    text = "Le vif zéphyr jubile sur les kumquats du clown gracieux. "
+    if abbreviations:
+        from snippet_expander import AbbreviationMatcher
+
+        words = text.split()
+        app.abbreviations = AbbreviationMatcher({
+            f"{words[number % len(words)]}{number}": str(number) for number in range(abbreviations)
+        })
+    sequence = []
+    for char in text:
+        keycode = KeyCode.from_char(char)
+        if char.isupper():
+            sequence.append((Key.shift_l, True))
+        sequence.append((keycode, True))
+        sequence.append((keycode, False))
+        if char.isupper():
+            sequence.append((Key.shift_l, False))
+
+    interval = 1.0 / rate
+    total_keys = int(rate * duration)
+    samples: List[int] = []
+    clock = time.perf_counter_ns
+    press, release = app.on_key_press, app.on_key_release
+
+    next_tick = time.perf_counter()
+    index = 0
+    for _ in range(total_keys):
+        # Envoyer une touche complète (avec ses modificateurs éventuels)
+        while True:
+            key, is_press = sequence[index % len(sequence)]
+            index += 1
+            start = clock()
+            (press if is_press else release)(key)
+            samples.append(clock() - start)
+            if not is_press and key is not Key.shift_l:
+                break
+
+        next_tick += interval
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    samples.sort()
+    p99_us = _percentile(samples, 99) / 1000
+    return {
+        "rate": rate,
+        "events": len(samples),
+        "mean_us": round(sum(samples) / len(samples) / 1000, 2) if samples else 0.0,
+        "p50_us": round(_percentile(samples, 50) / 1000, 2),
+        "p99_us": round(p99_us, 2),
+        "max_us": round(samples[-1] / 1000, 2) if samples else 0.0,
+        "budget_us": budget_us,
+        "passed": p99_us <= budget_us
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée du benchmark de frappe."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark du hook clavier Typo")
+    parser.add_argument("--rate", type=int, default=BENCHMARK_RATE, help="Touches par seconde")
+    parser.add_argument("--duration", type=float, default=3.0, help="Durée en secondes")
+    parser.add_argument("--budget", type=int, default=EVENT_BUDGET_US, help="Budget p99 par événement (µs)")
+    parser.add_argument("--abbreviations", type=int, default=0,
+                        help="Nombre d'abréviations générées (0 : celles des snippets)")
+    args = parser.parse_args(argv)
+
+    result = run_typing_benchmark(args.rate, args.duration, args.budget, args.abbreviations)
+    print(
+        f"{result['events']} événements à {result['rate']} touches/s : "
+        f"moy {result['mean_us']}µs • p50 {result['p50_us']}µs • "
+        f"p99 {result['p99_us']}µs • max {result['max_us']}µs"
+    )
+
+    if not result["passed"]:
+        print(f"ÉCHEC : p99 au-dessus du budget de {result['budget_us']}µs")
+        return 1
+
+    print(f"OK : p99 sous le budget de {result['budget_us']}µs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,453 @@
+"""Banc d'essai des prompts : latence, tokens et stabilité des sorties.
+
+Exécute un ensemble d'actions et de langues sur un corpus de textes,
+contre l'API réelle ou un stub local, et enregistre un rapport JSON
+comparable d'une exécution à l'autre. Permet de juger une modification
+de prompt (vitesse, coût, stabilité) avant de la déployer.
+
+Le corpus est un fichier texte dont les échantillons sont séparés par une
+ligne "---", ou un fichier .jsonl avec un champ "text" par ligne.
+
+Usage :
+    python prompt_bench.py [--actions correct,format] [--languages fr,en]
+                           [--corpus corpus.txt] [--runs 3] [--stub]
+                           [--template correct=nouveau_prompt.txt]
+                           [--output rapport.json] [--baseline ancien.json]
+    python prompt_bench.py --compare ancien.json nouveau.json
+"""
+
+import difflib
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from itertools import combinations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import prompt_manager
+import translations
+import usage_tracker
+from config import MODEL
+from prompt_template import PromptTemplate, compile_template
+
+# Nombre d'exécutions par échantillon (nécessaire pour mesurer la stabilité)
+DEFAULT_RUNS = 3
+
+# Séparateur d'échantillons dans un corpus texte
+CORPUS_SEPARATOR = "---"
+
+# Corpus par défaut (fautes courantes, registres variés)
+DEFAULT_CORPUS = [
+    "Bonjour, je voulais savoir si vous aviez bien recu mon mail d'hier concernant la reunion.",
+    "les resultats du trimestre sont meilleur que prévu mais on doit encore amélioré la marge",
+    "Merci pour ton retour !! je regarde ca demain matin et je te redis",
+    "Suite à notre échange téléphonique, je vous confirme que la livraison aura lieu le 12 et "
+    "que la facture vous sera envoyer par courrier dans la semaine qui suit.",
+]
+
+# Latences simulées du stub (en secondes)
+STUB_TTFT = 0.25
+STUB_SECONDS_PER_TOKEN = 0.004
+
+
+class BenchmarkCall:
+    """Mesures d'un appel unique."""
+
+    def __init__(self, output: str, latency: float, ttft: float, input_tokens: int, output_tokens: int):
+        self.output = output
+        self.latency = latency
+        self.ttft = ttft
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class ApiBackend:
+    """Appels réels à l'API Claude, en streaming pour mesurer le premier token."""
+
+    name = "api"
+
+    def __init__(self):
+        from api_client import get_client
+        self.client = get_client()
+
+    def complete(self, prompt: str, text: str) -> BenchmarkCall:
+        """
+        Envoie le prompt et mesure la réponse.
+
+        L'appel n'est pas comptabilisé dans les statistiques d'utilisation.
+
+        Args:
+            prompt: Prompt final.
+            text: Texte de l'échantillon (non utilisé).
+
+        Returns:
+            Mesures de l'appel.
+        """
+        start = time.perf_counter()
+        ttft = None
+        chunks = []
+        with self.client.messages.stream(
+            model=MODEL,
+            max_tokens=2048,
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            for chunk in stream.text_stream:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                chunks.append(chunk)
+            response = stream.get_final_message()
+        latency = time.perf_counter() - start
+
+        return BenchmarkCall(
+            "".join(chunks),
+            latency,
+            ttft if ttft is not None else latency,
+            response.usage.input_tokens,
+            response.usage.output_tokens
+        )
+
+
+class StubBackend:
+    """
+    Stub local : renvoie le texte de l'échantillon avec des latences simulées.
+
+    Permet de valider le harnais et le coût en tokens d'entrée des prompts
+    sans clé API ni consommation.
+    """
+
+    name = "stub"
+
+    def __init__(self, seed: int = 0):
+        self.random = random.Random(seed)
+
+    def complete(self, prompt: str, text: str) -> BenchmarkCall:
+        """
+        Simule un appel.
+
+        Args:
+            prompt: Prompt final.
+            text: Texte de l'échantillon, renvoyé tel quel.
+
+        Returns:
+            Mesures simulées de l'appel.
+        """
+        from prompt_profiler import estimate_tokens
+
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(text)
+        jitter = self.random.uniform(0.8, 1.2)
+        ttft = STUB_TTFT * jitter + input_tokens * 0.0001
+        latency = ttft + output_tokens * STUB_SECONDS_PER_TOKEN * jitter
+        return BenchmarkCall(text, latency, ttft, input_tokens, output_tokens)
+
+
+def load_corpus(path: Optional[Path] = None) -> List[str]:
+    """
+    Charge un corpus d'échantillons.
+
+    Args:
+        path: Fichier .txt (séparateur "---") ou .jsonl (champ "text").
+            Corpus intégré si None.
+
+    Returns:
+        Liste des textes.
+    """
+    if path is None:
+        return list(DEFAULT_CORPUS)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        if Path(path).suffix == ".jsonl":
+            return [json.loads(line)["text"] for line in f if line.strip()]
+        content = f.read()
+
+    samples = []
+    current: List[str] = []
+    for line in content.splitlines():
+        if line.strip() == CORPUS_SEPARATOR:
+            samples.append("\n".join(current).strip())
+            current = []
+        else:
+            current.append(line)
+    samples.append("\n".join(current).strip())
+    return [sample for sample in samples if sample]
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    """Retourne le percentile d'une liste triée (méthode du rang le plus proche)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def _stability(outputs: List[str]) -> Tuple[float, bool]:
+    """
+    Mesure la stabilité des sorties d'un même échantillon.
+
+    Args:
+        outputs: Sorties des différentes exécutions.
+
+    Returns:
+        Tuple (similarité moyenne entre paires de 0 à 1, sorties toutes identiques).
+    """
+    if len(outputs) < 2:
+        return 1.0, True
+    ratios = [
+        difflib.SequenceMatcher(None, a, b, autojunk=False).ratio()
+        for a, b in combinations(outputs, 2)
+    ]
+    return sum(ratios) / len(ratios), len(set(outputs)) == 1
+
+
+def _summarize(calls: List[BenchmarkCall], outputs_by_sample: List[List[str]]) -> Dict[str, Any]:
+    """Agrège les mesures d'un couple (action, langue)."""
+    latencies = sorted(call.latency * 1000 for call in calls)
+    ttfts = sorted(call.ttft * 1000 for call in calls)
+    input_tokens = sum(call.input_tokens for call in calls)
+    output_tokens = sum(call.output_tokens for call in calls)
+    stabilities = [_stability(outputs) for outputs in outputs_by_sample]
+
+    return {
+        "calls": len(calls),
+        "latency_p50_ms": round(_percentile(latencies, 50), 1),
+        "latency_p95_ms": round(_percentile(latencies, 95), 1),
+        "ttft_p50_ms": round(_percentile(ttfts, 50), 1),
+        "ttft_p95_ms": round(_percentile(ttfts, 95), 1),
+        "input_tokens_mean": round(input_tokens / len(calls), 1),
+        "output_tokens_mean": round(output_tokens / len(calls), 1),
+        "cost_per_call": usage_tracker.calculate_cost(input_tokens, output_tokens) / len(calls),
+        "stability": round(sum(ratio for ratio, _ in stabilities) / len(stabilities), 4),
+        "identical_ratio": round(sum(1 for _, same in stabilities if same) / len(stabilities), 4)
+    }
+
+
+def run_benchmark(
+    actions: List[str],
+    languages: List[str],
+    corpus: List[str],
+    backend,
+    runs: int = DEFAULT_RUNS,
+    templates: Optional[Dict[str, PromptTemplate]] = None,
+    progress=None
+) -> Dict[str, Any]:
+    """
+    Exécute le banc d'essai.
+
+    Args:
+        actions: Actions à mesurer.
+        languages: Codes langue.
+        corpus: Textes des échantillons.
+        backend: ApiBackend ou StubBackend.
+        runs: Nombre d'exécutions par échantillon.
+        templates: Templates candidats remplaçant ceux de prompt_manager (par action).
+        progress: Callback optionnel appelé avec (clé, index, total).
+
+    Returns:
+        Rapport (sérialisable en JSON).
+    """
+    templates = templates or {}
+    results = {}
+    errors = {}
+
+    for language in languages:
+        language_name = translations.get_language_name(language)
+        table = prompt_manager.get_prompt_table(language)
+
+        for action in actions:
+            key = f"{action}/{language}"
+            template = templates.get(action) or table.get(action)
+            if template is None:
+                errors[key] = "Action inconnue"
+                continue
+
+            calls = []
+            outputs_by_sample = []
+            try:
+                for index, text in enumerate(corpus):
+                    prompt = template.render(text, language_name)
+                    outputs = []
+                    for _ in range(runs):
+                        call = backend.complete(prompt, text)
+                        calls.append(call)
+                        outputs.append(call.output)
+                    outputs_by_sample.append(outputs)
+                    if progress:
+                        progress(key, index + 1, len(corpus))
+            except Exception as e:
+                errors[key] = str(e)
+                continue
+
+            results[key] = _summarize(calls, outputs_by_sample)
+            results[key]["template_fixed_chars"] = len(template.fixed_text)
+            results[key]["candidate"] = action in templates
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "model": MODEL,
+        "backend": backend.name,
+        "runs": runs,
+        "corpus_samples": len(corpus),
+        "results": results,
+        "errors": errors
+    }
+
+
+# Métriques comparées : (clé, libellé, format, plus petit = meilleur)
+_COMPARED_METRICS = (
+    ("latency_p50_ms", "p50", "{:.0f}ms", True),
+    ("latency_p95_ms", "p95", "{:.0f}ms", True),
+    ("ttft_p50_ms", "ttft", "{:.0f}ms", True),
+    ("input_tokens_mean", "in", "{:.0f}", True),
+    ("output_tokens_mean", "out", "{:.0f}", True),
+    ("cost_per_call", "$/appel", "{:.6f}", True),
+    ("stability", "stab", "{:.3f}", False),
+)
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """
+    Compare deux rapports, couple (action, langue) par couple.
+
+    Args:
+        baseline: Rapport de référence.
+        current: Nouveau rapport.
+
+    Returns:
+        Lignes de texte décrivant les écarts.
+    """
+    lines = []
+    if baseline.get("backend") != current.get("backend"):
+        lines.append(
+            f"Attention : backends différents ({baseline.get('backend')} -> {current.get('backend')})"
+        )
+
+    for key, result in current["results"].items():
+        previous = baseline["results"].get(key)
+        if previous is None:
+            lines.append(f"{key} : absent de la référence")
+            continue
+
+        parts = []
+        for metric, label, fmt, lower_is_better in _COMPARED_METRICS:
+            old, new = previous.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            value = fmt.format(new)
+            if old:
+                change = (new - old) / old
+                better = change < 0 if lower_is_better else change > 0
+                marker = "" if abs(change) < 0.05 else (" ✓" if better else " ✗")
+                value += f" ({change:+.0%}{marker})"
+            parts.append(f"{label} {value}")
+        lines.append(f"{key} : " + " • ".join(parts))
+
+    return lines
+
+
+def format_report(report: Dict[str, Any]) -> List[str]:
+    """Formate un rapport pour la console."""
+    lines = [
+        f"{report['backend']} • {report['model']} • {report['corpus_samples']} échantillons "
+        f"x {report['runs']} exécutions"
+    ]
+    for key, result in report["results"].items():
+        lines.append(
+            f"{key} : p50 {result['latency_p50_ms']:.0f}ms • p95 {result['latency_p95_ms']:.0f}ms • "
+            f"ttft {result['ttft_p50_ms']:.0f}ms • in {result['input_tokens_mean']:.0f} • "
+            f"out {result['output_tokens_mean']:.0f} • ${result['cost_per_call']:.6f}/appel • "
+            f"stab {result['stability']:.3f}"
+        )
+    for key, error in report["errors"].items():
+        lines.append(f"{key} : ERREUR {error}")
+    return lines
+
+
+def _load_report(path: str) -> Dict[str, Any]:
+    """Charge un rapport JSON."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _parse_templates(specs: List[str]) -> Dict[str, PromptTemplate]:
+    """
+    Charge les templates candidats passés en ACTION=FICHIER.
+
+    Raises:
+        ValueError: Si une spécification est invalide.
+    """
+    from prompt_template import validate_template
+
+    templates = {}
+    for spec in specs:
+        action, sep, path = spec.partition("=")
+        if not sep:
+            raise ValueError(f"Format attendu ACTION=FICHIER : {spec}")
+        source = Path(path).read_text(encoding='utf-8').strip()
+        is_valid, error = validate_template(source)
+        if not is_valid:
+            raise ValueError(f"{path} : {error}")
+        templates[action] = compile_template(source)
+    return templates
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée du banc d'essai des prompts."""
+    import argparse
+    import settings_manager
+
+    parser = argparse.ArgumentParser(description="Banc d'essai des prompts Typo")
+    parser.add_argument("--actions", help="Actions séparées par des virgules (défaut : toutes)")
+    parser.add_argument("--languages", help="Codes langue séparés par des virgules (défaut : langue configurée)")
+    parser.add_argument("--corpus", type=Path, help="Fichier corpus (.txt séparé par '---' ou .jsonl)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Exécutions par échantillon")
+    parser.add_argument("--stub", action="store_true", help="Utiliser le stub local au lieu de l'API")
+    parser.add_argument("--template", action="append", default=[], metavar="ACTION=FICHIER",
+                        help="Template candidat à mesurer à la place du prompt actuel")
+    parser.add_argument("--output", type=Path, help="Fichier rapport JSON")
+    parser.add_argument("--baseline", help="Rapport de référence à comparer au résultat")
+    parser.add_argument("--compare", nargs=2, metavar=("REFERENCE", "NOUVEAU"),
+                        help="Comparer deux rapports existants sans rien exécuter")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        for line in compare_reports(_load_report(args.compare[0]), _load_report(args.compare[1])):
+            print(line)
+        return 0
+
+    actions = args.actions.split(",") if args.actions else prompt_manager.get_all_actions()
+    languages = args.languages.split(",") if args.languages else [settings_manager.get("language", "fr")]
+
+    try:
+        templates = _parse_templates(args.template)
+        corpus = load_corpus(args.corpus)
+        backend = StubBackend() if args.stub else ApiBackend()
+    except Exception as e:
+        print(f"Erreur : {e}")
+        return 1
+
+    def progress(key, index, total):
+        print(f"\r{key} : {index}/{total}", end="", flush=True)
+
+    report = run_benchmark(actions, languages, corpus, backend, args.runs, templates, progress)
+    print()
+
+    output = args.output or settings_manager.ensure_config_dir() / f"prompt_bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    for line in format_report(report):
+        print(line)
+    print(f"Rapport : {output}")
+
+    if args.baseline:
+        print()
+        for line in compare_reports(_load_report(args.baseline), report):
+            print(line)
+
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,15 @@
 """Gestionnaire de prompts personnalisés et par défaut."""
 
-import json
+import copy
 from pathlib import Path
-from typing import Dict, List, Optional
-from settings_manager import ensure_config_dir, get_config_dir
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional
+import settings_manager
+import translations
+from settings_manager import get_config_dir
+from storage import open_store, thaw
 from config import PROMPTS as DEFAULT_PROMPTS
+from prompt_template import PromptTemplate, compile_template, validate_template
 
 
 def get_prompts_path() -> Path:
@@ -13,86 +18,191 @@ def get_prompts_path() -> Path:
 
 
 # Structure par défaut pour prompts.json
+# overrides : {langue: {action: prompt}}
 DEFAULT_PROMPTS_FILE = {
     "custom": {},
     "overrides": {}
 }
 
+# Langue des anciens overrides non classés par langue (édités sur les prompts français)
+LEGACY_OVERRIDES_LANGUAGE = "fr"
 
-def load_prompts_file() -> Dict:
+
+def _normalize(data: Mapping) -> Mapping:
     """
-    Charge le fichier prompts.json.
+    Migre l'ancien format d'overrides {action: prompt} vers {langue: {action: prompt}}.
+    Les anciens overrides sont rattachés à LEGACY_OVERRIDES_LANGUAGE.
+    """
+    overrides = data.get("overrides", {})
+    if all(isinstance(value, Mapping) for value in overrides.values()):
+        return data
+
+    normalized = dict(data)
+    by_language: Dict[str, Dict[str, str]] = {}
+    for key, value in overrides.items():
+        if isinstance(value, Mapping):
+            by_language.setdefault(key, {}).update(value)
+        elif value is not None:
+            by_language.setdefault(LEGACY_OVERRIDES_LANGUAGE, {})[key] = value
+    normalized["overrides"] = by_language
+    return normalized
+
+
+class _PromptState:
+    """Snapshot de prompts.json, templates compilés et tables résolues par langue."""
+
+    __slots__ = ("snapshot", "custom", "overrides", "tables")
+
+    def __init__(self, data: Mapping):
+        self.snapshot = data
+
+        # Le contenu existant est compilé en mode tolérant : un placeholder
+        # inconnu reste littéral au lieu de rendre l'action inutilisable.
+        self.custom: Dict[str, PromptTemplate] = {}
+        for action_id, custom in self.snapshot.get("custom", {}).items():
+            if custom.get("enabled", True) and custom.get("prompt"):
+                self.custom[action_id] = compile_template(custom["prompt"])
+
+        self.overrides: Dict[str, Dict[str, PromptTemplate]] = {}
+        for language, prompts in self.snapshot.get("overrides", {}).items():
+            self.overrides[language] = {
+                action: compile_template(prompt)
+                for action, prompt in prompts.items() if prompt is not None
+            }
+
+        self.tables: Dict[str, Mapping[str, PromptTemplate]] = {}
+
+    def table(self, language: str) -> Mapping[str, PromptTemplate]:
+        """Retourne la table action -> template résolue pour une langue (construite une fois)."""
+        table = self.tables.get(language)
+        if table is None:
+            resolved = {}
+            # 1. Prompts par défaut traduits (fallback sur les prompts français)
+            for action in DEFAULT_PROMPTS:
+                template = translations.get_compiled_prompt(action, language)
+                resolved[action] = template or compile_template(DEFAULT_PROMPTS[action])
+            # 2. Prompts custom activés
+            resolved.update(self.custom)
+            # 3. Overrides de la langue
+            resolved.update(self.overrides.get(language, {}))
+            table = self.tables[language] = MappingProxyType(resolved)
+        return table
+
+
+# prompts.json ; schéma 1 : overrides rangés par langue
+_store = open_store(
+    "prompts",
+    get_prompts_path,
+    lambda: copy.deepcopy(DEFAULT_PROMPTS_FILE),
+    schema_version=1,
+    migrations={1: _normalize},
+    durable=True
+)
+
+
+def _state() -> _PromptState:
+    """
+    Retourne l'état compilé de prompts.json.
+
+    Le fichier n'est parsé (et ses templates compilés) qu'une fois ; chaque
+    lecture se contente d'un stat pour détecter une modification externe.
+    """
+    return _store.read_derived(_PromptState)
+
+
+def get_prompts_snapshot() -> Mapping:
+    """
+    Retourne le contenu de prompts.json sous forme de snapshot immuable.
 
     Returns:
-        Dict avec custom prompts et overrides.
+        Mapping en lecture seule {custom, overrides: {langue: {action: prompt}}}.
     """
-    prompts_path = get_prompts_path()
+    return _state().snapshot
 
-    if not prompts_path.exists():
-        # Créer le fichier avec structure par défaut
-        ensure_config_dir()
-        save_prompts_file(DEFAULT_PROMPTS_FILE)
-        return DEFAULT_PROMPTS_FILE.copy()
 
-    try:
-        with open(prompts_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        # Fichier corrompu, retourner default
-        return DEFAULT_PROMPTS_FILE.copy()
+def load_prompts_file() -> Dict:
+    """
+    Charge le fichier prompts.json.
+
+    Returns:
+        Dict avec custom prompts et overrides (copie modifiable).
+    """
+    return thaw(get_prompts_snapshot())
 
 
 def save_prompts_file(prompts_data: Dict) -> None:
     """
-    Sauvegarde le fichier prompts.json.
+    Sauvegarde le fichier prompts.json et met à jour le cache.
 
     Args:
         prompts_data: Dict avec custom prompts et overrides.
     """
-    ensure_config_dir()
-    prompts_path = get_prompts_path()
-    temp_path = prompts_path.with_suffix('.tmp')
+    _store.write(prompts_data)
+
 
-    try:
-        with open(temp_path, 'w', encoding='utf-8') as f:
-            json.dump(prompts_data, f, indent=2, ensure_ascii=False)
-        temp_path.replace(prompts_path)
-    except Exception as e:
-        print(f"Erreur sauvegarde prompts: {e}")
-        if temp_path.exists():
-            temp_path.unlink()
+def _current_language() -> str:
+    """Retourne la langue configurée."""
+    return settings_manager.get_language()
 
 
-def get_prompt(action: str) -> Optional[str]:
+def get_prompt_table(language: Optional[str] = None) -> Mapping[str, PromptTemplate]:
     """
-    Récupère le prompt pour une action donnée.
-    Priorité : override > custom > default.
+    Retourne la table résolue action -> template compilé pour une langue.
+    Priorité : override de la langue > custom > default traduit.
+
+    La table est construite une fois par langue et par version de prompts.json ;
+    la résolution d'une action se réduit ensuite à une recherche dans un dict.
+
+    Args:
+        language: Code langue, ou None pour la langue configurée.
+
+    Returns:
+        Mapping en lecture seule {action: PromptTemplate}.
+    """
+    return _state().table(language or _current_language())
+
+
+def rebuild_prompt_table(language: Optional[str] = None) -> Mapping[str, PromptTemplate]:
+    """
+    Construit la table de la langue active (changement de langue, rechargement).
+
+    Args:
+        language: Code langue, ou None pour la langue configurée.
+
+    Returns:
+        Table résolue pour cette langue.
+    """
+    return get_prompt_table(language)
+
+
+def resolve_prompt(action: str, language: Optional[str] = None) -> Optional[PromptTemplate]:
+    """
+    Résout le template compilé d'une action.
 
     Args:
         action: Nom de l'action (ex: "correct", "summarize").
+        language: Code langue, ou None pour la langue configurée.
 
     Returns:
-        Template de prompt, ou None si non trouvé.
+        Template compilé, ou None si l'action est inconnue.
     """
-    prompts_data = load_prompts_file()
+    return get_prompt_table(language).get(action)
 
-    # 1. Vérifier les overrides pour actions par défaut
-    if action in prompts_data.get("overrides", {}):
-        override = prompts_data["overrides"][action]
-        if override is not None:
-            return override
 
-    # 2. Vérifier les custom prompts
-    if action in prompts_data.get("custom", {}):
-        custom = prompts_data["custom"][action]
-        if custom.get("enabled", True):
-            return custom.get("prompt")
+def get_prompt(action: str, language: Optional[str] = None) -> Optional[str]:
+    """
+    Récupère le prompt pour une action donnée.
+    Priorité : override de la langue > custom > default traduit.
 
-    # 3. Fallback sur default
-    if action in DEFAULT_PROMPTS:
-        return DEFAULT_PROMPTS[action]
+    Args:
+        action: Nom de l'action (ex: "correct", "summarize").
+        language: Code langue, ou None pour la langue configurée.
 
-    return None
+    Returns:
+        Template de prompt, ou None si non trouvé.
+    """
+    template = resolve_prompt(action, language)
+    return template.source if template else None
 
 
 def get_all_actions() -> List[str]:
@@ -109,7 +219,7 @@ def get_all_actions() -> List[str]:
     actions.update(DEFAULT_PROMPTS.keys())
 
     # Ajouter custom prompts activés
-    prompts_data = load_prompts_file()
+    prompts_data = get_prompts_snapshot()
     for action_id, custom_data in prompts_data.get("custom", {}).items():
         if custom_data.get("enabled", True):
             actions.add(action_id)
@@ -134,7 +244,7 @@ def get_action_label(action: str) -> str:
         return ACTION_LABELS[action]
 
     # Vérifier les custom prompts
-    prompts_data = load_prompts_file()
+    prompts_data = get_prompts_snapshot()
     if action in prompts_data.get("custom", {}):
         return prompts_data["custom"][action].get("label", action)
 
@@ -152,27 +262,22 @@ def save_custom_prompt(action_id: str, label: str, prompt: str, enabled: bool =
         enabled: Si True, le prompt est activé.
 
     Returns:
-        True si succès, False si erreur de validation.
+        True si succès, False si erreur de validation (voir validate_template).
     """
-    # Validation : le prompt doit contenir {text}
-    if "{text}" not in prompt:
+    # Validation : {text} présent et aucun placeholder inconnu
+    is_valid, _ = validate_template(prompt)
+    if not is_valid:
         return False
 
-    # Charger les prompts
-    prompts_data = load_prompts_file()
-
-    # Ajouter/mettre à jour dans custom
-    if "custom" not in prompts_data:
-        prompts_data["custom"] = {}
+    def mutate(prompts_data):
+        # Ajouter/mettre à jour dans custom
+        prompts_data.setdefault("custom", {})[action_id] = {
+            "label": label,
+            "prompt": prompt,
+            "enabled": enabled
+        }
 
-    prompts_data["custom"][action_id] = {
-        "label": label,
-        "prompt": prompt,
-        "enabled": enabled
-    }
-
-    # Sauvegarder
-    save_prompts_file(prompts_data)
+    _store.update(mutate)
     return True
 
 
@@ -186,14 +291,12 @@ def delete_custom_prompt(action_id: str) -> bool:
     Returns:
         True si supprimé, False si non trouvé.
     """
-    prompts_data = load_prompts_file()
-
-    if action_id in prompts_data.get("custom", {}):
-        del prompts_data["custom"][action_id]
-        save_prompts_file(prompts_data)
-        return True
+    def mutate(prompts_data):
+        return prompts_data.get("custom", {}).pop(action_id, None) is not None
 
-    return False
+    if action_id not in get_prompts_snapshot().get("custom", {}):
+        return False
+    return _store.update(mutate)
 
 
 def toggle_custom_prompt(action_id: str) -> bool:
@@ -206,57 +309,65 @@ def toggle_custom_prompt(action_id: str) -> bool:
     Returns:
         Nouvel état (True=activé, False=désactivé), ou False si non trouvé.
     """
-    prompts_data = load_prompts_file()
-
-    if action_id in prompts_data.get("custom", {}):
-        current_state = prompts_data["custom"][action_id].get("enabled", True)
-        prompts_data["custom"][action_id]["enabled"] = not current_state
-        save_prompts_file(prompts_data)
-        return not current_state
-
-    return False
+    def mutate(prompts_data):
+        custom = prompts_data.get("custom", {}).get(action_id)
+        if custom is None:
+            return False
+        custom["enabled"] = not custom.get("enabled", True)
+        return custom["enabled"]
+
+    if action_id not in get_prompts_snapshot().get("custom", {}):
+        return False
+    return _store.update(mutate)
 
 
-def save_override(action: str, prompt: Optional[str]) -> bool:
+def save_override(action: str, prompt: Optional[str], language: Optional[str] = None) -> bool:
     """
-    Override un prompt par défaut.
+    Override un prompt par défaut pour une langue.
 
     Args:
         action: Action par défaut (ex: "correct").
         prompt: Nouveau template, ou None pour réinitialiser.
+        language: Code langue, ou None pour la langue configurée.
 
     Returns:
-        True si succès, False si erreur de validation.
+        True si succès, False si erreur de validation (voir validate_template).
     """
     # Validation si prompt fourni
-    if prompt is not None and "{text}" not in prompt:
+    if prompt is not None and not validate_template(prompt)[0]:
         return False
 
     # Vérifier que l'action existe dans les defaults
     if action not in DEFAULT_PROMPTS:
         return False
 
-    prompts_data = load_prompts_file()
+    language = language or _current_language()
 
-    if "overrides" not in prompts_data:
-        prompts_data["overrides"] = {}
+    def mutate(prompts_data):
+        language_overrides = prompts_data.setdefault("overrides", {}).setdefault(language, {})
+        if prompt is None:
+            language_overrides.pop(action, None)
+            if not language_overrides:
+                del prompts_data["overrides"][language]
+        else:
+            language_overrides[action] = prompt
 
-    prompts_data["overrides"][action] = prompt
-    save_prompts_file(prompts_data)
+    _store.update(mutate)
     return True
 
 
-def reset_to_default(action: str) -> bool:
+def reset_to_default(action: str, language: Optional[str] = None) -> bool:
     """
-    Réinitialise un prompt par défaut (supprime l'override).
+    Réinitialise un prompt par défaut (supprime l'override de la langue).
 
     Args:
         action: Action par défaut.
+        language: Code langue, ou None pour la langue configurée.
 
     Returns:
-        True si réinitialisé, False si pas d'override.
+        True si réinitialisé, False si action inconnue.
     """
-    return save_override(action, None)
+    return save_override(action, None, language)
 
 
 def is_default_action(action: str) -> bool:
@@ -272,19 +383,19 @@ def is_default_action(action: str) -> bool:
     return action in DEFAULT_PROMPTS
 
 
-def has_override(action: str) -> bool:
+def has_override(action: str, language: Optional[str] = None) -> bool:
     """
-    Vérifie si une action par défaut a un override.
+    Vérifie si une action par défaut a un override pour une langue.
 
     Args:
         action: Nom de l'action.
+        language: Code langue, ou None pour la langue configurée.
 
     Returns:
         True si override existe, False sinon.
     """
-    prompts_data = load_prompts_file()
-    overrides = prompts_data.get("overrides", {})
-    return action in overrides and overrides[action] is not None
+    overrides = _state().overrides
+    return action in overrides.get(language or _current_language(), {})
 
 
 def get_custom_prompts() -> Dict[str, Dict]:
@@ -294,5 +405,5 @@ def get_custom_prompts() -> Dict[str, Dict]:
     Returns:
         Dict {action_id: {label, prompt, enabled}}.
     """
-    prompts_data = load_prompts_file()
-    return prompts_data.get("custom", {}).copy()
+    prompts_data = get_prompts_snapshot()
+    return thaw(prompts_data.get("custom", {}))
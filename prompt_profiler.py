@@ -0,0 +1,234 @@
+"""Profilage du coût en tokens des templates de prompts.
+
+Chaque appel envoie le texte fixe du template en plus du texte de
+l'utilisateur : ce surcoût est payé à chaque requête. Ce module estime
+ce coût fixe par template et par langue, et le projette sur le mois à
+partir de l'historique d'utilisation.
+"""
+
+import math
+import os
+import re
+from typing import List, Optional
+
+import prompt_manager
+import usage_tracker
+from config import MODEL
+from prompt_template import PromptTemplate, compile_template
+
+# Taille typique d'un texte utilisateur (en tokens) sans historique d'utilisation
+DEFAULT_TYPICAL_INPUT_TOKENS = 60
+
+# Nombre moyen de caractères par token pour un mot (texte latin)
+CHARS_PER_TOKEN = 4
+
+# Mots, symboles ASCII et caractères hors ASCII (emojis, pictogrammes)
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_SYMBOL_RE = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estime localement le nombre de tokens d'un texte.
+
+    Heuristique : un mot compte pour ceil(longueur / CHARS_PER_TOKEN) tokens,
+    un signe de ponctuation pour 1 et un symbole hors ASCII (emoji) pour 2.
+
+    Args:
+        text: Texte à estimer.
+
+    Returns:
+        Nombre de tokens estimé.
+    """
+    tokens = 0
+    for word in _WORD_RE.findall(text):
+        tokens += max(1, math.ceil(len(word) / CHARS_PER_TOKEN))
+    for symbol in _SYMBOL_RE.findall(text):
+        tokens += 1 if symbol.isascii() else 2
+    return tokens
+
+
+def count_tokens_exact(text: str) -> Optional[int]:
+    """
+    Compte exactement les tokens via l'API (endpoint count_tokens).
+
+    Le résultat inclut l'enveloppe du message (quelques tokens).
+
+    Args:
+        text: Texte à compter.
+
+    Returns:
+        Nombre de tokens, ou None si l'API n'est pas disponible.
+    """
+    if not os.environ.get('ANTHROPIC_API_KEY'):
+        return None
+    try:
+        from api_client import get_client
+        client = get_client()
+        if not hasattr(client.messages, "count_tokens"):
+            return None
+        result = client.messages.count_tokens(
+            model=MODEL,
+            messages=[{"role": "user", "content": text}]
+        )
+        return result.input_tokens
+    except Exception:
+        return None
+
+
+def get_typical_input_tokens(fixed_overhead: float = 0.0) -> float:
+    """
+    Estime la taille typique des textes envoyés par l'utilisateur.
+
+    Args:
+        fixed_overhead: Surcoût fixe moyen des templates, déduit de la moyenne mesurée.
+
+    Returns:
+        Nombre de tokens typique d'un texte utilisateur.
+    """
+    average = usage_tracker.get_average_input_tokens()
+    if average <= fixed_overhead:
+        return float(DEFAULT_TYPICAL_INPUT_TOKENS)
+    return average - fixed_overhead
+
+
+class TemplateProfile:
+    """Coût en tokens d'un template de prompt."""
+
+    def __init__(
+        self,
+        action: str,
+        language: str,
+        fixed_tokens: int,
+        exact: bool,
+        typical_input_tokens: float,
+        monthly_requests: float
+    ):
+        self.action = action
+        self.language = language
+        self.fixed_tokens = fixed_tokens
+        self.exact = exact
+        self.typical_input_tokens = typical_input_tokens
+        self.monthly_requests = monthly_requests
+
+    @property
+    def cost_per_call(self) -> float:
+        """Coût du texte fixe pour un appel (en dollars)."""
+        return usage_tracker.calculate_cost(self.fixed_tokens, 0)
+
+    @property
+    def projected_monthly_cost(self) -> float:
+        """Coût du texte fixe projeté sur le mois (en dollars)."""
+        return self.cost_per_call * self.monthly_requests
+
+    @property
+    def overhead_ratio(self) -> float:
+        """Part du texte fixe dans l'entrée d'un appel typique (0 à 1)."""
+        total = self.fixed_tokens + self.typical_input_tokens
+        return self.fixed_tokens / total if total else 0.0
+
+    @property
+    def dominates(self) -> bool:
+        """True si le texte fixe pèse plus que le texte typique de l'utilisateur."""
+        return self.fixed_tokens > self.typical_input_tokens
+
+    def format_summary(self) -> str:
+        """
+        Formate le profil pour l'éditeur de prompts.
+
+        Returns:
+            Ex: "≈ 120 tokens fixes/appel • ~$0.03/mois (projection)".
+        """
+        prefix = "" if self.exact else "≈ "
+        monthly = self.projected_monthly_cost
+        monthly_str = "<$0.01" if monthly < 0.01 else f"~${monthly:.2f}"
+        summary = f"{prefix}{self.fixed_tokens} tokens fixes/appel • {monthly_str}/mois (projection)"
+        if self.dominates:
+            summary += (
+                f"\n⚠ Le texte fixe ({self.overhead_ratio:.0%} de l'entrée) domine "
+                f"les textes typiques (~{self.typical_input_tokens:.0f} tokens)"
+            )
+        return summary
+
+
+def profile_template(
+    template: PromptTemplate,
+    action: str = "",
+    language: str = "",
+    exact: bool = False,
+    typical_input_tokens: Optional[float] = None,
+    monthly_requests: Optional[float] = None
+) -> TemplateProfile:
+    """
+    Profile un template compilé.
+
+    Args:
+        template: Template à profiler.
+        action: Nom de l'action (informatif).
+        language: Code langue (informatif).
+        exact: Si True, tente un comptage exact via l'API (estimation sinon).
+        typical_input_tokens: Taille typique d'un texte, déduite de l'historique si None.
+        monthly_requests: Requêtes du mois, projetées depuis l'historique si None.
+
+    Returns:
+        Profil du template.
+    """
+    fixed_tokens = None
+    if exact:
+        fixed_tokens = count_tokens_exact(template.fixed_text)
+    is_exact = fixed_tokens is not None
+    if fixed_tokens is None:
+        fixed_tokens = estimate_tokens(template.fixed_text)
+
+    if typical_input_tokens is None:
+        typical_input_tokens = get_typical_input_tokens()
+    if monthly_requests is None:
+        monthly_requests = usage_tracker.get_projected_monthly_requests()
+
+    return TemplateProfile(
+        action, language, fixed_tokens, is_exact, typical_input_tokens, monthly_requests
+    )
+
+
+def profile_source(source: str, action: str = "", language: str = "", exact: bool = False) -> TemplateProfile:
+    """
+    Profile un template non compilé (texte en cours d'édition).
+
+    Args:
+        source: Texte du template.
+        action: Nom de l'action.
+        language: Code langue.
+        exact: Si True, tente un comptage exact via l'API.
+
+    Returns:
+        Profil du template.
+    """
+    return profile_template(compile_template(source), action, language, exact)
+
+
+def profile_language(language: Optional[str] = None, exact: bool = False) -> List[TemplateProfile]:
+    """
+    Profile tous les templates résolus d'une langue, du plus coûteux au moins coûteux.
+
+    Args:
+        language: Code langue, ou None pour la langue configurée.
+        exact: Si True, tente un comptage exact via l'API.
+
+    Returns:
+        Liste de profils.
+    """
+    table = prompt_manager.get_prompt_table(language)
+    language = language or prompt_manager.settings_manager.get_language()
+
+    # Historique lu une seule fois pour toute la table
+    fixed = {action: estimate_tokens(template.fixed_text) for action, template in table.items()}
+    mean_fixed = sum(fixed.values()) / len(fixed) if fixed else 0.0
+    typical = get_typical_input_tokens(mean_fixed)
+    monthly = usage_tracker.get_projected_monthly_requests()
+
+    profiles = [
+        profile_template(template, action, language, exact, typical, monthly)
+        for action, template in table.items()
+    ]
+    profiles.sort(key=lambda p: p.fixed_tokens, reverse=True)
+    return profiles
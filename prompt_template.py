@@ -0,0 +1,166 @@
+"""Templates de prompts précompilés.
+
+Un template est découpé une seule fois (au chargement ou à la sauvegarde)
+en segments littéraux et placeholders. La substitution se fait ensuite par
+simple concaténation, sans passer par str.format : les accolades littérales
+(exemples JSON, code) ne provoquent donc plus d'erreur à l'exécution.
+
+Syntaxe :
+    {text}, {language}, {date}  -> placeholders substitués
+    {{ et }}                    -> accolades littérales (compatibilité str.format)
+    toute autre accolade        -> conservée telle quelle
+"""
+
+import re
+from datetime import date
+from typing import Optional, Tuple
+
+# Placeholders supportés
+PLACEHOLDERS = ("text", "language", "date")
+
+# Placeholder obligatoire
+REQUIRED_PLACEHOLDER = "text"
+
+_TOKEN_RE = re.compile(r"\{\{|\}\}|\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+class TemplateError(ValueError):
+    """Template de prompt invalide."""
+    pass
+
+
+class PromptTemplate:
+    """Template de prompt compilé, immuable."""
+
+    __slots__ = ("source", "placeholders", "_prefix", "_suffix", "_segments")
+
+    def __init__(self, source: str, segments: Tuple[Tuple[bool, str], ...]):
+        """
+        Initialise le template à partir de ses segments.
+
+        Args:
+            source: Texte original du template.
+            segments: Tuple de (is_placeholder, valeur).
+        """
+        self.source = source
+        self.placeholders = frozenset(value for is_placeholder, value in segments if is_placeholder)
+
+        # Cas courant : un seul {text} -> préfixe + texte + suffixe
+        names = [value for is_placeholder, value in segments if is_placeholder]
+        if names == [REQUIRED_PLACEHOLDER]:
+            index = next(i for i, (is_placeholder, _) in enumerate(segments) if is_placeholder)
+            self._prefix = "".join(value for _, value in segments[:index])
+            self._suffix = "".join(value for _, value in segments[index + 1:])
+            self._segments = None
+        else:
+            self._prefix = self._suffix = ""
+            self._segments = segments
+
+    @property
+    def fixed_text(self) -> str:
+        """Texte fixe du template (placeholders retirés)."""
+        if self._segments is None:
+            return self._prefix + self._suffix
+        return "".join(value for is_placeholder, value in self._segments if not is_placeholder)
+
+    def render(self, text: str, language: str = "", current_date: Optional[str] = None) -> str:
+        """
+        Substitue les placeholders.
+
+        Args:
+            text: Texte de l'utilisateur ({text}).
+            language: Nom de la langue active ({language}).
+            current_date: Date au format ISO ({date}), aujourd'hui par défaut.
+
+        Returns:
+            Prompt final.
+        """
+        if self._segments is None:
+            return self._prefix + text + self._suffix
+
+        values = {
+            "text": text,
+            "language": language,
+            "date": current_date or date.today().isoformat()
+        }
+        return "".join(
+            values[value] if is_placeholder else value
+            for is_placeholder, value in self._segments
+        )
+
+    def __repr__(self) -> str:
+        return f"PromptTemplate({self.source[:40]!r})"
+
+
+def compile_template(source: str, strict: bool = False) -> PromptTemplate:
+    """
+    Compile un template de prompt.
+
+    Args:
+        source: Texte du template.
+        strict: Si True, lève TemplateError pour un placeholder inconnu
+            ou l'absence de {text}. Sinon, les inconnus restent littéraux.
+
+    Returns:
+        Template compilé.
+
+    Raises:
+        TemplateError: En mode strict, si le template est invalide.
+
+    Example:
+        >>> compile_template('Corrige : {text}').render('bonjour')
+        'Corrige : bonjour'
+    """
+    segments = []
+    literal = []
+    position = 0
+
+    for match in _TOKEN_RE.finditer(source):
+        literal.append(source[position:match.start()])
+        position = match.end()
+        token = match.group(0)
+        name = match.group(1)
+
+        if token == "{{":
+            literal.append("{")
+        elif token == "}}":
+            literal.append("}")
+        elif name in PLACEHOLDERS:
+            if literal:
+                segments.append((False, "".join(literal)))
+                literal = []
+            segments.append((True, name))
+        elif strict:
+            allowed = ", ".join(f"{{{p}}}" for p in PLACEHOLDERS)
+            raise TemplateError(
+                f"Placeholder inconnu : {token} (autorisés : {allowed}, "
+                f"doubler les accolades pour un texte littéral)"
+            )
+        else:
+            literal.append(token)
+
+    literal.append(source[position:])
+    if any(literal):
+        segments.append((False, "".join(literal)))
+
+    template = PromptTemplate(source, tuple(segments))
+    if strict and REQUIRED_PLACEHOLDER not in template.placeholders:
+        raise TemplateError("Le prompt doit contenir le placeholder {text}")
+    return template
+
+
+def validate_template(source: str) -> Tuple[bool, str]:
+    """
+    Valide un template avant sauvegarde.
+
+    Args:
+        source: Texte du template.
+
+    Returns:
+        Tuple (is_valid, error_message).
+    """
+    try:
+        compile_template(source, strict=True)
+    except TemplateError as e:
+        return False, str(e)
+    return True, ""
@@ -1,10 +1,14 @@
 """Gestionnaire centralisé des paramètres de l'application."""
 
+import copy
 import os
-import json
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
 from dotenv import load_dotenv
+from storage import freeze, open_store, thaw
 
 
 def get_config_dir() -> Path:
@@ -59,11 +63,24 @@ DEFAULT_CONFIG = {
         "snippet_7": {"ctrl": True, "alt": True, "key": "7"},
         "snippet_8": {"ctrl": True, "alt": True, "key": "8"},
         "snippet_9": {"ctrl": True, "alt": True, "key": "9"},
-        "snippet_search": {"ctrl": True, "alt": True, "key": "s"}
+        "snippet_search": {"ctrl": True, "alt": True, "key": "s"},
+        "snippet_chord": {"ctrl": True, "alt": True, "key": "n"}
     },
     "version": "1.3.0"
 }
 
+# Délai sans nouvelle modification avant l'écriture de config.json (en secondes)
+WRITE_DELAY = 0.5
+
+# Fichier config.json (écritures de set() différées et regroupées)
+_store = open_store(
+    "config",
+    get_config_path,
+    lambda: copy.deepcopy(DEFAULT_CONFIG),
+    durable=True,
+    write_delay=WRITE_DELAY
+)
+
 
 def migrate_from_env() -> Optional[str]:
     """
@@ -83,6 +100,30 @@ def migrate_from_env() -> Optional[str]:
     return api_key
 
 
+def _merge_with_defaults(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Complète une configuration lue sur disque avec les valeurs par défaut.
+
+    Les defaults sont copiés en profondeur : DEFAULT_CONFIG n'est jamais partagé.
+
+    Args:
+        config: Configuration lue depuis config.json.
+
+    Returns:
+        Nouvelle configuration complète.
+    """
+    merged_config = copy.deepcopy(DEFAULT_CONFIG)
+    merged_config.update(config)
+
+    # Merger hotkeys séparément pour ne pas perdre les customs
+    if "hotkeys" in config:
+        default_hotkeys = copy.deepcopy(DEFAULT_CONFIG["hotkeys"])
+        default_hotkeys.update(config["hotkeys"])
+        merged_config["hotkeys"] = default_hotkeys
+
+    return merged_config
+
+
 def load_config() -> Dict[str, Any]:
     """
     Charge la configuration depuis config.json.
@@ -91,10 +132,8 @@ def load_config() -> Dict[str, Any]:
     Returns:
         Dict de configuration (merged avec defaults).
     """
-    config_path = get_config_path()
-
     # Si config.json n'existe pas, tenter migration
-    if not config_path.exists():
+    if not _store.exists():
         # Créer le répertoire
         ensure_config_dir()
 
@@ -102,7 +141,7 @@ def load_config() -> Dict[str, Any]:
         api_key = migrate_from_env()
 
         # Créer config avec defaults
-        config = DEFAULT_CONFIG.copy()
+        config = copy.deepcopy(DEFAULT_CONFIG)
         if api_key:
             config["api_key"] = api_key
 
@@ -110,112 +149,124 @@ def load_config() -> Dict[str, Any]:
         save_config(config)
         return config
 
-    # Charger config.json existant
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-
-        # Merger avec defaults pour ajouter nouvelles clés
-        merged_config = DEFAULT_CONFIG.copy()
-        merged_config.update(config)
-
-        # Merger hotkeys séparément pour ne pas perdre les customs
-        if "hotkeys" in config:
-            default_hotkeys = DEFAULT_CONFIG["hotkeys"].copy()
-            default_hotkeys.update(config["hotkeys"])
-            merged_config["hotkeys"] = default_hotkeys
-
-        return merged_config
-
-    except (json.JSONDecodeError, IOError) as e:
-        # Config corrompu, utiliser defaults
-        print(f"Erreur lecture config.json: {e}")
-        print("Utilisation de la configuration par défaut")
-        return DEFAULT_CONFIG.copy()
+    # Charger config.json existant (config corrompue : defaults)
+    return _merge_with_defaults(thaw(_store.read()))
 
 
 def save_config(config: Dict[str, Any]) -> None:
     """
-    Sauvegarde la configuration dans config.json.
+    Sauvegarde immédiatement la configuration dans config.json.
     Utilise une écriture atomique (temp file + rename).
 
     Args:
         config: Dict de configuration à sauvegarder.
     """
-    ensure_config_dir()
-    config_path = get_config_path()
-    temp_path = config_path.with_suffix('.tmp')
+    _store.write(config)
+    _store.flush()
+
+
+class ConfigSnapshot:
+    """
+    Configuration figée à un instant donné.
+
+    Les lecteurs partagent le même snapshot sans verrou ; un écrivain en
+    construit un nouveau et le substitue d'un bloc. Les clés lues à chaque
+    action (langue) sont exposées en attributs précalculés.
+    """
+
+    __slots__ = ("data", "language")
+
+    def __init__(self, config: Mapping[str, Any]):
+        """
+        Args:
+            config: Configuration complète (copiée et figée).
+        """
+        self.data = freeze(config)
+        self.language = self.data.get("language") or "fr"
 
-    try:
-        # Écrire dans fichier temporaire
-        with open(temp_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
 
-        # Rename atomique
-        temp_path.replace(config_path)
+# Snapshot courant (remplacé, jamais modifié) et verrou des écrivains
+_snapshot: Optional[ConfigSnapshot] = None
+_write_lock = threading.RLock()
 
-    except Exception as e:
-        print(f"Erreur sauvegarde config: {e}")
-        # Nettoyer le fichier temp si existe
-        if temp_path.exists():
-            temp_path.unlink()
+# Transaction en cours : configuration de travail, sa vue figée et le thread propriétaire
+_pending: Optional[Dict[str, Any]] = None
+_pending_snapshot: Optional[ConfigSnapshot] = None
+_pending_owner: Optional[int] = None
 
 
-# Instance globale de configuration (singleton pattern)
-_config_cache: Optional[Dict[str, Any]] = None
+@lru_cache(maxsize=256)
+def _compile_key(key: str) -> Tuple[str, ...]:
+    """Découpe une clé pointée une seule fois (ex: "hotkeys.correct")."""
+    return tuple(key.split('.'))
 
 
-def get_config() -> Dict[str, Any]:
+def get_snapshot() -> ConfigSnapshot:
+    """
+    Retourne le snapshot courant de la configuration (chargé au premier appel).
+
+    Dans une transaction, le thread qui l'a ouverte voit ses propres modifications.
+
+    Returns:
+        Snapshot immuable.
+    """
+    pending = _pending_snapshot
+    if pending is not None and _pending_owner == threading.get_ident():
+        return pending
+
+    snapshot = _snapshot
+    if snapshot is None:
+        with _write_lock:
+            if _snapshot is None:
+                _swap(load_config())
+            snapshot = _snapshot
+    return snapshot
+
+
+def _swap(config: Dict[str, Any]) -> ConfigSnapshot:
+    """Remplace le snapshot courant (appelé sous _write_lock)."""
+    global _snapshot
+    _snapshot = ConfigSnapshot(config)
+    return _snapshot
+
+
+def get_config() -> Mapping[str, Any]:
     """
     Retourne la configuration actuelle (avec cache).
 
     Returns:
-        Dict de configuration.
+        Mapping immuable de configuration (utiliser thaw() pour une copie modifiable).
     """
-    global _config_cache
-    if _config_cache is None:
-        _config_cache = load_config()
-    return _config_cache
+    return get_snapshot().data
 
 
-def reload_config() -> Dict[str, Any]:
+def reload_config() -> Mapping[str, Any]:
     """
     Recharge la configuration depuis le fichier (invalide le cache).
 
+    Si le fichier est celui de notre dernière écriture, il n'est pas relu :
+    la configuration en mémoire est au moins aussi récente.
+
     Returns:
-        Dict de configuration rechargée.
+        Mapping immuable de la configuration rechargée.
 
     Raises:
         json.JSONDecodeError: Si le fichier JSON est invalide.
         IOError: Si le fichier ne peut pas être lu.
     """
-    global _config_cache
-    config_path = get_config_path()
-
-    if not config_path.exists():
-        # Créer avec defaults si n'existe pas
-        _config_cache = load_config()
-        return _config_cache
+    with _write_lock:
+        if not _store.exists():
+            # Créer avec defaults si n'existe pas
+            return _swap(load_config()).data
 
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        # Propager les erreurs de lecture pour notification utilisateur.
+        # Une modification externe remplace les changements non encore écrits.
+        generation = _store.generation
+        config = _store.read(strict=True)
+        if _snapshot is not None and _store.generation == generation:
+            return _snapshot.data
 
-        # Merger avec defaults
-        merged_config = DEFAULT_CONFIG.copy()
-        merged_config.update(config)
-
-        if "hotkeys" in config:
-            default_hotkeys = DEFAULT_CONFIG["hotkeys"].copy()
-            default_hotkeys.update(config["hotkeys"])
-            merged_config["hotkeys"] = default_hotkeys
-
-        _config_cache = merged_config
-        return _config_cache
-
-    except (json.JSONDecodeError, IOError) as e:
-        # Propager l'erreur pour notification utilisateur
-        raise
+        return _swap(_merge_with_defaults(thaw(config))).data
 
 
 def get(key: str, default: Any = None) -> Any:
@@ -227,15 +278,13 @@ def get(key: str, default: Any = None) -> Any:
         default: Valeur par défaut si clé non trouvée.
 
     Returns:
-        Valeur de configuration ou default.
+        Valeur de configuration (immuable pour les dicts et listes) ou default.
     """
-    config = get_config()
+    value = get_snapshot().data
 
     # Support notation pointée (ex: "hotkeys.correct")
-    keys = key.split('.')
-    value = config
-    for k in keys:
-        if isinstance(value, dict) and k in value:
+    for k in _compile_key(key):
+        if isinstance(value, Mapping) and k in value:
             value = value[k]
         else:
             return default
@@ -243,32 +292,94 @@ def get(key: str, default: Any = None) -> Any:
     return value
 
 
-def set(key: str, value: Any) -> None:
+def get_language() -> str:
     """
-    Définit une valeur de configuration et sauvegarde.
+    Retourne la langue configurée (attribut précalculé du snapshot).
 
-    Args:
-        key: Clé de configuration (peut utiliser notation pointée).
-        value: Nouvelle valeur.
+    Returns:
+        Code langue.
     """
-    config = get_config()
+    return get_snapshot().language
 
-    # Support notation pointée
-    keys = key.split('.')
+
+def _assign(config: Dict[str, Any], keys: Tuple[str, ...], value: Any) -> None:
+    """Affecte une valeur à un chemin de clés, en créant les dicts intermédiaires."""
     target = config
     for k in keys[:-1]:
-        if k not in target:
+        if not isinstance(target.get(k), dict):
             target[k] = {}
         target = target[k]
+    target[keys[-1]] = thaw(value)
+
+
+def set(key: str, value: Any) -> None:
+    """
+    Définit une valeur de configuration.
+
+    La nouvelle valeur est visible immédiatement ; l'écriture de config.json
+    est différée (WRITE_DELAY) et regroupée avec les modifications suivantes.
+    Dans une transaction, l'écriture a lieu à la fin de la transaction.
+
+    Args:
+        key: Clé de configuration (peut utiliser notation pointée).
+        value: Nouvelle valeur.
+    """
+    global _pending_snapshot
+    keys = _compile_key(key)
+
+    with _write_lock:
+        if _pending is not None and _pending_owner == threading.get_ident():
+            _assign(_pending, keys, value)
+            _pending_snapshot = ConfigSnapshot(_pending)
+            return
 
-    target[keys[-1]] = value
+        config = thaw(get_snapshot().data)
+        _assign(config, keys, value)
+
+        # Publier le nouveau snapshot, l'écriture suivra
+        _swap(config)
+        _store.write(config)
+
+
+@contextmanager
+def transaction() -> Iterator[None]:
+    """
+    Regroupe plusieurs set() en une seule modification atomique.
+
+    Les autres threads voient l'ancienne configuration jusqu'à la fin du bloc,
+    puis toutes les modifications d'un coup ; config.json est écrit une seule
+    fois, immédiatement. En cas d'exception, rien n'est appliqué.
+
+    Example:
+        >>> with settings_manager.transaction():
+        ...     settings_manager.set("language", "en")
+        ...     settings_manager.set("theme", "dark")
+    """
+    global _pending, _pending_snapshot, _pending_owner
+
+    with _write_lock:
+        if _pending is not None:
+            # Transaction imbriquée : fusionnée avec la transaction englobante
+            yield
+            return
+
+        snapshot = get_snapshot()
+        _pending = thaw(snapshot.data)
+        _pending_snapshot = snapshot
+        _pending_owner = threading.get_ident()
+        try:
+            yield
+            config = _pending
+        finally:
+            _pending = _pending_snapshot = _pending_owner = None
+
+        _swap(config)
+        save_config(config)
 
-    # Sauvegarder
-    save_config(config)
 
-    # Mettre à jour le cache
-    global _config_cache
-    _config_cache = config
+def flush() -> None:
+    """Écrit immédiatement les modifications en attente (à appeler avant de quitter)."""
+    _store.flush()
 
 
 def get_api_key() -> Optional[str]:
@@ -0,0 +1,172 @@
+"""Expansion de snippets par abréviation (ex : « ;sig » remplacé par la signature).
+
+Les abréviations sont reconnues dans le flux des touches tapées par un
+automate d'Aho-Corasick : chaque touche coûte une recherche dans un dict,
+quel que soit le nombre d'abréviations, sans mémoriser le texte tapé.
+"""
+
+import random
+import sys
+import time
+from collections import deque
+from typing import Dict, List, Mapping, Optional, Tuple
+
+# Longueur minimale d'une abréviation
+MIN_ABBREVIATION_LENGTH = 2
+
+
+def normalize_abbreviation(abbreviation: Optional[str]) -> Optional[str]:
+    """
+    Normalise une abréviation saisie.
+
+    Args:
+        abbreviation: Texte saisi (None ou vide : pas d'abréviation).
+
+    Returns:
+        Abréviation sans espaces autour, ou None.
+    """
+    if not abbreviation:
+        return None
+    abbreviation = abbreviation.strip()
+    return abbreviation or None
+
+
+def validate_abbreviation(abbreviation: str) -> Optional[str]:
+    """
+    Vérifie qu'une abréviation peut être tapée et reconnue.
+
+    Args:
+        abbreviation: Abréviation normalisée.
+
+    Returns:
+        Message d'erreur, ou None si elle est valide.
+    """
+    if len(abbreviation) < MIN_ABBREVIATION_LENGTH:
+        return f"L'abréviation doit contenir au moins {MIN_ABBREVIATION_LENGTH} caractères"
+    if any(char.isspace() or not char.isprintable() for char in abbreviation):
+        return "L'abréviation ne peut pas contenir d'espace"
+    return None
+
+
+class AbbreviationMatcher:
+    """
+    Automate d'Aho-Corasick alimenté touche par touche.
+
+    Les transitions sont précalculées (liens d'échec résolus à la
+    construction) : passer d'un état au suivant est un seul accès dict,
+    les transitions vers l'état initial n'étant pas stockées. Un état
+    terminal indique l'abréviation la plus longue se terminant sur la
+    dernière touche.
+
+    La position courante (state) est propre à un flux de frappe : un seul
+    thread (le hook clavier) appelle feed() et reset().
+    """
+
+    __slots__ = ("transitions", "outputs", "state")
+
+    def __init__(self, abbreviations: Mapping[str, str]):
+        """
+        Args:
+            abbreviations: {abréviation: ID du snippet}.
+        """
+        # Trie des abréviations
+        children: List[Dict[str, int]] = [{}]
+        outputs: List[Optional[Tuple[str, int]]] = [None]
+        for abbreviation, snippet_id in abbreviations.items():
+            state = 0
+            for char in abbreviation:
+                following = children[state].get(char)
+                if following is None:
+                    following = len(children)
+                    children[state][char] = following
+                    children.append({})
+                    outputs.append(None)
+                state = following
+            outputs[state] = (snippet_id, len(abbreviation))
+
+        # Parcours en largeur : chaque état hérite des transitions de son lien d'échec
+        transitions: List[Dict[str, int]] = [dict(children[0])] + [{} for _ in children[1:]]
+        failures = [0] * len(children)
+        queue = deque(children[0].values())
+        while queue:
+            state = queue.popleft()
+            failure = failures[state]
+            transitions[state] = {**transitions[failure], **children[state]}
+            if outputs[state] is None:
+                outputs[state] = outputs[failure]
+            for char, child in children[state].items():
+                failures[child] = transitions[failure].get(char, 0)
+                queue.append(child)
+
+        self.transitions = transitions
+        self.outputs = outputs
+        self.state = 0
+
+    def __len__(self) -> int:
+        """Nombre d'états de l'automate."""
+        return len(self.transitions)
+
+    def feed(self, char: Optional[str]) -> Optional[Tuple[str, int]]:
+        """
+        Avance d'une touche.
+
+        Args:
+            char: Caractère tapé, ou None pour une touche sans caractère
+                (flèches, Entrée, effacement...) qui interrompt la saisie.
+
+        Returns:
+            (ID du snippet, longueur de l'abréviation) si une abréviation
+            vient d'être tapée, None sinon.
+        """
+        if char is None:
+            self.state = 0
+            return None
+        state = self.transitions[self.state].get(char, 0)
+        output = self.outputs[state]
+        # Après une expansion, l'abréviation ne sert plus de préfixe
+        self.state = 0 if output is not None else state
+        return output
+
+    def reset(self) -> None:
+        """Oublie les touches tapées (changement de fenêtre, raccourci...)."""
+        self.state = 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Banc d'essai : construction de l'automate et coût par touche selon le nombre d'abréviations."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Banc d'essai de l'expansion par abréviation")
+    parser.add_argument("--abbreviations", type=int, nargs="+", default=[10, 1000, 100_000],
+                        help="Nombres d'abréviations testés")
+    parser.add_argument("--keys", type=int, default=1_000_000, help="Nombre de touches simulées")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    letters = "abcdefghijklmnopqrstuvwxyzéè;,."
+    text = "".join(rng.choice(letters + " ") for _ in range(args.keys))
+
+    print(f"{'abréviations':>12}{'états':>10}{'construction (ms)':>19}{'ns/touche':>11}{'expansions':>12}")
+    for count in args.abbreviations:
+        abbreviations = {
+            ";" + "".join(rng.choice(letters) for _ in range(rng.randint(2, 6))): str(number)
+            for number in range(count)
+        }
+        start = time.perf_counter()
+        matcher = AbbreviationMatcher(abbreviations)
+        built = time.perf_counter() - start
+
+        feed = matcher.feed
+        matches = 0
+        start = time.perf_counter_ns()
+        for char in text:
+            if feed(char) is not None:
+                matches += 1
+        per_key = (time.perf_counter_ns() - start) / len(text)
+        print(f"{count:>12}{len(matcher):>10}{built * 1000:>19.1f}{per_key:>11.0f}{matches:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+"""Import et export de bibliothèques de snippets (JSON Lines et CSV).
+
+Les fichiers sont lus et écrits en flux, un snippet à la fois ; l'import
+valide chaque enregistrement, puis fusionne le lot en une seule écriture
+de snippets.json (snippet_manager.merge_snippets).
+
+Format : un snippet par ligne (JSON Lines) ou par rangée (CSV avec
+en-tête), champs id, label, content, hotkey_slot, abbreviation ; seuls label
+et content sont obligatoires.
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import snippet_manager
+from snippet_expander import normalize_abbreviation, validate_abbreviation
+
+# Formats reconnus, par extension de fichier
+FORMATS = {
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".csv": "csv",
+}
+
+# Colonnes, dans l'ordre de l'export
+FIELDS = ("id", "label", "content", "hotkey_slot", "abbreviation")
+
+
+class ImportReport:
+    """Bilan d'un import : snippets ajoutés, remplacés, ignorés et enregistrements rejetés."""
+
+    __slots__ = ("added", "updated", "skipped", "errors")
+
+    def __init__(self):
+        self.added = 0
+        self.updated = 0
+        self.skipped = 0
+        # (numéro de ligne, message)
+        self.errors: List[Tuple[int, str]] = []
+
+    def __repr__(self) -> str:
+        return (f"ImportReport(added={self.added}, updated={self.updated}, "
+                f"skipped={self.skipped}, errors={len(self.errors)})")
+
+
+def detect_format(path: Path, file_format: Optional[str] = None) -> str:
+    """
+    Retourne le format d'un fichier ("jsonl" ou "csv").
+
+    Args:
+        path: Chemin du fichier.
+        file_format: Format imposé (None : déduit de l'extension).
+
+    Returns:
+        Format.
+
+    Raises:
+        ValueError: Si le format est inconnu.
+    """
+    if file_format is None:
+        file_format = FORMATS.get(Path(path).suffix.lower())
+        if file_format is None:
+            raise ValueError(f"Extension non reconnue : {Path(path).name} (attendu : .jsonl ou .csv)")
+    if file_format not in FORMATS.values():
+        raise ValueError(f"Format inconnu : {file_format}")
+    return file_format
+
+
+def validate_record(record: Any) -> Dict[str, Any]:
+    """
+    Vérifie et normalise un enregistrement importé.
+
+    Args:
+        record: Objet lu (dict, ou exception de lecture à propager).
+
+    Returns:
+        Dict {id, label, content, hotkey_slot, abbreviation}.
+
+    Raises:
+        ValueError: Si l'enregistrement est invalide.
+    """
+    if isinstance(record, Exception):
+        raise ValueError(str(record))
+    if not isinstance(record, dict):
+        raise ValueError("objet attendu")
+
+    label = record.get("label")
+    if not isinstance(label, str) or not label.strip():
+        raise ValueError("label manquant")
+    content = record.get("content")
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError("content manquant")
+
+    snippet_id = record.get("id")
+    if snippet_id is not None and not isinstance(snippet_id, str):
+        raise ValueError("id doit être une chaîne")
+
+    slot = record.get("hotkey_slot")
+    if isinstance(slot, str):
+        # CSV : texte, vide pour aucun slot
+        slot = slot.strip()
+        if not slot:
+            slot = None
+        elif slot.isdigit():
+            slot = int(slot)
+    if slot is not None and (isinstance(slot, bool) or not isinstance(slot, int) or not 1 <= slot <= snippet_manager.MAX_HOTKEY_SLOT):
+        raise ValueError(f"hotkey_slot invalide : {record.get('hotkey_slot')!r}")
+
+    abbreviation = record.get("abbreviation")
+    if abbreviation is not None and not isinstance(abbreviation, str):
+        raise ValueError("abbreviation doit être une chaîne")
+    abbreviation = normalize_abbreviation(abbreviation)
+    if abbreviation is not None:
+        error = validate_abbreviation(abbreviation)
+        if error:
+            raise ValueError(error)
+
+    return {
+        "id": snippet_id or None,
+        "label": label.strip(),
+        "content": content,
+        "hotkey_slot": slot,
+        "abbreviation": abbreviation
+    }
+
+
+def _read_jsonl(f) -> Iterator[Tuple[int, Any]]:
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"JSON invalide ({e.msg})")
+
+
+def _read_csv(f) -> Iterator[Tuple[int, Any]]:
+    reader = csv.DictReader(f)
+    missing = {"label", "content"} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(sorted(missing))}")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_records(path: Path, file_format: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Lit un fichier en flux et valide ses enregistrements.
+
+    Args:
+        path: Chemin du fichier.
+        file_format: "jsonl" ou "csv" (None : déduit de l'extension).
+
+    Yields:
+        (numéro de ligne, snippet validé ou ValueError si l'enregistrement est rejeté).
+
+    Raises:
+        ValueError: Si le format est inconnu ou l'en-tête CSV incomplet.
+        OSError: Si le fichier ne peut pas être lu.
+    """
+    file_format = detect_format(path, file_format)
+    # utf-8-sig : accepte le BOM des fichiers CSV enregistrés par Excel
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        records = _read_jsonl(f) if file_format == "jsonl" else _read_csv(f)
+        for line_number, record in records:
+            try:
+                yield line_number, validate_record(record)
+            except ValueError as e:
+                yield line_number, e
+
+
+def import_snippets(
+    path: Path,
+    file_format: Optional[str] = None,
+    match: str = "id",
+    on_conflict: str = "replace"
+) -> ImportReport:
+    """
+    Importe un fichier de snippets (une seule écriture de snippets.json).
+
+    Les enregistrements invalides sont ignorés et listés dans le bilan.
+
+    Args:
+        path: Chemin du fichier.
+        file_format: "jsonl" ou "csv" (None : déduit de l'extension).
+        match, on_conflict: Voir snippet_manager.merge_snippets.
+
+    Returns:
+        Bilan de l'import.
+
+    Raises:
+        ValueError: Si le format, match ou on_conflict est inconnu.
+        OSError: Si le fichier ne peut pas être lu.
+    """
+    report = ImportReport()
+
+    def valid_records():
+        for line_number, record in read_records(path, file_format):
+            if isinstance(record, ValueError):
+                report.errors.append((line_number, str(record)))
+            else:
+                yield record
+
+    counts = snippet_manager.merge_snippets(valid_records(), match, on_conflict)
+    report.added = counts["added"]
+    report.updated = counts["updated"]
+    report.skipped = counts["skipped"]
+    return report
+
+
+def export_snippets(path: Path, file_format: Optional[str] = None) -> int:
+    """
+    Exporte tous les snippets, triés par label (écriture atomique).
+
+    Args:
+        path: Chemin du fichier à créer.
+        file_format: "jsonl" ou "csv" (None : déduit de l'extension).
+
+    Returns:
+        Nombre de snippets exportés.
+
+    Raises:
+        ValueError: Si le format est inconnu.
+        OSError: Si le fichier ne peut pas être écrit.
+    """
+    path = Path(path)
+    file_format = detect_format(path, file_format)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    count = 0
+    try:
+        # CSV avec BOM : ouvert correctement (UTF-8) par Excel
+        encoding = 'utf-8-sig' if file_format == "csv" else 'utf-8'
+        with open(temp_path, 'w', encoding=encoding, newline='') as f:
+            writer = csv.writer(f) if file_format == "csv" else None
+            if writer is not None:
+                writer.writerow(FIELDS)
+            for snippet in snippet_manager.get_all_snippets():
+                values = (
+                    snippet.get("id"),
+                    snippet.get("label", ""),
+                    snippet_manager.get_content(snippet),
+                    snippet.get("hotkey_slot"),
+                    snippet.get("abbreviation")
+                )
+                if writer is not None:
+                    writer.writerow(["" if value is None else value for value in values])
+                else:
+                    f.write(json.dumps(dict(zip(FIELDS, values)), ensure_ascii=False))
+                    f.write("\n")
+                count += 1
+        temp_path.replace(path)
+    except OSError:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+    return count
+
+
+def _write_synthetic(path: Path, count: int, file_format: str) -> None:
+    """Écrit un fichier de snippets générés (banc d'essai)."""
+    from snippet_search import _synthetic_snippets
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f) if file_format == "csv" else None
+        if writer is not None:
+            writer.writerow(FIELDS)
+        for number, snippet in enumerate(_synthetic_snippets(count, 0)):
+            values = (f"bench-{number}", snippet["label"], snippet["content"], None, None)
+            if writer is not None:
+                writer.writerow(["" if value is None else value for value in values])
+            else:
+                f.write(json.dumps(dict(zip(FIELDS, values)), ensure_ascii=False) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Banc d'essai : import et export en masse contre des save_snippet() successifs."""
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Banc d'essai de l'import/export de snippets")
+    parser.add_argument("--records", type=int, default=100_000, help="Nombre de snippets importés")
+    parser.add_argument("--baseline", type=int, default=1000,
+                        help="Nombre de save_snippet() successifs mesurés (comparaison)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Configuration isolée : la bibliothèque de l'utilisateur n'est pas touchée
+        os.environ["APPDATA"] = directory
+        directory = Path(directory)
+
+        start = time.perf_counter()
+        for number in range(args.baseline):
+            snippet_manager.save_snippet(f"Snippet {number}", f"Contenu {number}")
+        elapsed = time.perf_counter() - start
+        print(f"save_snippet x {args.baseline:<8} {elapsed:8.2f} s  {args.baseline / elapsed:10.0f} snippets/s")
+        snippet_manager.save_snippets([])
+
+        for file_format in ("jsonl", "csv"):
+            source = directory / f"source.{file_format}"
+            _write_synthetic(source, args.records, file_format)
+
+            start = time.perf_counter()
+            report = import_snippets(source)
+            elapsed = time.perf_counter() - start
+            print(f"import {file_format:<5} {args.records:>10} {elapsed:8.2f} s  "
+                  f"{args.records / elapsed:10.0f} snippets/s  {report}")
+
+            start = time.perf_counter()
+            report = import_snippets(source, on_conflict="skip")
+            elapsed = time.perf_counter() - start
+            print(f"réimport (skip)    {elapsed:8.2f} s  {args.records / elapsed:10.0f} snippets/s  {report}")
+
+            start = time.perf_counter()
+            count = export_snippets(directory / f"export.{file_format}")
+            elapsed = time.perf_counter() - start
+            print(f"export {file_format:<5} {count:>10} {elapsed:8.2f} s  {count / elapsed:10.0f} snippets/s")
+
+            snippet_manager.save_snippets([])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
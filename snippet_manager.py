@@ -1,10 +1,25 @@
-"""Gestionnaire de snippets (textes prédéfinis réutilisables)."""
-
-import json
+"""Gestionnaire de snippets (textes prédéfinis réutilisables).
+
+snippets.json ne contient que les métadonnées (id, label, slot, abréviation,
+empreinte et taille du contenu) ; les contenus sont des fichiers du répertoire snippets/,
+nommés par leur SHA-256 (un contenu identique n'est stocké qu'une fois) et
+lus seulement au collage, à l'édition ou à la première recherche.
+Les modifications sont ajoutées au journal snippets.journal, compacté dans
+snippets.json en arrière-plan (storage.JournaledStore).
+"""
+
+import copy
+import heapq
+import threading
 import uuid
+from bisect import bisect_left, bisect_right
 from pathlib import Path
-from typing import Dict, List, Optional
-from settings_manager import ensure_config_dir, get_config_dir
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from settings_manager import get_config_dir
+import snippet_usage
+from snippet_expander import AbbreviationMatcher, normalize_abbreviation
+from snippet_search import SearchIndex, SearchResult, frecency_boost
+from storage import BlobStore, JournaledStore, open_store, thaw
 
 
 def get_snippets_path() -> Path:
@@ -12,32 +27,267 @@ def get_snippets_path() -> Path:
     return get_config_dir() / "snippets.json"
 
 
+def get_snippet_contents_dir() -> Path:
+    """Retourne le répertoire des contenus de snippets."""
+    return get_config_dir() / "snippets"
+
+
 # Structure par défaut pour snippets.json
 DEFAULT_SNIPPETS_FILE = {
     "snippets": []
 }
 
+_blobs = BlobStore(get_snippet_contents_dir, durable=True)
 
-def load_snippets() -> List[Dict]:
+# Plus grand numéro de slot (1-9 : Ctrl+Shift+chiffre, au-delà : accord snippet_chord)
+MAX_HOTKEY_SLOT = 99
+
+# Critères d'identification et politiques de conflit de merge_snippets()
+MATCH_KEYS = ("id", "label")
+CONFLICT_POLICIES = ("replace", "skip", "keep_both")
+
+
+def _set_content(snippet: Dict, content: str) -> None:
+    """Range le contenu d'un snippet dans le répertoire des contenus (hash et size dans le snippet)."""
+    snippet["hash"], snippet["size"] = _blobs.put(content)
+    snippet.pop("content", None)
+
+
+def _move_contents(data: Dict) -> Dict:
+    """Migration v2 : contenus sortis de snippets.json."""
+    for snippet in data.get("snippets", []):
+        if "content" in snippet:
+            _set_content(snippet, snippet["content"])
+    return data
+
+
+# Contenus devenus inutilisés, supprimés au prochain compactage de snippets.json
+# (tant que le journal existe, snippets.json sur disque peut encore les référencer)
+_unreferenced: set = set()
+_unreferenced_lock = threading.Lock()
+
+
+def _delete_unreferenced(hashes: Iterable[str], snippets: Iterable[Mapping]) -> None:
+    """Supprime les fichiers de contenu de hashes qu'aucun des snippets ne référence."""
+    hashes = set(hashes)
+    hashes.difference_update(snippet.get("hash") for snippet in snippets)
+    for content_hash in hashes:
+        _blobs.delete(content_hash)
+
+
+def _compacted(data: Mapping) -> None:
+    """Après un compactage : snippets.json décrit seul la bibliothèque, les contenus en attente peuvent partir."""
+    global _unreferenced
+    with _unreferenced_lock:
+        hashes, _unreferenced = _unreferenced, set()
+    if hashes:
+        _delete_unreferenced(hashes, data.get("snippets", ()))
+
+
+_store = open_store(
+    "snippets",
+    get_snippets_path,
+    lambda: copy.deepcopy(DEFAULT_SNIPPETS_FILE),
+    schema_version=2,
+    migrations={2: _move_contents},
+    durable=True,
+    journal="snippets",
+    on_compact=_compacted
+)
+
+
+def _sort_key(snippet: Mapping) -> str:
+    """Clé de tri des snippets (label sans casse)."""
+    return snippet.get("label", "").lower()
+
+
+class _SnippetIndex:
     """
-    Charge les snippets depuis snippets.json.
+    Index en mémoire des snippets : par ID, par slot, par abréviation et trié par label.
+
+    Construit une fois par version de snippets.json (invalidé par le store
+    sur changement du fichier) puis mis à jour incrémentalement par
+    save_snippet() et delete_snippet(). Partagé entre threads : jamais
+    modifié après publication, une mise à jour produit un nouvel index.
+
+    L'index plein texte n'est construit qu'à la première recherche.
+    """
+
+    __slots__ = ("snippets", "by_id", "by_slot", "by_abbreviation", "sorted", "sort_keys", "search")
+
+    def __init__(self, data: Optional[Mapping] = None):
+        """
+        Args:
+            data: Snapshot de snippets.json (None : index vide, à remplir).
+        """
+        self.snippets: Tuple[Mapping, ...] = ()
+        self.by_id: Dict[str, Mapping] = {}
+        self.by_slot: Dict[int, Mapping] = {}
+        self.by_abbreviation: Dict[str, Mapping] = {}
+        self.sorted: List[Mapping] = []
+        self.sort_keys: List[str] = []
+        self.search: Optional[SearchIndex] = None
+        if data is None:
+            return
+
+        self.snippets = data.get("snippets", ())
+        for snippet in self.snippets:
+            self.by_id[snippet.get("id")] = snippet
+            slot = snippet.get("hotkey_slot")
+            if slot is not None and slot not in self.by_slot:
+                self.by_slot[slot] = snippet
+            abbreviation = snippet.get("abbreviation")
+            if abbreviation and abbreviation not in self.by_abbreviation:
+                self.by_abbreviation[abbreviation] = snippet
+        self.sorted = sorted(self.snippets, key=_sort_key)
+        self.sort_keys = [_sort_key(snippet) for snippet in self.sorted]
+
+    def updated(self, data: Mapping, changed: Iterable[int] = (), removed: Iterable[str] = ()) -> "_SnippetIndex":
+        """
+        Retourne un nouvel index tenant compte de quelques snippets modifiés.
+
+        Args:
+            data: Nouveau snapshot de snippets.json.
+            changed: Positions (dans data) des snippets ajoutés ou modifiés.
+            removed: IDs des snippets supprimés.
+
+        Returns:
+            Nouvel index (self n'est pas modifié).
+        """
+        index = _SnippetIndex()
+        index.snippets = data.get("snippets", ())
+        index.by_id = dict(self.by_id)
+        index.by_slot = dict(self.by_slot)
+        index.by_abbreviation = dict(self.by_abbreviation)
+        index.sorted = list(self.sorted)
+        index.sort_keys = list(self.sort_keys)
+
+        removed = tuple(removed)
+        # Une position citée deux fois créerait deux documents de recherche pour un même ID
+        changed_snippets = [index.snippets[position] for position in sorted(set(changed))]
+        for snippet_id in removed:
+            index._remove(snippet_id)
+        for snippet in changed_snippets:
+            index._remove(snippet.get("id"))
+            index._add(snippet)
+
+        if self.search is not None:
+            index.search = self.search.updated(
+                removed=list(removed) + [snippet.get("id") for snippet in changed_snippets],
+                added=changed_snippets
+            )
+        return index
+
+    def search_index(self) -> SearchIndex:
+        """Retourne l'index plein texte (construit au premier appel)."""
+        search = self.search
+        if search is None:
+            search = self.search = SearchIndex(self.snippets, get_content)
+        return search
+
+    def _add(self, snippet: Mapping) -> None:
+        self.by_id[snippet.get("id")] = snippet
+        slot = snippet.get("hotkey_slot")
+        if slot is not None:
+            self.by_slot[slot] = snippet
+        abbreviation = snippet.get("abbreviation")
+        if abbreviation:
+            self.by_abbreviation[abbreviation] = snippet
+        key = _sort_key(snippet)
+        position = bisect_right(self.sort_keys, key)
+        self.sort_keys.insert(position, key)
+        self.sorted.insert(position, snippet)
+
+    def _remove(self, snippet_id: str) -> None:
+        snippet = self.by_id.pop(snippet_id, None)
+        if snippet is None:
+            return
+        slot = snippet.get("hotkey_slot")
+        if slot is not None and self.by_slot.get(slot) is snippet:
+            del self.by_slot[slot]
+        abbreviation = snippet.get("abbreviation")
+        if abbreviation and self.by_abbreviation.get(abbreviation) is snippet:
+            del self.by_abbreviation[abbreviation]
+        key = _sort_key(snippet)
+        position = bisect_left(self.sort_keys, key)
+        while position < len(self.sorted) and self.sort_keys[position] == key:
+            if self.sorted[position] is snippet:
+                del self.sorted[position]
+                del self.sort_keys[position]
+                return
+            position += 1
+
+
+def _index() -> _SnippetIndex:
+    """Retourne l'index des snippets (reconstruit seulement si snippets.json a changé)."""
+    return _store.read_derived(_SnippetIndex)
+
+
+def _snippets_snapshot() -> Tuple[Mapping, ...]:
+    """Retourne les snippets sous forme immuable (sans copie)."""
+    return _index().snippets
+
+
+def get_content(snippet: Mapping) -> str:
+    """
+    Retourne le contenu d'un snippet (lu depuis son fichier au premier accès).
+
+    Args:
+        snippet: Snippet (métadonnées ou dict complet).
 
     Returns:
-        Liste de snippets [{id, label, content, hotkey_slot}, ...].
+        Contenu, "" si son fichier est introuvable.
     """
-    snippets_path = get_snippets_path()
+    if "content" in snippet:
+        return snippet["content"]
+    content_hash = snippet.get("hash")
+    if not content_hash:
+        return ""
+    content = _blobs.get(content_hash)
+    return content if content is not None else ""
 
-    if not snippets_path.exists():
-        ensure_config_dir()
-        save_snippets([])
-        return []
 
-    try:
-        with open(snippets_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data.get("snippets", [])
-    except (json.JSONDecodeError, IOError):
-        return []
+def with_content(snippet: Mapping) -> Dict:
+    """
+    Retourne une copie d'un snippet avec son contenu.
+
+    Args:
+        snippet: Snippet (métadonnées ou dict complet).
+
+    Returns:
+        Dict {id, label, content, hotkey_slot, hash, size}.
+    """
+    complete = thaw(snippet)
+    complete["content"] = get_content(snippet)
+    return complete
+
+
+def _collect_contents(hashes: Iterable[str]) -> None:
+    """
+    Supprime les fichiers de contenu qui ne sont plus référencés par aucun snippet.
+
+    Avec le journal, la suppression attend le compactage suivant : si le
+    journal était perdu (corrompu), snippets.json sur disque, qui peut
+    encore référencer ces contenus, redeviendrait la bibliothèque.
+    """
+    hashes = set(hashes)
+    if not hashes:
+        return
+    if isinstance(_store, JournaledStore):
+        with _unreferenced_lock:
+            _unreferenced.update(hashes)
+        return
+    _delete_unreferenced(hashes, _snippets_snapshot())
+
+
+def load_snippets() -> List[Dict]:
+    """
+    Charge les snippets depuis snippets.json, avec leurs contenus.
+
+    Returns:
+        Liste de snippets [{id, label, content, hotkey_slot}, ...].
+    """
+    return [with_content(snippet) for snippet in _snippets_snapshot()]
 
 
 def save_snippets(snippets: List[Dict]) -> None:
@@ -45,22 +295,125 @@ def save_snippets(snippets: List[Dict]) -> None:
     Sauvegarde les snippets dans snippets.json.
 
     Args:
-        snippets: Liste de snippets.
+        snippets: Liste de snippets (avec contenu, ou métadonnées seules).
+    """
+    def mutate(data):
+        old_hashes = {snippet.get("hash") for snippet in data.get("snippets", [])}
+        data["snippets"] = []
+        for snippet in snippets:
+            snippet = dict(snippet)
+            if "content" in snippet:
+                _set_content(snippet, snippet["content"])
+            data["snippets"].append(snippet)
+        return old_hashes - {snippet.get("hash") for snippet in data["snippets"]}
+
+    _collect_contents(_store.update(mutate))
+
+
+def merge_snippets(
+    records: Iterable[Mapping],
+    match: str = "id",
+    on_conflict: str = "replace"
+) -> Dict[str, int]:
     """
-    ensure_config_dir()
-    snippets_path = get_snippets_path()
-    temp_path = snippets_path.with_suffix('.tmp')
+    Fusionne un lot de snippets en une seule écriture (import en masse).
+
+    Les contenus sont rangés au fil de la lecture de records : seules les
+    métadonnées restent en mémoire jusqu'à l'écriture de snippets.json.
+
+    Args:
+        records: Snippets {label, content, hotkey_slot, abbreviation, id (optionnel)}, déjà validés.
+        match: "id" ou "label" (sans casse) : critère d'identification d'un snippet existant.
+        on_conflict: Si le snippet existe déjà : "replace" (remplacé, ID conservé),
+            "skip" (ignoré) ou "keep_both" (ajouté à côté).
 
-    data = {"snippets": snippets}
+    Returns:
+        Dict {"added": n, "updated": n, "skipped": n}.
 
-    try:
-        with open(temp_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        temp_path.replace(snippets_path)
-    except Exception as e:
-        print(f"Erreur sauvegarde snippets: {e}")
-        if temp_path.exists():
-            temp_path.unlink()
+    Raises:
+        ValueError: Si match ou on_conflict est inconnu.
+    """
+    if match not in MATCH_KEYS:
+        raise ValueError(f"Critère de fusion inconnu : {match}")
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"Politique de conflit inconnue : {on_conflict}")
+
+    staged = []
+    for record in records:
+        slot = record.get("hotkey_slot")
+        entry = {
+            "id": record.get("id") or None,
+            "label": record["label"],
+            "hotkey_slot": slot if slot is not None and 1 <= slot <= MAX_HOTKEY_SLOT else None,
+            "abbreviation": normalize_abbreviation(record.get("abbreviation"))
+        }
+        entry["hash"], entry["size"] = _blobs.put(record["content"], durable=False)
+        staged.append(entry)
+    _blobs.sync(entry["hash"] for entry in staged)
+
+    key = (lambda snippet: snippet.get("id")) if match == "id" else _sort_key
+    counts = {"added": 0, "updated": 0, "skipped": 0}
+    # Contenus remplacés ou non retenus, supprimés s'ils ne servent plus
+    unused = []
+
+    def mutate(data):
+        snippets = data.setdefault("snippets", [])
+        ids = set()
+        positions: Dict[str, int] = {}
+        slots: Dict[int, int] = {}
+        abbreviations: Dict[str, int] = {}
+        for position, snippet in enumerate(snippets):
+            ids.add(snippet.get("id"))
+            positions.setdefault(key(snippet), position)
+            if snippet.get("hotkey_slot") is not None:
+                slots[snippet["hotkey_slot"]] = position
+            if snippet.get("abbreviation"):
+                abbreviations[snippet["abbreviation"]] = position
+
+        for entry in staged:
+            entry_key = key(entry)
+            position = positions.get(entry_key) if entry_key else None
+            if position is not None and on_conflict == "skip":
+                unused.append(entry["hash"])
+                counts["skipped"] += 1
+                continue
+
+            if position is not None and on_conflict == "replace":
+                snippet = snippets[position]
+                unused.append(snippet.get("hash"))
+                snippet.pop("content", None)
+                snippet.update(
+                    label=entry["label"], hotkey_slot=entry["hotkey_slot"],
+                    abbreviation=entry["abbreviation"], hash=entry["hash"], size=entry["size"]
+                )
+                counts["updated"] += 1
+            else:
+                if not entry["id"] or entry["id"] in ids:
+                    entry["id"] = str(uuid.uuid4())
+                ids.add(entry["id"])
+                snippets.append(entry)
+                position = len(snippets) - 1
+                positions.setdefault(key(entry), position)
+                counts["added"] += 1
+
+            # Le dernier snippet importé sur un slot (ou une abréviation) le garde
+            slot = snippets[position]["hotkey_slot"]
+            if slot is not None:
+                other = slots.get(slot)
+                if other is not None and other != position and snippets[other].get("hotkey_slot") == slot:
+                    snippets[other]["hotkey_slot"] = None
+                slots[slot] = position
+            abbreviation = snippets[position]["abbreviation"]
+            if abbreviation is not None:
+                other = abbreviations.get(abbreviation)
+                if other is not None and other != position and snippets[other].get("abbreviation") == abbreviation:
+                    snippets[other]["abbreviation"] = None
+                abbreviations[abbreviation] = position
+        return counts
+
+    _store.update(mutate)
+    _collect_contents(content_hash for content_hash in unused if content_hash)
+    return counts
 
 
 def get_snippet(snippet_id: str) -> Optional[Dict]:
@@ -73,49 +426,44 @@ def get_snippet(snippet_id: str) -> Optional[Dict]:
     Returns:
         Dict {id, label, content, hotkey_slot} ou None.
     """
-    snippets = load_snippets()
-    for snippet in snippets:
-        if snippet.get("id") == snippet_id:
-            return snippet.copy()
-    return None
+    snippet = _index().by_id.get(snippet_id)
+    return with_content(snippet) if snippet is not None else None
 
 
 def get_snippet_by_slot(slot: int) -> Optional[Dict]:
     """
-    Récupère le snippet assigné à un slot (1-9).
+    Récupère le snippet assigné à un slot.
 
     Args:
-        slot: Numéro de slot (1-9).
+        slot: Numéro de slot (1 à MAX_HOTKEY_SLOT).
 
     Returns:
         Dict {id, label, content, hotkey_slot} ou None.
     """
-    if not (1 <= slot <= 9):
+    if not (1 <= slot <= MAX_HOTKEY_SLOT):
         return None
 
-    snippets = load_snippets()
-    for snippet in snippets:
-        if snippet.get("hotkey_slot") == slot:
-            return snippet.copy()
-    return None
+    snippet = _index().by_slot.get(slot)
+    return with_content(snippet) if snippet is not None else None
 
 
 def get_all_snippets() -> List[Dict]:
     """
-    Retourne tous les snippets triés par label.
+    Retourne tous les snippets triés par label, sans leurs contenus.
 
     Returns:
-        Liste de snippets [{id, label, content, hotkey_slot}, ...].
+        Liste de snippets [{id, label, hotkey_slot, hash, size}, ...]
+        (get_content() pour le contenu).
     """
-    snippets = load_snippets()
-    return sorted(snippets, key=lambda s: s.get("label", "").lower())
+    return thaw(_index().sorted)
 
 
 def save_snippet(
     label: str,
     content: str,
     hotkey_slot: Optional[int] = None,
-    snippet_id: Optional[str] = None
+    snippet_id: Optional[str] = None,
+    abbreviation: Optional[str] = None
 ) -> str:
     """
     Ajoute ou met à jour un snippet.
@@ -123,49 +471,69 @@ def save_snippet(
     Args:
         label: Nom du snippet.
         content: Contenu du snippet.
-        hotkey_slot: Slot 1-9 ou None.
+        hotkey_slot: Slot (1 à MAX_HOTKEY_SLOT) ou None.
         snippet_id: ID pour mise à jour, None pour création.
+        abbreviation: Abréviation déclenchant l'expansion, ou None.
 
     Returns:
         ID du snippet (existant ou nouveau).
     """
-    snippets = load_snippets()
-
-    # Si hotkey_slot spécifié, vérifier qu'il est libre
-    if hotkey_slot is not None:
-        if not (1 <= hotkey_slot <= 9):
-            hotkey_slot = None
-        else:
-            # Libérer le slot si déjà utilisé par un autre snippet
-            for snippet in snippets:
+    # Slot invalide : aucun slot
+    if hotkey_slot is not None and not (1 <= hotkey_slot <= MAX_HOTKEY_SLOT):
+        hotkey_slot = None
+    abbreviation = normalize_abbreviation(abbreviation)
+
+    # Positions des snippets modifiés, pour la mise à jour de l'index (un snippet
+    # peut perdre à la fois son slot et son abréviation)
+    changed = set()
+    # Contenus remplacés, supprimés s'ils ne servent plus
+    replaced = []
+
+    def mutate(data):
+        snippets = data.setdefault("snippets", [])
+
+        # Libérer le slot si déjà utilisé par un autre snippet
+        if hotkey_slot is not None:
+            for position, snippet in enumerate(snippets):
                 if snippet.get("id") != snippet_id and snippet.get("hotkey_slot") == hotkey_slot:
                     snippet["hotkey_slot"] = None
+                    changed.add(position)
+
+        # Idem pour l'abréviation
+        if abbreviation is not None:
+            for position, snippet in enumerate(snippets):
+                if snippet.get("id") != snippet_id and snippet.get("abbreviation") == abbreviation:
+                    snippet["abbreviation"] = None
+                    changed.add(position)
 
-    # Mise à jour ou création
-    if snippet_id:
         # Mise à jour
-        for snippet in snippets:
-            if snippet.get("id") == snippet_id:
-                snippet["label"] = label
-                snippet["content"] = content
-                snippet["hotkey_slot"] = hotkey_slot
-                save_snippets(snippets)
-                return snippet_id
-        # ID non trouvé, créer nouveau
-        snippet_id = str(uuid.uuid4())
-    else:
-        # Nouveau snippet
-        snippet_id = str(uuid.uuid4())
-
-    new_snippet = {
-        "id": snippet_id,
-        "label": label,
-        "content": content,
-        "hotkey_slot": hotkey_slot
-    }
-    snippets.append(new_snippet)
-    save_snippets(snippets)
-    return snippet_id
+        if snippet_id:
+            for position, snippet in enumerate(snippets):
+                if snippet.get("id") == snippet_id:
+                    replaced.append(snippet.get("hash"))
+                    snippet["label"] = label
+                    _set_content(snippet, content)
+                    snippet["hotkey_slot"] = hotkey_slot
+                    snippet["abbreviation"] = abbreviation
+                    changed.add(position)
+                    return snippet_id
+
+        # Création (ou ID non trouvé)
+        new_id = str(uuid.uuid4())
+        snippet = {
+            "id": new_id,
+            "label": label,
+            "hotkey_slot": hotkey_slot,
+            "abbreviation": abbreviation
+        }
+        _set_content(snippet, content)
+        snippets.append(snippet)
+        changed.add(len(snippets) - 1)
+        return new_id
+
+    result = _store.update(mutate, lambda index, data: index.updated(data, changed=changed))
+    _collect_contents(content_hash for content_hash in replaced if content_hash)
+    return result
 
 
 def delete_snippet(snippet_id: str) -> bool:
@@ -178,53 +546,105 @@ def delete_snippet(snippet_id: str) -> bool:
     Returns:
         True si supprimé, False si non trouvé.
     """
-    snippets = load_snippets()
-    initial_count = len(snippets)
+    # Contenus des snippets supprimés, supprimés s'ils ne servent plus
+    removed = []
+
+    def mutate(data):
+        snippets = data.get("snippets", [])
+        remaining = [s for s in snippets if s.get("id") != snippet_id]
+        removed.extend(s.get("hash") for s in snippets if s.get("id") == snippet_id and s.get("hash"))
+        data["snippets"] = remaining
+        return len(remaining) < len(snippets)
+
+    if snippet_id not in _index().by_id:
+        return False
+    deleted = _store.update(mutate, lambda index, data: index.updated(data, removed=(snippet_id,)))
+    if deleted:
+        _collect_contents(removed)
+        snippet_usage.forget(snippet_id)
+    return deleted
+
+
+def record_use(snippet_id: str) -> None:
+    """
+    Enregistre l'utilisation d'un snippet (à appeler à chaque collage).
+
+    Args:
+        snippet_id: ID du snippet collé.
+    """
+    snippet_usage.record_use(snippet_id)
 
-    snippets = [s for s in snippets if s.get("id") != snippet_id]
 
-    if len(snippets) < initial_count:
-        save_snippets(snippets)
-        return True
-    return False
+def _boosts() -> Dict[str, float]:
+    """Bonus de classement des snippets utilisés récemment et souvent."""
+    return {snippet_id: frecency_boost(score) for snippet_id, score in snippet_usage.get_scores().items()}
 
 
-def search_snippets(query: str) -> List[Dict]:
+def get_frequent_snippets(limit: int) -> List[Dict]:
+    """
+    Retourne les snippets les plus utilisés (frecency décroissante).
+
+    Args:
+        limit: Nombre maximal de snippets.
+
+    Returns:
+        Liste de snippets [{id, label, hotkey_slot, hash, size}, ...] (sans contenu).
+    """
+    by_id = _index().by_id
+    return [thaw(by_id[snippet_id]) for snippet_id in _frequent_ids(by_id, limit)]
+
+
+def _frequent_ids(by_id: Mapping[str, Mapping], limit: int) -> List[str]:
+    """IDs des snippets existants les plus utilisés."""
+    scores = snippet_usage.get_scores()
+    return heapq.nlargest(limit, (snippet_id for snippet_id in scores if snippet_id in by_id), key=scores.get)
+
+
+def search_snippets(query: str, limit: Optional[int] = None) -> List[Dict]:
     """
     Recherche des snippets par label ou contenu.
 
     Args:
         query: Terme de recherche.
+        limit: Nombre maximal de résultats (None : tous).
 
     Returns:
-        Liste de snippets correspondants, triés par pertinence.
+        Liste de snippets correspondants (avec contenu), triés par
+        pertinence puis fréquence d'utilisation (requête vide : les plus
+        utilisés d'abord, puis par label).
     """
-    if not query:
-        return get_all_snippets()
-
-    query_lower = query.lower()
-    snippets = load_snippets()
-    results = []
+    return [with_content(snippet) for snippet in search(query, limit).snippets]
 
-    for snippet in snippets:
-        label = snippet.get("label", "").lower()
-        content = snippet.get("content", "").lower()
 
-        # Score de pertinence
-        score = 0
-        if query_lower in label:
-            score += 10  # Match dans le label = haute priorité
-            if label.startswith(query_lower):
-                score += 5  # Commence par = encore plus prioritaire
-        if query_lower in content:
-            score += 1  # Match dans le contenu = basse priorité
+def search(query: str, limit: Optional[int] = None, previous: Optional[SearchResult] = None) -> SearchResult:
+    """
+    Recherche des snippets, sans copie des résultats (pour la recherche à la frappe).
 
-        if score > 0:
-            results.append((score, snippet))
+    Args:
+        query: Terme de recherche.
+        limit: Nombre maximal de résultats (None : tous).
+        previous: Résultat de la recherche précédente, affiné si query la prolonge.
 
-    # Trier par score décroissant
-    results.sort(key=lambda x: x[0], reverse=True)
-    return [snippet for score, snippet in results]
+    Returns:
+        Résultat dont les snippets sont immuables et sans contenu
+        (with_content() pour une copie complète).
+    """
+    index = _index()
+    if query:
+        return index.search_index().run(query, limit, _boosts(), previous)
+
+    # Requête vide : les plus utilisés d'abord, puis par label
+    by_id = index.by_id
+    count = limit if limit is not None else len(by_id)
+    frequent_ids = _frequent_ids(by_id, count)
+    snippets = [by_id[snippet_id] for snippet_id in frequent_ids]
+    frequent_ids = set(frequent_ids)
+    for snippet in index.sorted:
+        if len(snippets) >= count:
+            break
+        if snippet.get("id") not in frequent_ids:
+            snippets.append(snippet)
+    return SearchResult(None, "", snippets, None)
 
 
 def get_snippets_by_hotkey() -> Dict[int, Dict]:
@@ -232,17 +652,13 @@ def get_snippets_by_hotkey() -> Dict[int, Dict]:
     Retourne un dict des snippets assignés à des hotkeys.
 
     Returns:
-        Dict {slot: snippet_dict} pour slots 1-9.
+        Dict {slot: snippet_dict} pour les slots 1 à MAX_HOTKEY_SLOT (sans contenu).
     """
-    snippets = load_snippets()
-    by_hotkey = {}
-
-    for snippet in snippets:
-        slot = snippet.get("hotkey_slot")
-        if slot and 1 <= slot <= 9:
-            by_hotkey[slot] = snippet.copy()
-
-    return by_hotkey
+    return {
+        slot: thaw(snippet)
+        for slot, snippet in _index().by_slot.items()
+        if 1 <= slot <= MAX_HOTKEY_SLOT
+    }
 
 
 def is_slot_available(slot: int, exclude_id: Optional[str] = None) -> bool:
@@ -250,18 +666,52 @@ def is_slot_available(slot: int, exclude_id: Optional[str] = None) -> bool:
     Vérifie si un slot hotkey est disponible.
 
     Args:
-        slot: Numéro de slot (1-9).
+        slot: Numéro de slot (1 à MAX_HOTKEY_SLOT).
         exclude_id: ID de snippet à exclure (pour édition).
 
     Returns:
         True si disponible, False sinon.
     """
-    if not (1 <= slot <= 9):
+    if not (1 <= slot <= MAX_HOTKEY_SLOT):
         return False
 
-    snippets = load_snippets()
-    for snippet in snippets:
-        if snippet.get("id") != exclude_id and snippet.get("hotkey_slot") == slot:
-            return False
+    snippet = _index().by_slot.get(slot)
+    return snippet is None or snippet.get("id") == exclude_id
+
 
-    return True
+def get_abbreviation_matcher() -> AbbreviationMatcher:
+    """
+    Construit l'automate de reconnaissance des abréviations de snippets.
+
+    À reconstruire quand les snippets changent ; l'automate retourné est
+    propre à l'appelant (il mémorise la position dans la frappe).
+
+    Returns:
+        Automate {abréviation: ID du snippet}.
+    """
+    return AbbreviationMatcher({
+        abbreviation: snippet.get("id")
+        for abbreviation, snippet in _index().by_abbreviation.items()
+    })
+
+
+def find_abbreviation_conflict(abbreviation: str, exclude_id: Optional[str] = None) -> Optional[Dict]:
+    """
+    Cherche un snippet dont l'abréviation masquerait la nouvelle (ou serait masquée).
+
+    Une abréviation contenue dans une autre (« ;s » et « ;sig ») déclenche
+    l'expansion avant que la plus longue soit tapée en entier.
+
+    Args:
+        abbreviation: Abréviation normalisée.
+        exclude_id: ID du snippet à ignorer (celui en cours d'édition).
+
+    Returns:
+        Snippet en conflit (métadonnées), ou None.
+    """
+    for other, snippet in _index().by_abbreviation.items():
+        if snippet.get("id") == exclude_id:
+            continue
+        if abbreviation in other or other in abbreviation:
+            return thaw(snippet)
+    return None
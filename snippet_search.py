@@ -0,0 +1,634 @@
+"""Index de recherche des snippets (n-grammes inversés, recherche approchée)."""
+
+import heapq
+import random
+import re
+import sys
+import time
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+# Longueur des n-grammes indexés
+NGRAM_SIZE = 3
+
+# Score : match dans le label, label qui commence par la requête, match dans le contenu
+LABEL_SCORE = 10
+PREFIX_SCORE = 5
+CONTENT_SCORE = 1
+
+# Scores approchés, toujours inférieurs à CONTENT_SCORE : une correspondance
+# exacte reste devant
+SUBSEQUENCE_SCORE = 0.8  # Abréviation du label ("rdv" -> "Rendez-vous")
+TYPO_LABEL_SCORE = 0.6  # Mot du label à une ou deux fautes près
+TYPO_CONTENT_SCORE = 0.3  # Mot du contenu à une ou deux fautes près
+
+# Bonus maximal de fréquence d'utilisation (frecency), et score de frecency
+# pour lequel la moitié du bonus est atteinte (≈ 3 utilisations récentes)
+FRECENCY_WEIGHT = 5.0
+FRECENCY_HALF_BOOST = 3.0
+
+# Longueur de mot minimale pour tolérer 1 puis 2 fautes
+TYPO_MIN_LENGTH = 4
+TYPO_2_MIN_LENGTH = 8
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """
+    Normalise un texte pour la recherche (casse et accents).
+
+    Args:
+        text: Texte brut.
+
+    Returns:
+        Texte sans accents, en minuscules (ex: "Réponse" -> "reponse", "Straße" -> "strasse").
+    """
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def frecency_boost(frecency: float) -> float:
+    """
+    Bonus de classement d'un snippet selon sa fréquence d'utilisation.
+
+    Args:
+        frecency: Score de frecency (voir snippet_usage.get_scores()).
+
+    Returns:
+        Bonus entre 0 et FRECENCY_WEIGHT (exclu) : un snippet très utilisé
+        remonte parmi les correspondances de même nature.
+    """
+    return FRECENCY_WEIGHT * frecency / (frecency + FRECENCY_HALF_BOOST)
+
+
+@lru_cache(maxsize=65536)
+def _word_ngrams(word: str) -> FrozenSet[str]:
+    """N-grammes d'un mot (mis en cache : le vocabulaire se répète d'un snippet à l'autre)."""
+    return frozenset(word[i:i + NGRAM_SIZE] for i in range(len(word) - NGRAM_SIZE + 1))
+
+
+def ngrams(words: Iterable[str]) -> Set[str]:
+    """
+    Retourne les n-grammes distincts d'un ensemble de mots normalisés.
+
+    Les n-grammes à cheval sur deux mots ne sont pas indexés : une requête
+    de plusieurs mots est filtrée sur les n-grammes de chacun de ses mots,
+    puis vérifiée sur le texte complet.
+
+    Args:
+        words: Mots normalisés (voir words()).
+
+    Returns:
+        Ensemble des sous-chaînes de longueur NGRAM_SIZE.
+    """
+    grams: Set[str] = set()
+    for word in words:
+        grams |= _word_ngrams(word)
+    return grams
+
+
+def words(text: str) -> FrozenSet[str]:
+    """Mots (suites de caractères alphanumériques) distincts d'un texte normalisé."""
+    return frozenset(_WORD_RE.findall(text))
+
+
+def max_typos(word: str) -> int:
+    """Nombre de fautes tolérées pour un mot, selon sa longueur."""
+    if len(word) >= TYPO_2_MIN_LENGTH:
+        return 2
+    if len(word) >= TYPO_MIN_LENGTH:
+        return 1
+    return 0
+
+
+@lru_cache(maxsize=65536)
+def _deletes(word: str, distance: int) -> FrozenSet[str]:
+    """Variantes d'un mot privé de 0 à distance caractères (index symmetric delete)."""
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return frozenset(variants)
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Distance d'édition (insertion, suppression, substitution, transposition).
+
+    Args:
+        a, b: Mots à comparer.
+        limit: Distance au-delà de laquelle le calcul s'arrête.
+
+    Returns:
+        Distance, ou limit + 1 si elle dépasse limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def subsequence_score(query: str, label: str) -> float:
+    """
+    Score d'abréviation : les caractères de la requête apparaissent dans l'ordre dans le label.
+
+    Les caractères trouvés en début de mot ("rdv" -> "Rendez-vous") augmentent le score.
+
+    Args:
+        query: Requête normalisée, sans espaces.
+        label: Label normalisé.
+
+    Returns:
+        Score entre SUBSEQUENCE_SCORE / 2 et SUBSEQUENCE_SCORE, 0 si pas d'abréviation.
+    """
+    position = 0
+    word_starts = 0
+    for char in query:
+        # Préférer un début de mot, sinon la première occurrence
+        found = -1
+        index = label.find(char, position)
+        while index != -1:
+            if found == -1:
+                found = index
+            if index == 0 or not label[index - 1].isalnum():
+                found = index
+                word_starts += 1
+                break
+            index = label.find(char, index + 1)
+        if found == -1:
+            return 0.0
+        position = found + 1
+    return SUBSEQUENCE_SCORE * (0.5 + 0.5 * word_starts / len(query))
+
+
+def _rank_key(item: Tuple[float, int, Mapping]) -> Tuple[float, int]:
+    """Clé de classement d'un résultat (score, puis ordre du fichier)."""
+    return item[0], item[1]
+
+
+def _inline_content(snippet: Mapping) -> str:
+    return snippet.get("content", "")
+
+
+class _Document:
+    """Snippet indexé : textes normalisés et numéro d'ordre (ordre du fichier)."""
+
+    __slots__ = ("number", "snippet", "label", "content", "label_words", "words")
+
+    def __init__(self, number: int, snippet: Mapping, content: str):
+        self.number = number
+        self.snippet = snippet
+        self.label = normalize(snippet.get("label", ""))
+        self.content = normalize(content)
+        self.label_words = words(self.label)
+        self.words = self.label_words | words(self.content)
+
+    def grams(self) -> Set[str]:
+        return ngrams(self.words)
+
+    def initials(self) -> Set[str]:
+        """Premiers caractères des mots du label (candidats aux abréviations)."""
+        return {word[0] for word in self.label_words}
+
+    def score(self, query: str) -> int:
+        """Score de pertinence (0 : pas de correspondance)."""
+        score = 0
+        if query in self.label:
+            score += LABEL_SCORE  # Match dans le label = haute priorité
+            if self.label.startswith(query):
+                score += PREFIX_SCORE  # Commence par = encore plus prioritaire
+        if query in self.content:
+            score += CONTENT_SCORE  # Match dans le contenu = basse priorité
+        return score
+
+    def typo_score(self, matches: List[Dict[str, int]]) -> float:
+        """
+        Score approché : chaque mot de la requête est présent, exactement ou à quelques fautes près.
+
+        Args:
+            matches: Pour chaque mot de la requête, {mot du vocabulaire: distance}.
+
+        Returns:
+            Moyenne des scores par mot, 0 si un mot de la requête manque.
+        """
+        total = 0.0
+        for similar in matches:
+            best = 0.0
+            for word, distance in similar.items():
+                if word in self.words:
+                    weight = TYPO_LABEL_SCORE if word in self.label_words else TYPO_CONTENT_SCORE
+                    best = max(best, weight / (1 + distance))
+            if best == 0.0:
+                return 0.0
+            total += best
+        return total / len(matches)
+
+
+class SearchIndex:
+    """
+    Index des labels et contenus des snippets.
+
+    - n-grammes -> snippets : une requête contenant un mot d'au moins
+      NGRAM_SIZE caractères ne vérifie que les snippets contenant tous ses
+      n-grammes (intersection des listes, de la plus courte à la plus longue) ;
+    - mots -> snippets et variantes par suppression -> mots (symmetric
+      delete) : les mots à une ou deux fautes près sont retrouvés sans
+      parcourir le vocabulaire ;
+    - initiales des mots du label -> snippets, pour les abréviations.
+
+    Les textes sont normalisés (casse, accents) une fois, à l'indexation.
+    Immuable une fois construit : updated() retourne un nouvel index qui ne
+    copie que les listes touchées.
+    """
+
+    __slots__ = ("documents", "numbers", "postings", "words", "deletes", "initials", "next_number", "content")
+
+    def __init__(self, snippets: Iterable[Mapping] = (), content: Optional[Callable[[Mapping], str]] = None):
+        """
+        Args:
+            snippets: Snippets à indexer, dans l'ordre du fichier.
+            content: Fonction retournant le contenu d'un snippet (défaut : clé "content").
+        """
+        self.content = content or _inline_content
+        self.documents: Dict[int, _Document] = {}
+        self.numbers: Dict[str, int] = {}
+        self.postings: Dict[str, Set[int]] = {}
+        self.words: Dict[str, Set[int]] = {}
+        self.deletes: Dict[str, Set[str]] = {}
+        self.initials: Dict[str, Set[int]] = {}
+        self.next_number = 0
+
+        # Construction en listes (ajouts moins coûteux), converties ensuite en ensembles
+        word_lists: Dict[str, List[int]] = defaultdict(list)
+        initials: Dict[str, List[int]] = defaultdict(list)
+        for snippet in snippets:
+            document = self._new_document(snippet)
+            for word in document.words:
+                word_lists[word].append(document.number)
+            for initial in document.initials():
+                initials[initial].append(document.number)
+        self.words = {word: set(numbers) for word, numbers in word_lists.items()}
+        self.initials = {initial: set(numbers) for initial, numbers in initials.items()}
+
+        # n-grammes -> snippets : union des listes des mots qui les contiennent
+        gram_words: Dict[str, List[Set[int]]] = defaultdict(list)
+        deletes: Dict[str, Set[str]] = defaultdict(set)
+        for word, numbers in self.words.items():
+            for gram in _word_ngrams(word):
+                gram_words[gram].append(numbers)
+            for variant in _deletes(word, max_typos(word)):
+                deletes[variant].add(word)
+        self.postings = {gram: set().union(*sets) for gram, sets in gram_words.items()}
+        self.deletes = dict(deletes)
+
+    def _new_document(self, snippet: Mapping) -> _Document:
+        document = _Document(self.next_number, snippet, self.content(snippet))
+        self.next_number += 1
+        self.documents[document.number] = document
+        self.numbers[snippet.get("id")] = document.number
+        return document
+
+    def updated(self, removed: Iterable[str] = (), added: Iterable[Mapping] = ()) -> "SearchIndex":
+        """
+        Retourne un nouvel index tenant compte de quelques snippets modifiés.
+
+        Args:
+            removed: IDs des snippets supprimés ou remplacés.
+            added: Snippets ajoutés ou nouvelles versions des snippets modifiés.
+
+        Returns:
+            Nouvel index (self n'est pas modifié).
+        """
+        index = SearchIndex(content=self.content)
+        index.documents = dict(self.documents)
+        index.numbers = dict(self.numbers)
+        index.postings = dict(self.postings)
+        index.words = dict(self.words)
+        index.deletes = dict(self.deletes)
+        index.initials = dict(self.initials)
+        index.next_number = self.next_number
+        copied: Set[Tuple[int, str]] = set()
+
+        def entries(table: Dict[str, Set], key: str) -> Set:
+            # Copie à la première modification : l'ancien index reste intact
+            if (id(table), key) not in copied:
+                table[key] = set(table.get(key, ()))
+                copied.add((id(table), key))
+            return table[key]
+
+        def discard(table: Dict[str, Set], key: str, value) -> None:
+            values = entries(table, key)
+            values.discard(value)
+            if not values:
+                del table[key]
+                copied.discard((id(table), key))
+
+        for snippet_id in removed:
+            number = index.numbers.pop(snippet_id, None)
+            if number is None:
+                continue
+            document = index.documents.pop(number)
+            for gram in document.grams():
+                discard(index.postings, gram, number)
+            for initial in document.initials():
+                discard(index.initials, initial, number)
+            for word in document.words:
+                discard(index.words, word, number)
+                if word not in index.words:
+                    # Mot sorti du vocabulaire
+                    for variant in _deletes(word, max_typos(word)):
+                        discard(index.deletes, variant, word)
+
+        for snippet in added:
+            document = index._new_document(snippet)
+            for gram in document.grams():
+                entries(index.postings, gram).add(document.number)
+            for initial in document.initials():
+                entries(index.initials, initial).add(document.number)
+            for word in document.words:
+                if word not in index.words:
+                    # Nouveau mot du vocabulaire
+                    for variant in _deletes(word, max_typos(word)):
+                        entries(index.deletes, variant).add(word)
+                entries(index.words, word).add(document.number)
+
+        return index
+
+    def _candidates(self, query: str) -> Iterable[_Document]:
+        """Snippets pouvant contenir la requête."""
+        grams = ngrams(words(query))
+        if not grams:
+            return self.documents.values()
+
+        postings = []
+        for gram in grams:
+            entries = self.postings.get(gram)
+            if not entries:
+                return ()
+            postings.append(entries)
+
+        postings.sort(key=len)
+        numbers = set(postings[0])
+        for entries in postings[1:]:
+            numbers &= entries
+            if not numbers:
+                return ()
+        return (self.documents[number] for number in numbers)
+
+    def similar_words(self, word: str) -> Dict[str, int]:
+        """
+        Retourne les mots du vocabulaire proches d'un mot normalisé.
+
+        Args:
+            word: Mot de la requête.
+
+        Returns:
+            {mot: distance d'édition}, le mot lui-même inclus s'il est indexé.
+        """
+        limit = max_typos(word)
+        similar = {word: 0} if word in self.words else {}
+        if limit == 0:
+            return similar
+
+        for variant in _deletes(word, limit):
+            for candidate in self.deletes.get(variant, ()):
+                if candidate not in similar:
+                    distance = edit_distance(word, candidate, limit)
+                    if distance <= limit:
+                        similar[candidate] = distance
+        return similar
+
+    def _fuzzy(self, query: str, exclude: Set[int]) -> Dict[int, float]:
+        """Scores approchés (abréviation, fautes de frappe) des snippets hors exclude."""
+        scores: Dict[int, float] = {}
+
+        # Abréviation du label : candidats dont un mot commence par le premier caractère
+        compact = "".join(query.split())
+        if len(compact) >= 2:
+            for number in self.initials.get(compact[0], ()):
+                if number not in exclude:
+                    score = subsequence_score(compact, self.documents[number].label)
+                    if score > 0:
+                        scores[number] = score
+
+        # Fautes de frappe : chaque mot de la requête doit avoir un mot proche dans le snippet
+        query_words = sorted(words(query))
+        if not query_words:
+            return scores
+        matches = [self.similar_words(word) for word in query_words]
+        if not all(matches):
+            return scores
+
+        smallest = min(matches, key=lambda similar: sum(len(self.words[w]) for w in similar))
+        candidates: Set[int] = set()
+        for word in smallest:
+            candidates |= self.words[word]
+        for number in candidates - exclude:
+            score = self.documents[number].typo_score(matches)
+            if score > scores.get(number, 0.0):
+                scores[number] = score
+        return scores
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        boosts: Optional[Mapping[str, float]] = None
+    ) -> List[Mapping]:
+        """
+        Recherche les snippets correspondant à la requête (label ou contenu).
+
+        Args:
+            query: Terme de recherche (non vide).
+            limit: Nombre maximal de résultats (None : tous).
+            boosts: Bonus ajouté au score, par ID de snippet (voir frecency_boost()).
+
+        Returns:
+            Snippets triés par score décroissant, puis dans l'ordre du fichier.
+        """
+        return self.run(query, limit, boosts).snippets
+
+    def run(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        boosts: Optional[Mapping[str, float]] = None,
+        previous: Optional["SearchResult"] = None
+    ) -> "SearchResult":
+        """
+        Recherche, en affinant si possible le résultat d'une requête précédente.
+
+        Les correspondances exactes (sous-chaîne) passent devant les
+        correspondances approchées (abréviation du label, fautes de frappe),
+        qui ne sont calculées que si elles peuvent encore entrer dans les
+        résultats. Si la requête prolonge celle de previous (frappe d'un
+        caractère de plus), seules les correspondances exactes de previous
+        sont revérifiées.
+
+        Args:
+            query: Terme de recherche (non vide).
+            limit: Nombre maximal de résultats (None : tous).
+            boosts: Bonus ajouté au score, par ID de snippet (voir frecency_boost()).
+            previous: Résultat d'une recherche précédente sur cet index.
+
+        Returns:
+            Résultat (snippets triés par score décroissant, puis dans l'ordre du fichier).
+        """
+        boosts = boosts or {}
+        query = normalize(query)
+        if previous is not None and previous.refines(self, query):
+            candidates: Iterable[_Document] = (self.documents[number] for number in previous.matches)
+        else:
+            candidates = self._candidates(query)
+
+        scored: List[Tuple[float, int, Mapping]] = []
+        for document in candidates:
+            score = document.score(query)
+            if score > 0:
+                score += boosts.get(document.snippet.get("id"), 0.0)
+                scored.append((score, -document.number, document.snippet))
+
+        exact = frozenset(-number for _, number, _ in scored)
+        if limit is not None and len(scored) >= limit:
+            scored = heapq.nlargest(limit, scored, key=_rank_key)
+            # Score maximal d'une correspondance approchée
+            ceiling = max(SUBSEQUENCE_SCORE, TYPO_LABEL_SCORE) + max(boosts.values(), default=0.0)
+            if scored and scored[-1][0] >= ceiling:
+                return SearchResult(self, query, [snippet for _, _, snippet in scored], exact)
+
+        for number, score in self._fuzzy(query, exact).items():
+            snippet = self.documents[number].snippet
+            scored.append((score + boosts.get(snippet.get("id"), 0.0), -number, snippet))
+
+        if limit is None or limit >= len(scored):
+            scored.sort(key=_rank_key, reverse=True)
+        else:
+            scored = heapq.nlargest(limit, scored, key=_rank_key)
+        return SearchResult(self, query, [snippet for _, _, snippet in scored], exact)
+
+
+class SearchResult:
+    """
+    Résultat d'une recherche : snippets affichés et ensemble complet des correspondances exactes.
+
+    Tout snippet contenant "abcd" contient "abc" : une requête prolongée
+    n'a besoin de revérifier que les correspondances exactes de la
+    précédente, tant que l'index n'a pas changé.
+    """
+
+    __slots__ = ("index", "query", "snippets", "matches")
+
+    def __init__(self, index: Optional[SearchIndex], query: str, snippets: List[Mapping], matches: Optional[FrozenSet[int]]):
+        """
+        Args:
+            index: Index interrogé (None : résultat non affinable).
+            query: Requête normalisée.
+            snippets: Snippets triés (immuables).
+            matches: Numéros des snippets correspondant exactement (None : tous).
+        """
+        self.index = index
+        self.query = query
+        self.snippets = snippets
+        self.matches = matches
+
+    def refines(self, index: SearchIndex, query: str) -> bool:
+        """Indique si query (normalisée) peut être cherchée parmi les correspondances de ce résultat."""
+        return (
+            self.index is index
+            and self.matches is not None
+            and bool(self.query)
+            and query.startswith(self.query)
+        )
+
+
+def _linear_search(snippets: List[Mapping], query: str) -> List[Mapping]:
+    """Recherche sans index (référence du banc d'essai)."""
+    query = normalize(query)
+    results = []
+    for number, snippet in enumerate(snippets):
+        score = _Document(number, snippet, _inline_content(snippet)).score(query)
+        if score > 0:
+            results.append((score, snippet))
+    results.sort(key=lambda item: item[0], reverse=True)
+    return [snippet for _, snippet in results]
+
+
+def _synthetic_snippets(count: int, seed: int) -> List[Mapping]:
+    """Génère des snippets aléatoires (vocabulaire fixe)."""
+    rng = random.Random(seed)
+    words = [
+        "bonjour", "merci", "cordialement", "facture", "rendez-vous", "adresse", "signature",
+        "réunion", "projet", "livraison", "contrat", "devis", "relance", "urgent", "équipe",
+        "client", "commande", "paiement", "planning", "rapport", "support", "accès", "compte"
+    ]
+    words += [f"ref{i}" for i in range(2000)]
+    return [
+        {
+            "id": str(i),
+            "label": " ".join(rng.choices(words, k=3)),
+            "content": " ".join(rng.choices(words, k=rng.randint(10, 40))),
+            "hotkey_slot": None
+        }
+        for i in range(count)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Banc d'essai : recherche indexée (exacte et approchée) contre parcours linéaire (exact)."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Banc d'essai de la recherche de snippets")
+    parser.add_argument("--snippets", type=int, default=100_000, help="Nombre de snippets générés")
+    parser.add_argument("--limit", type=int, default=50, help="Nombre de résultats (top-k)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur")
+    args = parser.parse_args(argv)
+
+    snippets = _synthetic_snippets(args.snippets, args.seed)
+    queries = [
+        "b", "me", "fac", "rendez", "ref42", "ref1999 ", "cordialement relance", "introuvable",
+        "reunion", "Réunion", "cordialment", "rdv", "livraisno contrat"
+    ]
+
+    start = time.perf_counter()
+    index = SearchIndex(snippets)
+    print(f"Construction de l'index : {time.perf_counter() - start:.2f} s "
+          f"({len(index.postings)} n-grammes)")
+
+    print(f"{'requête':<24}{'linéaire (ms)':>15}{'index (ms)':>12}{'résultats':>11}")
+    for query in queries:
+        start = time.perf_counter()
+        expected = _linear_search(snippets, query)[:args.limit]
+        linear = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = index.search(query, args.limit)
+        indexed = time.perf_counter() - start
+
+        # Les correspondances exactes passent devant les correspondances approchées
+        if [s["id"] for s in results[:len(expected)]] != [s["id"] for s in expected]:
+            print(f"Résultats différents pour {query!r}")
+            return 1
+        print(f"{query!r:<24}{linear * 1000:>15.1f}{indexed * 1000:>12.1f}{len(results):>11}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
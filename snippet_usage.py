@@ -0,0 +1,272 @@
+"""Fréquence d'utilisation des snippets (frecency : compteurs à décroissance exponentielle)."""
+
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from settings_manager import get_config_dir
+from storage import FileLock
+
+# Demi-vie d'une utilisation (en secondes) : une utilisation vaut 1, puis 0.5 au bout de 14 jours
+HALF_LIFE = 14 * 24 * 3600
+
+# Compactage du journal quand il dépasse ce nombre de lignes (et 4 lignes par snippet suivi)
+COMPACT_MIN_LINES = 2000
+COMPACT_LINES_PER_SNIPPET = 4
+
+# Score en dessous duquel un snippet n'est plus suivi (utilisation très ancienne)
+FORGET_SCORE = 0.01
+
+# En-tête écrit par le compactage : marque de génération, nouvelle à chaque réécriture du journal
+GENERATION_PREFIX = b"#generation\t"
+
+_DECAY = math.log(2) / HALF_LIFE
+
+
+def get_usage_log_path() -> Path:
+    """Retourne le chemin du journal d'utilisation des snippets."""
+    return get_config_dir() / "snippet_usage.log"
+
+
+def _decayed(score: float, since: float, now: float) -> float:
+    """Valeur à l'instant now d'un score mesuré à l'instant since."""
+    return score * math.exp(-_DECAY * max(0.0, now - since))
+
+
+def _read_generation(f) -> bytes:
+    """
+    Lit la marque de génération en tête du journal ouvert (en binaire).
+
+    Returns:
+        Marque, ou b"" pour un journal jamais compacté ; le fichier est
+        positionné après l'en-tête s'il y en a un.
+    """
+    f.seek(0)
+    first = f.readline()
+    if first.startswith(GENERATION_PREFIX) and first.endswith(b"\n"):
+        return first[len(GENERATION_PREFIX):-1]
+    return b""
+
+
+class _UsageLog:
+    """
+    Scores en mémoire et journal en ajout seul.
+
+    Chaque utilisation ajoute une ligne "horodatage<TAB>id<TAB>poids" : pas
+    de réécriture du fichier. Le score d'un snippet est la somme de ses
+    poids, chacun divisé par deux tous les HALF_LIFE. Le journal est relu
+    de façon incrémentale (seulement les lignes ajoutées par un autre
+    processus) et compacté (une ligne par snippet) quand il devient long.
+
+    Le compactage remplace le fichier et lui donne une nouvelle marque de
+    génération en tête : un changement de fichier (inode) ou de marque
+    signale qu'il faut tout relire, même si le nouveau journal est déjà
+    plus long que la position lue.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # id -> (score, horodatage du score)
+        self.scores: Dict[str, Tuple[float, float]] = {}
+        self._path: Optional[Path] = None
+        self._offset = 0
+        self._lines = 0
+        self._identity: Optional[Tuple[int, int]] = None  # (st_dev, st_ino) du fichier lu
+        self._generation = b""
+
+    def _file_lock(self) -> FileLock:
+        path = get_usage_log_path()
+        return FileLock(path.with_name(path.name + ".lock"))
+
+    def refresh(self) -> None:
+        """Applique les lignes ajoutées depuis la dernière lecture (relit tout après un compactage)."""
+        path = get_usage_log_path()
+        with self._lock:
+            if path != self._path:
+                self._path = path
+                self._reset()
+
+            try:
+                stat = path.stat()
+            except OSError:
+                # Journal supprimé
+                if self._offset:
+                    self._reset()
+                return
+            if stat.st_size == self._offset and (stat.st_dev, stat.st_ino) == self._identity:
+                return
+            self._read_tail()
+
+    def _reset(self) -> None:
+        self.scores = {}
+        self._offset = 0
+        self._lines = 0
+        self._identity = None
+        self._generation = b""
+
+    def _read_tail(self) -> None:
+        """Lit le journal à partir de _offset (appelé sous _lock)."""
+        try:
+            with open(self._path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                identity = (stat.st_dev, stat.st_ino)
+                generation = _read_generation(f)
+                if identity != self._identity or generation != self._generation or stat.st_size < self._offset:
+                    # Journal compacté (remplacé) par un autre processus : tout relire
+                    self._reset()
+                    self._identity = identity
+                    self._generation = generation
+                start = max(self._offset, f.tell() if generation else 0)
+                f.seek(start)
+                data = f.read()
+        except OSError as e:
+            print(f"Erreur lecture {self._path.name}: {e}")
+            return
+
+        # Une dernière ligne incomplète (écriture en cours) sera relue plus tard
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode('utf-8', errors='replace').splitlines():
+            self._apply_line(line)
+        self._offset = start + end
+
+    def _apply_line(self, line: str) -> None:
+        try:
+            timestamp, snippet_id, weight = line.split("\t")
+            self._add(snippet_id, float(timestamp), float(weight))
+        except ValueError:
+            return  # Ligne corrompue : ignorée
+        self._lines += 1
+
+    def _add(self, snippet_id: str, timestamp: float, weight: float) -> None:
+        score, since = self.scores.get(snippet_id, (0.0, timestamp))
+        if timestamp >= since:
+            self.scores[snippet_id] = (_decayed(score, since, timestamp) + weight, timestamp)
+        else:
+            # Ligne plus ancienne que le score (horloges de processus différents)
+            self.scores[snippet_id] = (score + _decayed(weight, timestamp, since), since)
+
+    def record(self, snippet_id: str, timestamp: Optional[float] = None) -> None:
+        """
+        Enregistre une utilisation (ajout d'une ligne au journal).
+
+        Args:
+            snippet_id: ID du snippet utilisé.
+            timestamp: Horodatage (défaut : maintenant).
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        line = f"{timestamp:.3f}\t{snippet_id}\t1\n".encode('utf-8')
+
+        with self._lock:
+            try:
+                with self._file_lock():
+                    # Relire ce qu'un autre processus a pu ajouter, puis ajouter notre ligne
+                    self.refresh()
+                    self._path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(self._path, 'ab') as f:
+                        f.write(line)
+                    self._read_tail()
+
+                    if self._lines > max(COMPACT_MIN_LINES, COMPACT_LINES_PER_SNIPPET * len(self.scores)):
+                        self._compact()
+            except OSError as e:
+                print(f"Erreur sauvegarde {self._path.name}: {e}")
+
+    def _compact(self) -> None:
+        """Réécrit le journal avec une ligne par snippet (sous les deux verrous)."""
+        now = time.time()
+        generation = f"{now:.6f}.{os.getpid()}".encode('ascii')
+        lines: List[str] = []
+        scores: Dict[str, Tuple[float, float]] = {}
+        for snippet_id, (score, since) in self.scores.items():
+            current = _decayed(score, since, now)
+            if current >= FORGET_SCORE:
+                lines.append(f"{now:.3f}\t{snippet_id}\t{current:.6f}\n")
+                scores[snippet_id] = (current, now)
+
+        temp_path = self._path.with_name(f"{self._path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(GENERATION_PREFIX + generation + b"\n")
+                f.write("".join(lines).encode('utf-8'))
+            temp_path.replace(self._path)
+            stat = self._path.stat()
+        except OSError as e:
+            print(f"Erreur compactage {self._path.name}: {e}")
+            if temp_path.exists():
+                temp_path.unlink()
+            return
+
+        self.scores = scores
+        self._offset = stat.st_size
+        self._lines = len(lines)
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._generation = generation
+
+    def forget(self, snippet_ids: List[str]) -> None:
+        """Oublie des snippets (supprimés) : poids négatif annulant leur score."""
+        with self._lock:
+            self.refresh()
+            now = time.time()
+            lines = []
+            for snippet_id in snippet_ids:
+                if snippet_id in self.scores:
+                    score, since = self.scores[snippet_id]
+                    lines.append(f"{now:.3f}\t{snippet_id}\t{-_decayed(score, since, now):.6f}\n")
+            if not lines:
+                return
+            try:
+                with self._file_lock():
+                    self.refresh()
+                    with open(self._path, 'a', encoding='utf-8') as f:
+                        f.writelines(lines)
+                    self._read_tail()
+            except OSError as e:
+                print(f"Erreur sauvegarde {self._path.name}: {e}")
+            for snippet_id in snippet_ids:
+                self.scores.pop(snippet_id, None)
+
+
+_log = _UsageLog()
+
+
+def record_use(snippet_id: str) -> None:
+    """
+    Enregistre l'utilisation d'un snippet (collage).
+
+    Args:
+        snippet_id: ID du snippet.
+    """
+    if snippet_id:
+        _log.record(snippet_id)
+
+
+def forget(snippet_id: str) -> None:
+    """
+    Efface l'historique d'un snippet supprimé.
+
+    Args:
+        snippet_id: ID du snippet.
+    """
+    _log.forget([snippet_id])
+
+
+def get_scores(now: Optional[float] = None) -> Dict[str, float]:
+    """
+    Retourne les scores de frecency actuels.
+
+    Args:
+        now: Instant d'évaluation (défaut : maintenant).
+
+    Returns:
+        Dict {snippet_id: score} (1.0 ≈ une utilisation récente).
+    """
+    _log.refresh()
+    now = time.time() if now is None else now
+    scores = {}
+    for snippet_id, (score, since) in list(_log.scores.items()):
+        current = _decayed(score, since, now)
+        if current >= FORGET_SCORE:
+            scores[snippet_id] = current
+    return scores
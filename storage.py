@@ -0,0 +1,1107 @@
+"""Moteur de stockage commun des fichiers JSON de configuration.
+
+Chaque fichier (config.json, prompts.json, snippets.json, usage_stats.json)
+est géré par un JsonStore qui fournit :
+- un cache mémoire immuable, invalidé par stat (mtime + taille) ;
+- une écriture atomique (fichier temporaire + rename), avec fsync optionnel ;
+- un numéro de schéma et des migrations appliquées au chargement ;
+- un verrou inter-processus (fichier .lock) pour les lecture-modification-écriture ;
+- le regroupement des écritures rapprochées (écriture différée en arrière-plan).
+
+Un JournaledStore ajoute les modifications d'une liste à un journal au lieu
+de réécrire tout le fichier, compacté en arrière-plan.
+
+Les contenus volumineux (corps des snippets) sont rangés à part dans un
+BlobStore : un fichier par contenu, nommé par son empreinte SHA-256.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, TypeVar
+
+# Clé du numéro de schéma dans les fichiers (retirée des données exposées)
+SCHEMA_KEY = "schema_version"
+
+# Intervalle entre deux tentatives de prise du verrou sous Windows (en secondes)
+LOCK_RETRY_DELAY = 0.05
+
+# Variable d'environnement choisissant le backend ("json" ou "sqlite")
+BACKEND_ENV = "TYPO_STORAGE"
+
+# Base SQLite (backend optionnel), dans le répertoire de configuration
+DB_FILENAME = "typo.db"
+
+# Nombre d'éléments journalisés au-delà duquel le fichier JSON est réécrit (compactage)
+JOURNAL_COMPACT_RECORDS = 1000
+
+T = TypeVar("T")
+
+# Taille maximale du cache mémoire d'un BlobStore (en caractères)
+BLOB_CACHE_SIZE = 4 * 1024 * 1024
+
+# Stores existants, pour flush_all() à la fermeture
+_stores: "weakref.WeakSet[JsonStore]" = weakref.WeakSet()
+
+# Stores ouverts par open_store(), par nom de document
+_documents: Dict[str, "Store"] = {}
+
+
+# Valeurs immuables, retournées telles quelles par freeze() et thaw() (test rapide)
+_SCALARS = (str, int, float, type(None))
+
+
+def freeze(value: Any) -> Any:
+    """Convertit récursivement dicts et listes en structures immuables."""
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Convertit récursivement une structure immuable en dicts et listes modifiables."""
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+
+def _stat_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """Retourne (mtime_ns, taille) du fichier, ou None s'il n'existe pas."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class FileLock:
+    """
+    Verrou exclusif inter-processus basé sur un fichier .lock.
+
+    Réentrant pour le thread qui le détient ; les autres threads du même
+    processus sont sérialisés par un verrou local.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Chemin du fichier de verrou.
+        """
+        self.path = path
+        self._local = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def __enter__(self) -> "FileLock":
+        self._local.acquire()
+        if self._depth == 0:
+            try:
+                self._acquire_file()
+            except OSError as e:
+                # Stockage sans verrou possible (lecture seule, réseau) : continuer
+                print(f"Avertissement: verrou {self.path.name} indisponible: {e}")
+                self._handle = None
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._handle is not None:
+            self._release_file()
+        self._local.release()
+
+    def _acquire_file(self) -> None:
+        """Ouvre le fichier de verrou et prend le verrou système (bloquant)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(self.path, 'a+b')
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                handle.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(LOCK_RETRY_DELAY)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            handle.close()
+            raise
+        self._handle = handle
+
+    def _release_file(self) -> None:
+        """Libère le verrou système et ferme le fichier."""
+        handle, self._handle = self._handle, None
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        finally:
+            handle.close()
+
+
+class _DebouncedWriter:
+    """
+    Exécute une écriture en arrière-plan, une fois les modifications calmées.
+
+    Chaque écriture prend l'état le plus récent : une rafale de modifications
+    produit une seule écriture.
+    """
+
+    def __init__(self, write: Callable[[], None], delay: float):
+        self.write = write
+        self.delay = delay
+        self._condition = threading.Condition()
+        self._dirty = False
+        self._deadline = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._writing = threading.Lock()
+
+    @property
+    def pending(self) -> bool:
+        """True si une écriture est programmée."""
+        return self._dirty
+
+    def schedule(self) -> None:
+        """Programme une écriture après le délai (repoussé à chaque appel)."""
+        with self._condition:
+            self._dirty = True
+            self._deadline = time.monotonic() + self.delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def cancel(self) -> None:
+        """Abandonne l'écriture programmée."""
+        with self._condition:
+            self._dirty = False
+
+    def flush(self) -> None:
+        """Écrit immédiatement si une écriture est en attente, ou attend celle en cours."""
+        with self._condition:
+            dirty, self._dirty = self._dirty, False
+        with self._writing:
+            if dirty:
+                self.write()
+
+    def _run(self) -> None:
+        """Boucle du thread d'écriture."""
+        while True:
+            with self._condition:
+                while not self._dirty:
+                    self._condition.wait()
+                remaining = self._deadline - time.monotonic()
+                while self._dirty and remaining > 0:
+                    self._condition.wait(remaining)
+                    remaining = self._deadline - time.monotonic()
+                if not self._dirty:
+                    continue
+                self._dirty = False
+            with self._writing:
+                self.write()
+
+
+class Store:
+    """
+    Base commune des stores : snapshot immuable partagé et structures dérivées.
+
+    Les lecteurs reçoivent un snapshot immuable partagé, remplacé d'un bloc
+    à chaque changement ; generation est incrémenté à chaque remplacement
+    pour permettre aux modules d'invalider leurs structures dérivées.
+
+    Les sous-classes fournissent read(), write(), update() et _load().
+    """
+
+    def __init__(self, default: Callable[[], Dict[str, Any]], write_delay: float = 0.0):
+        """
+        Args:
+            default: Fonction retournant le contenu initial.
+            write_delay: Si > 0, les écritures sont différées et regroupées (en secondes).
+        """
+        self.default = default
+        self.generation = 0
+        self._lock = threading.RLock()
+        self._data: Optional[Mapping[str, Any]] = None
+        self._derived: Any = None
+        self._derived_generation = -1
+        self._writer = _DebouncedWriter(self._write_current, write_delay) if write_delay > 0 else None
+        _stores.add(self)
+
+    def read_derived(self, builder: Callable[[Mapping[str, Any]], T]) -> T:
+        """
+        Retourne une structure dérivée du contenu, reconstruite seulement s'il a changé.
+
+        Args:
+            builder: Fonction construisant la structure à partir du snapshot.
+
+        Returns:
+            Structure dérivée (partagée, à ne pas modifier).
+        """
+        data = self.read()
+        derived = self._derived
+        if self._derived_generation == self.generation and derived is not None:
+            return derived
+
+        with self._lock:
+            if self._derived_generation != self.generation or self._derived is None:
+                self._derived = builder(self._data if self._data is not None else data)
+                self._derived_generation = self.generation
+            return self._derived
+
+    def write(self, data: Mapping[str, Any]) -> bool:
+        """
+        Remplace le contenu et l'écrit (ou programme l'écriture).
+
+        Args:
+            data: Nouveau contenu.
+
+        Returns:
+            True si l'écriture a réussi ou est programmée.
+        """
+        with self._lock:
+            self._publish(data)
+            if self._writer is not None:
+                self._writer.schedule()
+                return True
+            return self._write_current()
+
+    def flush(self) -> None:
+        """Écrit immédiatement une écriture différée en attente."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def _publish(self, data: Mapping[str, Any]) -> None:
+        """Remplace le snapshot en mémoire (appelé sous _lock)."""
+        self._data = freeze(data)
+        self.generation += 1
+
+    def _rederive(self, generation: int, derive: Optional[Callable[[Any, Mapping[str, Any]], Any]]) -> None:
+        """
+        Met à jour la structure dérivée en place de la reconstruire (appelé sous _lock).
+
+        Seulement si elle correspondait au contenu d'avant la modification (generation).
+        """
+        if derive is not None and self._derived is not None and self._derived_generation == generation:
+            self._derived = derive(self._derived, self._data)
+            self._derived_generation = self.generation
+
+    def _discard_pending_write(self) -> None:
+        """Une modification externe remplace une écriture différée non encore faite."""
+        if self._writer is not None:
+            self._writer.cancel()
+
+    def exists(self) -> bool:
+        """Indique si le document a déjà été enregistré."""
+        raise NotImplementedError
+
+    def _write_current(self) -> bool:
+        """Persiste le snapshot courant."""
+        raise NotImplementedError
+
+
+class JsonStore(Store):
+    """Fichier JSON (objet à la racine) avec cache, écriture atomique et schéma versionné."""
+
+    def __init__(
+        self,
+        path: Callable[[], Path],
+        default: Callable[[], Dict[str, Any]],
+        schema_version: int = 1,
+        migrations: Optional[Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]]] = None,
+        durable: bool = False,
+        write_delay: float = 0.0
+    ):
+        """
+        Initialise le store (aucun accès disque avant la première lecture).
+
+        Args:
+            path: Fonction retournant le chemin du fichier.
+            default: Fonction retournant le contenu initial d'un fichier absent.
+            schema_version: Version courante du schéma.
+            migrations: {version: fonction} faisant passer les données de version-1 à version.
+                Un fichier sans numéro de schéma est en version 0.
+            durable: Si True, fsync du fichier (et du répertoire) avant de rendre la main.
+            write_delay: Si > 0, les écritures sont différées et regroupées (en secondes).
+        """
+        super().__init__(default, write_delay)
+        self._path = path
+        self.schema_version = schema_version
+        self.migrations = migrations or {}
+        self.durable = durable
+        self._signature: Optional[Tuple[int, int]] = None
+        self._file_lock: Optional[FileLock] = None
+
+    @property
+    def path(self) -> Path:
+        """Chemin du fichier."""
+        return self._path()
+
+    def exists(self) -> bool:
+        """Indique si le fichier existe."""
+        return self.path.exists()
+
+    def lock(self) -> FileLock:
+        """Retourne le verrou inter-processus du fichier (context manager)."""
+        with self._lock:
+            path = self.path.with_name(self.path.name + ".lock")
+            if self._file_lock is None or self._file_lock.path != path:
+                self._file_lock = FileLock(path)
+            return self._file_lock
+
+    def read(self, revalidate: bool = True, strict: bool = False) -> Mapping[str, Any]:
+        """
+        Retourne le contenu du fichier (snapshot immuable, sans la clé de schéma).
+
+        Args:
+            revalidate: Si True, vérifie par stat que le fichier n'a pas changé
+                sur disque ; sinon, retourne le cache tel quel.
+            strict: Si True, propage les erreurs de lecture au lieu de
+                retomber sur le contenu par défaut.
+
+        Returns:
+            Mapping immuable.
+
+        Raises:
+            json.JSONDecodeError: En mode strict, si le fichier est invalide.
+            OSError: En mode strict, si le fichier ne peut pas être lu.
+        """
+        data = self._data
+        if data is not None and not revalidate:
+            return data
+
+        signature = _stat_signature(self.path)
+        if data is not None and signature == self._signature:
+            return data
+
+        with self._lock:
+            if self._data is not None and _stat_signature(self.path) == self._signature:
+                return self._data
+            return self._load(strict)
+
+    def update(
+        self,
+        mutate: Callable[[Dict[str, Any]], T],
+        derive: Optional[Callable[[Any, Mapping[str, Any]], Any]] = None
+    ) -> T:
+        """
+        Lecture-modification-écriture protégée par le verrou inter-processus.
+
+        Le fichier est relu s'il a été modifié par un autre processus, puis
+        mutate reçoit une copie modifiable du contenu.
+
+        Args:
+            mutate: Fonction modifiant le dict reçu ; sa valeur de retour est retournée.
+            derive: Fonction (structure dérivée, nouveau snapshot) -> structure à jour,
+                pour une mise à jour incrémentale au lieu d'une reconstruction.
+
+        Returns:
+            Valeur retournée par mutate.
+        """
+        with self._lock, self.lock():
+            data = thaw(self.read())
+            generation = self.generation
+            result = mutate(data)
+            self.write(data)
+            self._rederive(generation, derive)
+            return result
+
+    def _load(self, strict: bool) -> Mapping[str, Any]:
+        """Charge le fichier, applique les migrations (appelé sous _lock)."""
+        path = self.path
+
+        if not path.exists():
+            self._publish(self.default())
+            self._write_current()
+            return self._data
+
+        try:
+            data, text, migrated = self._parse(path)
+        except (json.JSONDecodeError, OSError) as e:
+            if strict:
+                raise
+            print(f"Erreur lecture {path.name}: {e}")
+            # Ne pas reparser le fichier corrompu à chaque lecture
+            self._signature = _stat_signature(path)
+            self._publish(self.default())
+            return self._data
+
+        # Une modification externe remplace une écriture différée non encore faite
+        self._discard_pending_write()
+
+        self._signature = _stat_signature(path)
+        self._publish(self._loaded(data, text))
+        if migrated:
+            self._write_current()
+        return self._data
+
+    def _parse(self, path: Path) -> Tuple[Dict[str, Any], str, bool]:
+        """
+        Lit le fichier et applique les migrations en mémoire.
+
+        Returns:
+            (contenu sans la clé de schéma, texte du fichier, True si migré).
+
+        Raises:
+            json.JSONDecodeError: Si le fichier est invalide.
+            OSError: Si le fichier ne peut pas être lu.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise json.JSONDecodeError("Objet JSON attendu", "", 0)
+
+        version = data.pop(SCHEMA_KEY, 0)
+        migrated = version < self.schema_version
+        while version < self.schema_version:
+            version += 1
+            migration = self.migrations.get(version)
+            if migration is not None:
+                data = migration(data)
+        return data, text, migrated
+
+    def read_detached(self) -> Optional[Dict[str, Any]]:
+        """
+        Lit le fichier (migré) sans le publier ni le réécrire : import dans un autre store.
+
+        Returns:
+            Contenu modifiable, ou None si le fichier est absent ou illisible.
+        """
+        with self._lock:
+            path = self.path
+            if not path.exists():
+                return None
+            try:
+                data, text, _ = self._parse(path)
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"Erreur lecture {path.name}: {e}")
+                return None
+            return self._loaded(data, text)
+
+    def _loaded(self, data: Dict[str, Any], text: str) -> Dict[str, Any]:
+        """Complète le contenu lu sur disque (text : texte du fichier) avant sa publication."""
+        return data
+
+    def _written(self, text: str) -> None:
+        """Appelé après l'écriture du fichier (text : texte écrit)."""
+
+    def _write_current(self) -> bool:
+        """Écrit le snapshot courant de manière atomique (temp file + rename)."""
+        with self._lock:
+            data = self._data
+        if data is None:
+            return False
+
+        path = self.path
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        content = thaw(data)
+        content[SCHEMA_KEY] = self.schema_version
+        text = json.dumps(content, indent=2, ensure_ascii=False)
+
+        with self.lock():
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                    if self.durable:
+                        f.flush()
+                        os.fsync(f.fileno())
+                temp_path.replace(path)
+                if self.durable:
+                    _fsync_directory(path.parent)
+            except Exception as e:
+                print(f"Erreur sauvegarde {path.name}: {e}")
+                if temp_path.exists():
+                    temp_path.unlink()
+                return False
+
+            # Notre propre écriture ne doit pas provoquer de relecture (un
+            # snapshot plus récent éventuel reste en mémoire jusqu'à son écriture)
+            self._signature = _stat_signature(path)
+            self._written(text)
+        return True
+
+
+class JournaledStore(JsonStore):
+    """
+    JsonStore dont une liste (éléments identifiés par une clé) est journalisée.
+
+    Une écriture ajoute au journal (fichier .journal à côté du fichier
+    JSON) une ligne avec les seuls éléments ajoutés, modifiés ou supprimés ;
+    le fichier JSON n'est réécrit (compactage) qu'en arrière-plan, quand le
+    journal dépasse JOURNAL_COMPACT_RECORDS éléments, ou directement pour
+    une modification trop grande ou qui ne s'exprime pas en ajouts et
+    suppressions (réordonnancement, autre clé du document).
+
+    Chaque ligne du journal porte un CRC32 : la lecture s'arrête à la
+    première ligne incomplète ou corrompue (écriture interrompue), qui
+    n'est donc jamais appliquée à moitié, et l'écriture suivante compacte
+    le fichier. L'en-tête du journal porte le CRC32 du fichier JSON sur
+    lequel il s'applique : un journal resté d'un compactage interrompu, ou
+    un fichier JSON modifié à la main, fait ignorer le journal.
+    """
+
+    def __init__(
+        self,
+        path: Callable[[], Path],
+        default: Callable[[], Dict[str, Any]],
+        collection: str,
+        key: str = "id",
+        schema_version: int = 1,
+        migrations: Optional[Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]]] = None,
+        durable: bool = False,
+        write_delay: float = 0.0,
+        on_compact: Optional[Callable[[Mapping[str, Any]], None]] = None
+    ):
+        """
+        Args:
+            collection: Clé de la liste journalisée dans le document.
+            key: Clé identifiant un élément de la liste.
+            path, default, schema_version, migrations, durable, write_delay: Voir JsonStore.
+            on_compact: Appelée avec le contenu écrit après chaque compactage réussi
+                (sous les verrous) : le fichier JSON seul décrit alors tout le document.
+        """
+        super().__init__(path, default, schema_version, migrations, durable, write_delay)
+        self.collection = collection
+        self.key = key
+        self.on_compact = on_compact
+        # Dernier contenu écrit sur disque (base des différences à journaliser)
+        self._persisted: Optional[Mapping[str, Any]] = None
+        # CRC32 du texte du fichier JSON (None : inconnu, journal inutilisable)
+        self._snapshot: Optional[int] = None
+        self._journal_offset = 0
+        self._journal_records = 0
+        self._journal_signature: Optional[Tuple[int, int]] = None
+        self._compacting = False
+
+    @property
+    def journal_path(self) -> Path:
+        """Chemin du journal."""
+        return self.path.with_suffix(".journal")
+
+    def read(self, revalidate: bool = True, strict: bool = False) -> Mapping[str, Any]:
+        """Voir JsonStore.read ; applique aussi les enregistrements ajoutés au journal."""
+        data = super().read(revalidate, strict)
+        if revalidate and _stat_signature(self.journal_path) != self._journal_signature:
+            with self._lock:
+                self._read_journal()
+                data = self._data
+        return data
+
+    def _load(self, strict: bool) -> Mapping[str, Any]:
+        self._persisted = None
+        self._snapshot = None
+        self._journal_offset = 0
+        self._journal_records = 0
+        self._journal_signature = None
+        data = super()._load(strict)
+        self._persisted = data
+        return data
+
+    def read_detached(self) -> Optional[Dict[str, Any]]:
+        """Voir JsonStore.read_detached ; le journal est rejoué depuis son début."""
+        with self._lock:
+            self._journal_offset = 0
+            self._journal_records = 0
+            self._journal_signature = None
+            return super().read_detached()
+
+    def _loaded(self, data: Dict[str, Any], text: str) -> Dict[str, Any]:
+        """Rejoue le journal sur le contenu du fichier JSON."""
+        self._snapshot = zlib.crc32(text.encode('utf-8'))
+        records = self._journal_tail()
+        return self._replay(data, records) if records else data
+
+    def _written(self, text: str) -> None:
+        self._snapshot = zlib.crc32(text.encode('utf-8'))
+
+    def _journal_tail(self) -> List[Dict[str, Any]]:
+        """
+        Lit les enregistrements valides du journal après _journal_offset (appelé sous _lock).
+
+        Returns:
+            Enregistrements, vide si le journal est absent ou d'un autre fichier JSON.
+        """
+        path = self.journal_path
+        self._journal_signature = _stat_signature(path)
+        if self._snapshot is None:
+            return []
+        try:
+            with open(path, 'rb') as f:
+                header = _decode_record(f.readline())
+                if header is None or header.get("snapshot") != self._snapshot:
+                    return []
+                f.seek(max(self._journal_offset, f.tell()))
+                self._journal_offset = f.tell()
+                data = f.read()
+        except OSError:
+            return []
+
+        records = []
+        for line in data.splitlines(keepends=True):
+            record = _decode_record(line)
+            if record is None:
+                # Enregistrement incomplet (écriture en cours ou interrompue) ou corrompu :
+                # la suite est ignorée, et la prochaine écriture compacte le fichier
+                if line.endswith(b"\n"):
+                    print(f"Avertissement: enregistrement corrompu dans {path.name}")
+                break
+            records.append(record)
+            self._journal_offset += len(line)
+        self._journal_records += sum(_record_size(record) for record in records)
+        return records
+
+    def _read_journal(self) -> None:
+        """Applique les enregistrements ajoutés par un autre processus (appelé sous _lock)."""
+        records = self._journal_tail()
+        if not records:
+            return
+        pending = self._data is not self._persisted
+        self._persisted = freeze(self._replay(thaw(self._persisted), records))
+        if pending:
+            # Modifications locales non encore écrites : conservées par-dessus
+            self._publish(self._replay(thaw(self._data), records))
+        else:
+            self._data = self._persisted
+            self.generation += 1
+
+    def _replay(self, data: Dict[str, Any], records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Applique des enregistrements au document (dans l'ordre)."""
+        items = {item.get(self.key): item for item in data.get(self.collection, [])}
+        for record in records:
+            for item_key in record.get("delete", ()):
+                items.pop(item_key, None)
+            for item in record.get("put", ()):
+                items[item.get(self.key)] = item
+        data[self.collection] = list(items.values())
+        return data
+
+    def _diff(self, old: Mapping[str, Any], new: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Enregistrement faisant passer de old à new.
+
+        Returns:
+            {"delete": [clés], "put": [éléments]} (vide si rien n'a changé), ou
+            None si la différence ne s'exprime pas en ajouts en fin de liste,
+            remplacements et suppressions.
+        """
+        if any(old.get(name) != value for name, value in new.items() if name != self.collection):
+            return None
+        if any(name not in new for name in old if name != self.collection):
+            return None
+
+        old_items = {item.get(self.key): item for item in old.get(self.collection, ())}
+        new_list = new.get(self.collection, ())
+        new_keys = [item.get(self.key) for item in new_list]
+        if len(old_items) != len(old.get(self.collection, ())) or len(set(new_keys)) != len(new_keys):
+            return None  # Clés en double : pas d'identification possible
+
+        present = set(new_keys)
+        kept = [item_key for item_key in old_items if item_key in present]
+        if new_keys[:len(kept)] != kept or any(item_key in old_items for item_key in new_keys[len(kept):]):
+            return None  # Ordre modifié
+
+        record = {}
+        deleted = [item_key for item_key in old_items if item_key not in present]
+        put = [thaw(item) for item_key, item in zip(new_keys, new_list) if old_items.get(item_key) != item]
+        if deleted:
+            record["delete"] = deleted
+        if put:
+            record["put"] = put
+        return record
+
+    def _journal_ready(self) -> bool:
+        """True si le journal sur disque est celui lu jusqu'ici (même fichier JSON, rien après _journal_offset)."""
+        if self._snapshot is None or self._persisted is None:
+            return False
+        path = self.journal_path
+        try:
+            with open(path, 'rb') as f:
+                header = _decode_record(f.readline())
+                size = os.fstat(f.fileno()).st_size
+        except OSError:
+            return False
+        return header is not None and header.get("snapshot") == self._snapshot and size == self._journal_offset
+
+    def _write_current(self) -> bool:
+        """Ajoute les modifications au journal, ou réécrit le fichier JSON si nécessaire."""
+        with self._lock, self.lock():
+            data = self._data
+            if data is None:
+                return False
+            record = self._diff(self._persisted, data) if self._journal_ready() else None
+            if record is None or _record_size(record) > JOURNAL_COMPACT_RECORDS:
+                return self._compact()
+            if record and not self._append(record):
+                return self._compact()
+
+            self._persisted = data
+            if self._journal_records >= JOURNAL_COMPACT_RECORDS and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self._background_compact, daemon=True).start()
+            return True
+
+    def _append(self, record: Dict[str, Any]) -> bool:
+        """Ajoute un enregistrement (une ligne) à la fin du journal (sous les deux verrous)."""
+        path = self.journal_path
+        payload = _encode_record(record)
+        try:
+            with open(path, 'ab') as f:
+                f.write(payload)
+                if self.durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            print(f"Erreur écriture {path.name}: {e}")
+            return False
+        self._journal_offset += len(payload)
+        self._journal_records += _record_size(record)
+        self._journal_signature = _stat_signature(path)
+        return True
+
+    def _compact(self) -> bool:
+        """Réécrit le fichier JSON avec le contenu courant et repart d'un journal vide (sous les deux verrous)."""
+        data = self._data
+        if not super()._write_current():
+            return False  # Fichier JSON et journal inchangés, toujours cohérents
+
+        path = self.journal_path
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        header = _encode_record({"snapshot": self._snapshot})
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(header)
+                if self.durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            temp_path.replace(path)
+        except OSError as e:
+            # Le fichier JSON est à jour ; l'ancien journal (autre CRC) sera ignoré
+            print(f"Erreur écriture {path.name}: {e}")
+            if temp_path.exists():
+                temp_path.unlink()
+        self._persisted = data
+        self._journal_offset = len(header)
+        self._journal_records = 0
+        self._journal_signature = _stat_signature(path)
+        if self.on_compact is not None:
+            self.on_compact(data)
+        return True
+
+    def flush(self) -> None:
+        """Écrit les écritures différées puis compacte le journal (fichier JSON à jour à la fermeture)."""
+        super().flush()
+        if not self._journal_records and self.on_compact is None:
+            return
+        with self._lock, self.lock():
+            if not self._journal_ready():
+                return
+            if self._journal_records:
+                self._compact()
+            elif self.on_compact is not None and self._data is self._persisted:
+                # Journal déjà vide : le fichier JSON décrit seul le document
+                self.on_compact(self._persisted)
+
+    def _background_compact(self) -> None:
+        """Compactage hors du chemin des écritures (thread dédié)."""
+        with self._lock, self.lock():
+            self._compacting = False
+            if self._journal_records >= JOURNAL_COMPACT_RECORDS and self._journal_ready():
+                self._compact()
+
+
+def _record_size(record: Mapping[str, Any]) -> int:
+    """Nombre d'éléments ajoutés, modifiés ou supprimés par un enregistrement du journal."""
+    return len(record.get("delete", ())) + len(record.get("put", ()))
+
+
+def _encode_record(record: Mapping[str, Any]) -> bytes:
+    """Ligne du journal : CRC32 (hexadécimal), tabulation, JSON."""
+    payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    return b"%08x\t%s\n" % (zlib.crc32(payload), payload)
+
+
+def _decode_record(line: bytes) -> Optional[Dict[str, Any]]:
+    """Enregistrement d'une ligne du journal, None si elle est incomplète ou corrompue."""
+    if not line.endswith(b"\n"):
+        return None
+    checksum, _, payload = line[:-1].partition(b"\t")
+    try:
+        if int(checksum, 16) != zlib.crc32(payload):
+            return None
+        record = json.loads(payload.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Synchronise l'entrée de répertoire après un rename (POSIX uniquement)."""
+    if sys.platform == "win32":
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class BlobStore:
+    """
+    Textes adressés par contenu : un fichier par texte, nommé par son SHA-256.
+
+    Un même texte n'est stocké qu'une fois ; un fichier n'est jamais
+    modifié après écriture, donc le cache mémoire (LRU borné en taille)
+    n'a jamais à être invalidé.
+    """
+
+    def __init__(self, directory: Callable[[], Path], durable: bool = False):
+        """
+        Args:
+            directory: Fonction retournant le répertoire des fichiers.
+            durable: Si True, fsync de chaque nouveau fichier.
+        """
+        self._directory = directory
+        self.durable = durable
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_size = 0
+
+    @staticmethod
+    def digest(text: str) -> str:
+        """Empreinte SHA-256 (hexadécimale) d'un texte encodé en UTF-8."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def path(self, digest: str) -> Path:
+        """Chemin du fichier d'une empreinte (sous-répertoire des 2 premiers caractères)."""
+        return self._directory() / digest[:2] / digest
+
+    def put(self, text: str, durable: Optional[bool] = None) -> Tuple[str, int]:
+        """
+        Enregistre un texte (rien à écrire s'il existe déjà).
+
+        Args:
+            text: Texte à stocker.
+            durable: Si False, pas de fsync (sync() ensuite pour un lot). Défaut : self.durable.
+
+        Returns:
+            Tuple (empreinte, taille en octets).
+
+        Raises:
+            OSError: Si le fichier ne peut pas être écrit.
+        """
+        if durable is None:
+            durable = self.durable
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f"{digest}.{os.getpid()}.tmp")
+            try:
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                    if durable:
+                        f.flush()
+                        os.fsync(f.fileno())
+                temp_path.replace(path)
+            except OSError:
+                if temp_path.exists():
+                    temp_path.unlink()
+                raise
+        self._remember(digest, text)
+        return digest, len(data)
+
+    def get(self, digest: str) -> Optional[str]:
+        """
+        Retourne le texte d'une empreinte.
+
+        Args:
+            digest: Empreinte SHA-256.
+
+        Returns:
+            Texte, ou None si le fichier est absent ou illisible.
+        """
+        with self._lock:
+            text = self._cache.get(digest)
+            if text is not None:
+                self._cache.move_to_end(digest)
+                return text
+
+        try:
+            text = self.path(digest).read_bytes().decode('utf-8')
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Erreur lecture contenu {digest[:12]}: {e}")
+            return None
+        self._remember(digest, text)
+        return text
+
+    def sync(self, digests: Iterable[str]) -> None:
+        """
+        Force sur disque des fichiers écrits avec put(durable=False).
+
+        fsync de chaque fichier, puis de chaque sous-répertoire et du
+        répertoire des contenus (entrées de répertoire créées) : les contenus
+        sont sur disque avant l'enregistrement du document qui les cite.
+
+        Args:
+            digests: Empreintes des fichiers écrits.
+        """
+        digests = set(digests)
+        for digest in digests:
+            try:
+                with open(self.path(digest), 'r+b') as f:
+                    os.fsync(f.fileno())
+            except OSError as e:
+                print(f"Avertissement: fsync impossible pour le contenu {digest[:12]}: {e}")
+        if not digests:
+            return
+        directory = self._directory()
+        for prefix in {digest[:2] for digest in digests}:
+            _fsync_directory(directory / prefix)
+        _fsync_directory(directory)
+
+    def delete(self, digest: str) -> None:
+        """Supprime le fichier d'une empreinte (plus référencée)."""
+        with self._lock:
+            text = self._cache.pop(digest, None)
+            if text is not None:
+                self._cache_size -= len(text)
+        try:
+            self.path(digest).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Avertissement: impossible de supprimer le contenu {digest[:12]}: {e}")
+
+    def _remember(self, digest: str, text: str) -> None:
+        """Ajoute un texte au cache LRU (les textes plus grands que le cache n'y entrent pas)."""
+        if len(text) > BLOB_CACHE_SIZE:
+            return
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return
+            self._cache[digest] = text
+            self._cache_size += len(text)
+            while self._cache_size > BLOB_CACHE_SIZE:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_size -= len(evicted)
+
+
+def get_backend(directory: Path) -> str:
+    """
+    Détermine le backend de stockage.
+
+    SQLite est utilisé si TYPO_STORAGE=sqlite, ou si la base existe déjà
+    (TYPO_STORAGE=json force les fichiers JSON).
+
+    Args:
+        directory: Répertoire de configuration.
+
+    Returns:
+        "sqlite" ou "json".
+    """
+    backend = os.environ.get(BACKEND_ENV, "").strip().lower()
+    if backend in ("json", "sqlite"):
+        return backend
+    return "sqlite" if (directory / DB_FILENAME).exists() else "json"
+
+
+def open_store(
+    name: str,
+    path: Callable[[], Path],
+    default: Callable[[], Dict[str, Any]],
+    schema_version: int = 1,
+    migrations: Optional[Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]]] = None,
+    durable: bool = False,
+    write_delay: float = 0.0,
+    journal: Optional[str] = None,
+    on_compact: Optional[Callable[[Mapping[str, Any]], None]] = None
+) -> Store:
+    """
+    Ouvre le store d'un document selon le backend configuré.
+
+    Avec SQLite, le fichier JSON existant est importé une seule fois dans la base.
+
+    Args:
+        name: Nom du document ("config", "prompts", "snippets").
+        path: Fonction retournant le chemin du fichier JSON.
+        default, schema_version, migrations, durable, write_delay: Voir JsonStore.
+        journal: Clé d'une liste d'éléments identifiés par "id" à journaliser
+            (JournaledStore) au lieu de réécrire le fichier à chaque modification.
+        on_compact: Voir JournaledStore (ignoré sans journal).
+
+    Returns:
+        JsonStore, JournaledStore ou database.SqliteStore.
+    """
+    if journal is not None:
+        json_store = JournaledStore(
+            path, default, journal, schema_version=schema_version, migrations=migrations,
+            durable=durable, write_delay=write_delay, on_compact=on_compact
+        )
+    else:
+        json_store = JsonStore(path, default, schema_version, migrations, durable, write_delay)
+    if get_backend(path().parent) != "sqlite":
+        store = json_store
+    else:
+        _stores.discard(json_store)
+        import database
+        store = database.SqliteStore(name, default, json_store, write_delay)
+    _documents[name] = store
+    return store
+
+
+def get_generations() -> Dict[str, int]:
+    """
+    Retourne la génération de chaque document ouvert par open_store().
+
+    Chaque document est revalidé : une génération qui change indique un
+    contenu modifié (par ce processus ou un autre). Permet de savoir quels
+    documents recharger quand typo.db change.
+
+    Returns:
+        Dict {nom du document: génération}.
+    """
+    generations = {}
+    for name, store in list(_documents.items()):
+        store.read()
+        generations[name] = store.generation
+    return generations
+
+
+def flush_all() -> None:
+    """Écrit les écritures différées de tous les stores (à appeler avant de quitter)."""
+    for store in list(_stores):
+        store.flush()
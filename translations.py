@@ -1,350 +1,84 @@
-"""Traductions des prompts et strings UI en plusieurs langues."""
+"""Traductions des prompts et strings UI en plusieurs langues.
 
-from typing import Dict, Optional
+Chaque langue est un fichier locales/<code>.json ({"name", "prompts", "ui"}),
+chargé à la première utilisation de la langue puis gardé en cache. Ajouter
+une langue revient à ajouter un fichier, sans coût au démarrage.
+"""
 
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
-# Prompts traduits par langue
-TRANSLATIONS = {
-    "fr": {
-        "prompts": {
-            "correct": """Corrige uniquement les fautes d'orthographe et de grammaire dans ce texte.
-Ne change pas le style ni la formulation. Retourne uniquement le texte corrigé, sans explication.
+from prompt_template import PromptTemplate, compile_template
 
-Texte : {text}""",
 
-            "format": """Corrige les fautes d'orthographe et de grammaire, et améliore la ponctuation et la mise en forme de ce texte.
+# Langue de repli si une langue ou une clé est absente
+FALLBACK_LANGUAGE = "fr"
 
-IMPORTANT : Ajoute avec parcimonie (2-3 maximum) des emojis qui correspondent au contexte du message. Les emojis doivent enrichir le message sans le surcharger.
-
-📏 RÈGLES :
-- Garde le même sens et le même ton
-- Ajoute des emojis pertinents et modérés (pas plus de 2-3)
-- Place les emojis naturellement dans le texte
-- Ne change pas le style du message
-- Retourne uniquement le texte corrigé, sans explication
+# Noms affichés des langues connues (ordre d'affichage), sans lire leurs fichiers
+LANGUAGE_NAMES = {
+    "fr": "Français",
+    "en": "English",
+    "es": "Español",
+    "de": "Deutsch"
+}
 
-Texte : {text}""",
+# Données chargées, par code langue (None si le fichier est absent ou invalide)
+_languages: Dict[str, Optional[Dict[str, Any]]] = {}
 
-            "reformulate": """Reformule ce texte pour le rendre plus clair et fluide, tout en gardant exactement le même sens.
-Corrige également les éventuelles fautes. Retourne uniquement le texte reformulé, sans explication.
+# Codes des langues disponibles (scan unique du répertoire locales)
+_available_codes: Optional[List[str]] = None
 
-Texte : {text}""",
 
-            "translate": """Traduis ce texte en anglais.
-Garde le même ton et le même style. Retourne uniquement la traduction, sans explication.
+def get_locales_dir() -> Path:
+    """Retourne le répertoire des fichiers de langue (embarqué dans l'exe si PyInstaller)."""
+    if getattr(sys, 'frozen', False):
+        return Path(getattr(sys, '_MEIPASS', Path(sys.executable).parent)) / 'locales'
+    return Path(__file__).parent / 'locales'
 
-Texte : {text}""",
 
-            "professional": """Tu es un assistant de rédaction professionnelle pour des User Stories, bugs ou messages clients.
+def _get_available_codes() -> List[str]:
+    """Retourne les codes des langues disponibles (langues connues d'abord)."""
+    global _available_codes
+    if _available_codes is None:
+        try:
+            found = {path.stem for path in get_locales_dir().glob("*.json")}
+        except OSError:
+            found = set()
+        known = [code for code in LANGUAGE_NAMES if code in found]
+        _available_codes = known + sorted(found - set(known))
+    return _available_codes
 
-Analyse le texte fourni et transforme-le en contenu structuré et professionnel.
 
-📋 RÈGLES DE FORMATAGE :
+def _load_language(language: str) -> Optional[Dict[str, Any]]:
+    """
+    Charge les données d'une langue (une seule lecture par langue).
 
-Pour une User Story :
-🎯 Titre : [titre clair et concis]
-📌 Objectif : [1 phrase]
-📝 Description :
-• [points structurés avec des sections claires]
+    Args:
+        language: Code langue.
 
-Pour un Bug :
-🐞 Titre : [titre clair]
-📝 Description : [description du problème]
-❌ Comportement observé : [ce qui se passe]
-✅ Comportement attendu : [ce qui devrait se passer]
-💡 Hypothèses techniques : [si pertinent]
+    Returns:
+        Données de la langue, ou None si indisponible.
+    """
+    if language in _languages:
+        return _languages[language]
 
-Pour un message client :
-Structure le message de manière professionnelle avec des sections claires si nécessaire.
+    data = None
+    if language in _get_available_codes():
+        try:
+            with open(get_locales_dir() / f"{language}.json", 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Erreur chargement langue {language}: {e}")
 
-📏 STYLE :
-- Ton professionnel, direct, sans fioritures
-- Pas d'introduction ("Voici...")
-- Pas de conclusion ("N'hésite pas...")
-- Utilise des emojis pour les catégories/sections
-- Réécris proprement même si le texte source est brut
-- Corrige toutes les fautes
-
-Retourne uniquement le contenu formaté, sans explication.
-
-Texte : {text}"""
-        },
-        "ui": {
-            "apply": "Appliquer",
-            "cancel": "Annuler",
-            "save": "Enregistrer",
-            "close": "Fermer",
-            "delete": "Supprimer",
-            "edit": "Modifier",
-            "new": "Nouveau",
-            "search": "Rechercher",
-            "help": "Aide",
-            "settings": "Paramètres",
-            "language": "Langue",
-            "theme": "Thème",
-            "hotkeys": "Raccourcis",
-            "snippets": "Snippets",
-            "prompts": "Prompts",
-            "version": "Version",
-            "quit": "Quitter"
-        }
-    },
-
-    "en": {
-        "prompts": {
-            "correct": """Correct only spelling and grammar errors in this text.
-Do not change the style or wording. Return only the corrected text, without explanation.
-
-Text: {text}""",
-
-            "format": """Correct spelling and grammar errors, and improve punctuation and formatting of this text.
-
-IMPORTANT: Add sparingly (2-3 maximum) emojis that match the message context. Emojis should enrich the message without overloading it.
-
-📏 RULES:
-- Keep the same meaning and tone
-- Add relevant and moderate emojis (no more than 2-3)
-- Place emojis naturally in the text
-- Do not change the message style
-- Return only the corrected text, without explanation
-
-Text: {text}""",
+    _languages[language] = data
+    return data
 
-            "reformulate": """Rephrase this text to make it clearer and more fluid, while keeping exactly the same meaning.
-Also correct any errors. Return only the rephrased text, without explanation.
-
-Text: {text}""",
-
-            "translate": """Translate this text into French.
-Keep the same tone and style. Return only the translation, without explanation.
-
-Text: {text}""",
-
-            "professional": """You are a professional writing assistant for User Stories, bugs, or client messages.
-
-Analyze the provided text and transform it into structured and professional content.
-
-📋 FORMATTING RULES:
-
-For a User Story:
-🎯 Title: [clear and concise title]
-📌 Objective: [1 sentence]
-📝 Description:
-• [structured points with clear sections]
-
-For a Bug:
-🐞 Title: [clear title]
-📝 Description: [problem description]
-❌ Observed behavior: [what happens]
-✅ Expected behavior: [what should happen]
-💡 Technical hypotheses: [if relevant]
-
-For a client message:
-Structure the message professionally with clear sections if necessary.
-
-📏 STYLE:
-- Professional tone, direct, no frills
-- No introduction ("Here is...")
-- No conclusion ("Feel free...")
-- Use emojis for categories/sections
-- Rewrite cleanly even if the source text is rough
-- Correct all errors
-
-Return only the formatted content, without explanation.
-
-Text: {text}"""
-        },
-        "ui": {
-            "apply": "Apply",
-            "cancel": "Cancel",
-            "save": "Save",
-            "close": "Close",
-            "delete": "Delete",
-            "edit": "Edit",
-            "new": "New",
-            "search": "Search",
-            "help": "Help",
-            "settings": "Settings",
-            "language": "Language",
-            "theme": "Theme",
-            "hotkeys": "Hotkeys",
-            "snippets": "Snippets",
-            "prompts": "Prompts",
-            "version": "Version",
-            "quit": "Quit"
-        }
-    },
-
-    "es": {
-        "prompts": {
-            "correct": """Corrige únicamente los errores de ortografía y gramática en este texto.
-No cambies el estilo ni la redacción. Devuelve solo el texto corregido, sin explicación.
-
-Texto: {text}""",
-
-            "format": """Corrige los errores de ortografía y gramática, y mejora la puntuación y el formato de este texto.
-
-IMPORTANTE: Añade con moderación (2-3 máximo) emojis que correspondan al contexto del mensaje. Los emojis deben enriquecer el mensaje sin sobrecargarlo.
-
-📏 REGLAS:
-- Mantén el mismo significado y tono
-- Añade emojis relevantes y moderados (no más de 2-3)
-- Coloca los emojis naturalmente en el texto
-- No cambies el estilo del mensaje
-- Devuelve solo el texto corregido, sin explicación
-
-Texto: {text}""",
 
-            "reformulate": """Reformula este texto para hacerlo más claro y fluido, manteniendo exactamente el mismo significado.
-Corrige también los posibles errores. Devuelve solo el texto reformulado, sin explicación.
-
-Texto: {text}""",
-
-            "translate": """Traduce este texto al inglés.
-Mantén el mismo tono y estilo. Devuelve solo la traducción, sin explicación.
-
-Texto: {text}""",
-
-            "professional": """Eres un asistente de redacción profesional para User Stories, bugs o mensajes de clientes.
-
-Analiza el texto proporcionado y transfórmalo en contenido estructurado y profesional.
-
-📋 REGLAS DE FORMATO:
-
-Para una User Story:
-🎯 Título: [título claro y conciso]
-📌 Objetivo: [1 frase]
-📝 Descripción:
-• [puntos estructurados con secciones claras]
-
-Para un Bug:
-🐞 Título: [título claro]
-📝 Descripción: [descripción del problema]
-❌ Comportamiento observado: [lo que sucede]
-✅ Comportamiento esperado: [lo que debería suceder]
-💡 Hipótesis técnicas: [si es relevante]
-
-Para un mensaje de cliente:
-Estructura el mensaje de manera profesional con secciones claras si es necesario.
-
-📏 ESTILO:
-- Tono profesional, directo, sin adornos
-- Sin introducción ("Aquí está...")
-- Sin conclusión ("No dudes...")
-- Usa emojis para categorías/secciones
-- Reescribe limpiamente aunque el texto original sea básico
-- Corrige todos los errores
-
-Devuelve solo el contenido formateado, sin explicación.
-
-Texto: {text}"""
-        },
-        "ui": {
-            "apply": "Aplicar",
-            "cancel": "Cancelar",
-            "save": "Guardar",
-            "close": "Cerrar",
-            "delete": "Eliminar",
-            "edit": "Editar",
-            "new": "Nuevo",
-            "search": "Buscar",
-            "help": "Ayuda",
-            "settings": "Configuración",
-            "language": "Idioma",
-            "theme": "Tema",
-            "hotkeys": "Atajos",
-            "snippets": "Fragmentos",
-            "prompts": "Prompts",
-            "version": "Versión",
-            "quit": "Salir"
-        }
-    },
-
-    "de": {
-        "prompts": {
-            "correct": """Korrigiere nur Rechtschreib- und Grammatikfehler in diesem Text.
-Ändere weder Stil noch Formulierung. Gib nur den korrigierten Text zurück, ohne Erklärung.
-
-Text: {text}""",
-
-            "format": """Korrigiere Rechtschreib- und Grammatikfehler und verbessere Zeichensetzung und Formatierung dieses Textes.
-
-WICHTIG: Füge sparsam (maximal 2-3) Emojis hinzu, die zum Kontext der Nachricht passen. Emojis sollten die Nachricht bereichern, ohne sie zu überladen.
-
-📏 REGELN:
-- Behalte dieselbe Bedeutung und denselben Ton bei
-- Füge relevante und moderate Emojis hinzu (nicht mehr als 2-3)
-- Platziere Emojis natürlich im Text
-- Ändere nicht den Stil der Nachricht
-- Gib nur den korrigierten Text zurück, ohne Erklärung
-
-Text: {text}""",
-
-            "reformulate": """Formuliere diesen Text um, um ihn klarer und flüssiger zu machen, während du genau dieselbe Bedeutung beibehältst.
-Korrigiere auch eventuelle Fehler. Gib nur den umformulierten Text zurück, ohne Erklärung.
-
-Text: {text}""",
-
-            "translate": """Übersetze diesen Text ins Englische.
-Behalte denselben Ton und Stil bei. Gib nur die Übersetzung zurück, ohne Erklärung.
-
-Text: {text}""",
-
-            "professional": """Du bist ein professioneller Schreibassistent für User Stories, Bugs oder Kundennachrichten.
-
-Analysiere den bereitgestellten Text und wandle ihn in strukturierten und professionellen Inhalt um.
-
-📋 FORMATIERUNGSREGELN:
-
-Für eine User Story:
-🎯 Titel: [klarer und prägnanter Titel]
-📌 Ziel: [1 Satz]
-📝 Beschreibung:
-• [strukturierte Punkte mit klaren Abschnitten]
-
-Für einen Bug:
-🐞 Titel: [klarer Titel]
-📝 Beschreibung: [Problembeschreibung]
-❌ Beobachtetes Verhalten: [was passiert]
-✅ Erwartetes Verhalten: [was passieren sollte]
-💡 Technische Hypothesen: [falls relevant]
-
-Für eine Kundennachricht:
-Strukturiere die Nachricht professionell mit klaren Abschnitten, falls erforderlich.
-
-📏 STIL:
-- Professioneller Ton, direkt, ohne Schnörkel
-- Keine Einleitung ("Hier ist...")
-- Kein Fazit ("Zögern Sie nicht...")
-- Verwende Emojis für Kategorien/Abschnitte
-- Schreibe sauber, auch wenn der Ausgangstext roh ist
-- Korrigiere alle Fehler
-
-Gib nur den formatierten Inhalt zurück, ohne Erklärung.
-
-Text: {text}"""
-        },
-        "ui": {
-            "apply": "Anwenden",
-            "cancel": "Abbrechen",
-            "save": "Speichern",
-            "close": "Schließen",
-            "delete": "Löschen",
-            "edit": "Bearbeiten",
-            "new": "Neu",
-            "search": "Suchen",
-            "help": "Hilfe",
-            "settings": "Einstellungen",
-            "language": "Sprache",
-            "theme": "Design",
-            "hotkeys": "Tastenkürzel",
-            "snippets": "Snippets",
-            "prompts": "Prompts",
-            "version": "Version",
-            "quit": "Beenden"
-        }
-    }
-}
+def _get_language_data(language: str) -> Dict[str, Any]:
+    """Retourne les données d'une langue, avec repli sur FALLBACK_LANGUAGE."""
+    return _load_language(language) or _load_language(FALLBACK_LANGUAGE) or {}
 
 
 def get_prompt(action: str, language: str = "fr") -> Optional[str]:
@@ -358,14 +92,47 @@ def get_prompt(action: str, language: str = "fr") -> Optional[str]:
     Returns:
         Template de prompt traduit, ou None si non trouvé.
     """
-    # Vérifier que la langue existe
-    if language not in TRANSLATIONS:
-        language = "fr"  # Fallback sur français
+    return _get_language_data(language).get("prompts", {}).get(action)
 
-    lang_data = TRANSLATIONS[language]
 
-    # Retourner le prompt si disponible
-    return lang_data.get("prompts", {}).get(action)
+# Templates compilés, par (langue, action)
+_compiled_prompts: Dict[Tuple[str, str], PromptTemplate] = {}
+
+
+def get_compiled_prompt(action: str, language: str = "fr") -> Optional[PromptTemplate]:
+    """
+    Récupère le prompt traduit sous forme compilée (compilé une seule fois).
+
+    Args:
+        action: Nom de l'action (ex: "correct").
+        language: Code langue (fr, en, es, de).
+
+    Returns:
+        Template compilé, ou None si non trouvé.
+    """
+    key = (language, action)
+    template = _compiled_prompts.get(key)
+    if template is None:
+        source = get_prompt(action, language)
+        if source is None:
+            return None
+        template = _compiled_prompts[key] = compile_template(source)
+    return template
+
+
+def get_language_name(language: str) -> str:
+    """
+    Retourne le nom affiché d'une langue.
+
+    Args:
+        language: Code langue.
+
+    Returns:
+        Nom de la langue (ex: "Français"), ou le code si inconnu.
+    """
+    if language in LANGUAGE_NAMES:
+        return LANGUAGE_NAMES[language]
+    return dict(get_supported_languages()).get(language, language)
 
 
 def get_ui_string(key: str, language: str = "fr") -> str:
@@ -379,23 +146,19 @@ def get_ui_string(key: str, language: str = "fr") -> str:
     Returns:
         Chaîne traduite, ou la clé si non trouvée.
     """
-    if language not in TRANSLATIONS:
-        language = "fr"
-
-    lang_data = TRANSLATIONS[language]
-    return lang_data.get("ui", {}).get(key, key)
+    return _get_language_data(language).get("ui", {}).get(key, key)
 
 
-def get_supported_languages() -> list[tuple[str, str]]:
+def get_supported_languages() -> List[Tuple[str, str]]:
     """
-    Retourne la liste des langues supportées.
+    Retourne la liste des langues disponibles.
+
+    Seules les langues absentes de LANGUAGE_NAMES sont chargées pour lire leur nom.
 
     Returns:
         Liste de tuples (code, nom_affiché).
     """
     return [
-        ("fr", "Français"),
-        ("en", "English"),
-        ("es", "Español"),
-        ("de", "Deutsch")
+        (code, LANGUAGE_NAMES.get(code) or (_load_language(code) or {}).get("name", code))
+        for code in _get_available_codes()
     ]
@@ -14,6 +14,13 @@ import hotkey_manager
 import snippet_manager
 import translations
 import usage_tracker
+from perf_monitor import hook_profiler
+
+# Slots snippets par sous-menu au-delà du slot 9
+SLOT_PAGE_SIZE = 10
+
+# Nombre de snippets fréquents listés dans le menu
+FREQUENT_SNIPPETS_COUNT = 5
 
 
 def create_icon_image(active: bool = True) -> Image.Image:
@@ -65,7 +72,8 @@ class TrayIcon:
         self,
         on_toggle: Callable[[bool], None],
         on_quit: Callable[[], None],
-        on_reload: Callable[[], None] = None
+        on_reload: Callable[[], None] = None,
+        on_language_change: Callable[[str], None] = None
     ):
         """
         Initialise l'icône tray.
@@ -74,11 +82,13 @@ class TrayIcon:
             on_toggle: Callback appelé quand l'utilisateur active/désactive.
             on_quit: Callback appelé quand l'utilisateur quitte.
             on_reload: Callback appelé quand l'utilisateur recharge la config.
+            on_language_change: Callback appelé avec le code de la nouvelle langue.
         """
         self.active = True
         self.on_toggle = on_toggle
         self.on_quit = on_quit
         self.on_reload = on_reload
+        self.on_language_change = on_language_change
         self.icon = None
         self.startup_enabled = is_startup_enabled()
         self.checking_update = False
@@ -92,28 +102,50 @@ class TrayIcon:
 
         # Construire sous-menu Raccourcis (dynamique)
         shortcut_items = []
-        main_actions = ['correct', 'format', 'reformulate', 'professional', 'translate', 'help']
-        for action in main_actions:
-            if action in all_hotkeys:
-                display = hotkey_manager.format_hotkey_display(all_hotkeys[action])
-                label = hotkey_manager.get_action_label(action)
-                shortcut_items.append(
-                    pystray.MenuItem(f"{display} : {label}", None, enabled=False)
-                )
+        for action in hotkey_manager.get_main_actions():
+            display = hotkey_manager.format_hotkey_display(all_hotkeys[action])
+            label = hotkey_manager.get_action_label(action)
+            shortcut_items.append(
+                pystray.MenuItem(f"{display} : {label}", None, enabled=False)
+            )
 
-        # Construire sous-menu Snippets
+        # Construire sous-menu Snippets : slots 1-9, puis une page par dizaine de slots
         snippet_items = []
-        for slot in range(1, 10):
-            if slot in snippets_by_hotkey:
-                snippet = snippets_by_hotkey[slot]
-                label = snippet.get('label', f'Snippet {slot}')
-                shortcut_items_text = f"Ctrl+Shift+{slot}"
-                snippet_items.append(
-                    pystray.MenuItem(
-                        f"{slot}. {label} ({shortcut_items_text})",
-                        lambda _, s=snippet: self._paste_snippet(s)
-                    )
+        pages = {}
+        for slot in sorted(snippets_by_hotkey):
+            snippet = snippets_by_hotkey[slot]
+            label = snippet.get('label', f'Snippet {slot}')
+            shortcut_items_text = hotkey_manager.format_snippet_slot(slot)
+            item = pystray.MenuItem(
+                f"{slot}. {label} ({shortcut_items_text})",
+                lambda _, s=snippet: self._paste_snippet(s)
+            )
+            if slot <= 9:
+                snippet_items.append(item)
+            else:
+                pages.setdefault(slot // SLOT_PAGE_SIZE, []).append(item)
+        for page, items in pages.items():
+            first = page * SLOT_PAGE_SIZE
+            snippet_items.append(
+                pystray.MenuItem(f"Slots {first}-{first + SLOT_PAGE_SIZE - 1}", pystray.Menu(*items))
+            )
+
+        # Snippets les plus utilisés (hors slots, déjà listés)
+        frequent_items = []
+        for snippet in snippet_manager.get_frequent_snippets(FREQUENT_SNIPPETS_COUNT + len(snippets_by_hotkey)):
+            if snippet.get('hotkey_slot') in snippets_by_hotkey or len(frequent_items) >= FREQUENT_SNIPPETS_COUNT:
+                continue
+            frequent_items.append(
+                pystray.MenuItem(
+                    snippet.get('label', 'Sans nom'),
+                    lambda _, s=snippet: self._paste_snippet(s)
                 )
+            )
+        if frequent_items:
+            if snippet_items:
+                snippet_items.append(pystray.Menu.SEPARATOR)
+            snippet_items.append(pystray.MenuItem("Fréquents", None, enabled=False))
+            snippet_items.extend(frequent_items)
 
         if snippet_items:
             snippet_items.append(pystray.Menu.SEPARATOR)
@@ -131,7 +163,7 @@ class TrayIcon:
                 pystray.MenuItem(
                     lambda item, name=lang_name: f"● {name}" if is_current else f"  {name}",
                     lambda _, code=lang_code: self._change_language(code),
-                    checked=lambda item, code=lang_code: code == settings_manager.get("language", "fr")
+                    checked=lambda item, code=lang_code: code == settings_manager.get_language()
                 )
             )
 
@@ -165,6 +197,15 @@ class TrayIcon:
                     pystray.MenuItem(
                         lambda item: "✓ Démarrer avec Windows" if self.startup_enabled else "  Démarrer avec Windows",
                         self._toggle_startup
+                    ),
+                    pystray.Menu.SEPARATOR,
+                    pystray.MenuItem(
+                        "Debug",
+                        pystray.Menu(
+                            pystray.MenuItem("Statistiques du hook clavier", self._show_hook_stats),
+                            pystray.MenuItem("Exporter les statistiques", self._dump_hook_stats),
+                            pystray.MenuItem("Réinitialiser les statistiques", self._reset_hook_stats)
+                        )
                     )
                 )
             ),
@@ -190,6 +231,8 @@ class TrayIcon:
     def _change_language(self, language: str) -> None:
         """Change la langue de l'application."""
         settings_manager.set("language", language)
+        if self.on_language_change:
+            self.on_language_change(language)
         lang_name = dict(translations.get_supported_languages()).get(language, language)
         self.notify("Typo", f"Langue changée : {lang_name}")
 
@@ -198,29 +241,43 @@ class TrayIcon:
         if self.on_reload:
             try:
                 self.on_reload()
+                self.refresh_menu()
                 self.notify("Typo", "Configuration rechargée avec succès")
             except Exception as e:
                 self.notify("Typo - Erreur", f"Échec du rechargement : {str(e)}")
 
+    def _show_hook_stats(self, icon: pystray.Icon = None, item: pystray.MenuItem = None) -> None:
+        """Affiche les statistiques de latence du hook clavier."""
+        self.notify("Typo - Hook clavier", hook_profiler.format_summary())
+
+    def _dump_hook_stats(self, icon: pystray.Icon = None, item: pystray.MenuItem = None) -> None:
+        """Exporte les statistiques du hook clavier dans un fichier JSON."""
+        try:
+            path = hook_profiler.dump()
+            self.notify("Typo", f"Statistiques exportées : {path}")
+        except OSError as e:
+            self.notify("Typo - Erreur", f"Échec de l'export : {str(e)}")
+
+    def _reset_hook_stats(self, icon: pystray.Icon = None, item: pystray.MenuItem = None) -> None:
+        """Réinitialise les statistiques du hook clavier."""
+        hook_profiler.reset()
+        self.notify("Typo", "Statistiques du hook clavier réinitialisées")
+
     def _paste_snippet(self, snippet: dict) -> None:
         """Colle un snippet depuis le menu."""
         from clipboard import paste_text
-        content = snippet.get('content', '')
+        content = snippet_manager.get_content(snippet)
         if content:
             paste_text(content)
+            snippet_manager.record_use(snippet.get('id', ''))
+            self.refresh_menu()
 
     def _open_snippet_search(self, icon: pystray.Icon = None, item: pystray.MenuItem = None) -> None:
         """Ouvre la fenêtre de recherche de snippets."""
         try:
             from ui_snippets import SnippetSearchWindow
-            from clipboard import paste_text
-
-            def on_select(snippet):
-                content = snippet.get('content', '')
-                if content:
-                    paste_text(content)
 
-            window = SnippetSearchWindow(on_select=on_select)
+            window = SnippetSearchWindow(on_select=self._paste_snippet)
             window.show()
         except ImportError:
             self.notify("Typo", "Fonctionnalité pas encore disponible")
@@ -319,6 +376,12 @@ class TrayIcon:
         )
         self.icon.run()
 
+    def refresh_menu(self) -> None:
+        """Reconstruit le menu (raccourcis, snippets) après un changement de configuration."""
+        if self.icon:
+            self.icon.menu = self._create_menu()
+            self.icon.update_menu()
+
     def stop(self) -> None:
         """Arrête l'icône tray."""
         if self.icon:
@@ -3,6 +3,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import hotkey_manager
+import prompt_manager
 import theme_manager
 
 
@@ -133,6 +134,12 @@ class HotkeysManagerWindow:
             display = hotkey_manager.format_hotkey_display(hotkey_config)
             self.tree.insert('', 'end', values=(label, display, 'Modifier'), tags=(action,))
 
+        # Prompts custom sans raccourci (assignables)
+        for action in prompt_manager.get_custom_prompts():
+            if action not in self.hotkeys:
+                label = hotkey_manager.get_action_label(action)
+                self.tree.insert('', 'end', values=(label, "(aucun)", 'Modifier'), tags=(action,))
+
         self._check_conflicts()
 
     def _check_conflicts(self):
@@ -168,7 +175,7 @@ class HotkeysManagerWindow:
 
         item = self.tree.item(selection[0])
         action = item['tags'][0]
-        current_hotkey = self.hotkeys[action]
+        current_hotkey = self.hotkeys.get(action, {})
 
         def on_hotkey_save(new_hotkey):
             self.hotkeys[action] = new_hotkey
@@ -198,11 +205,10 @@ class HotkeysManagerWindow:
             ):
                 return
 
-        # Sauvegarder
-        import settings_manager
-        settings_manager.set("hotkeys", self.hotkeys)
+        # Sauvegarder (une seule écriture de config.json)
+        hotkey_manager.save_hotkeys(self.hotkeys)
 
-        messagebox.showinfo("Succès", "Raccourcis sauvegardés.\n\nUtilisez 'Recharger la config' dans le menu tray pour appliquer immédiatement.")
+        messagebox.showinfo("Succès", "Raccourcis sauvegardés et appliqués.")
         self.root.destroy()
 
     def _cancel(self):
@@ -1,10 +1,15 @@
 """Fenêtre de gestion des prompts personnalisés."""
 
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 from typing import Optional
 import prompt_manager
+import prompt_profiler
+import settings_manager
 import theme_manager
+import translations
+from prompt_template import validate_template
 from config import PROMPTS as DEFAULT_PROMPTS
 
 
@@ -15,6 +20,8 @@ class PromptsManagerWindow:
         """Initialise la fenêtre."""
         self.colors = theme_manager.get_current_theme()
         self.current_selection = None
+        self.language = settings_manager.get("language", "fr")
+        self._profile_job = None
 
         self.root = tk.Tk()
         self.root.title("Gestion des prompts")
@@ -131,10 +138,20 @@ class PromptsManagerWindow:
 
         form_frame.columnconfigure(1, weight=1)
 
+        # Les overrides des prompts par défaut sont propres à la langue active
+        tk.Label(
+            right_panel,
+            text=f"Langue : {translations.get_language_name(self.language)} "
+                 f"(les overrides sont enregistrés pour cette langue)",
+            bg=self.colors["bg"],
+            fg=self.colors["fg_secondary"],
+            font=('Segoe UI', 8)
+        ).pack(anchor='w', pady=(0, 5))
+
         # Prompt
         tk.Label(
             right_panel,
-            text="Prompt (doit contenir {text}) :",
+            text="Prompt (doit contenir {text} ; optionnels : {language}, {date}) :",
             bg=self.colors["bg"],
             fg=self.colors["fg"]
         ).pack(anchor='w')
@@ -155,6 +172,33 @@ class PromptsManagerWindow:
         text_scrollbar = ttk.Scrollbar(text_frame, command=self.prompt_text.yview)
         text_scrollbar.pack(side='right', fill='y')
         self.prompt_text.config(yscrollcommand=text_scrollbar.set)
+        self.prompt_text.bind('<KeyRelease>', self._schedule_profile)
+
+        # Coût du texte fixe du prompt (payé à chaque appel)
+        cost_frame = tk.Frame(right_panel, bg=self.colors["bg"])
+        cost_frame.pack(fill='x', pady=(0, 10))
+
+        self.cost_label = tk.Label(
+            cost_frame,
+            text="",
+            bg=self.colors["bg"],
+            fg=self.colors["fg_secondary"],
+            font=('Segoe UI', 8),
+            justify='left',
+            anchor='w'
+        )
+        self.cost_label.pack(side='left', fill='x', expand=True)
+
+        tk.Button(
+            cost_frame,
+            text="Tokens exacts",
+            command=self._update_profile_exact,
+            bg=self.colors["button_bg"],
+            fg=self.colors["button_fg"],
+            relief='flat',
+            padx=10,
+            pady=2
+        ).pack(side='right')
 
         # Boutons
         btn_frame = tk.Frame(right_panel, bg=self.colors["bg"])
@@ -219,7 +263,7 @@ class PromptsManagerWindow:
 
         for action in DEFAULT_PROMPTS.keys():
             label = prompt_manager.get_action_label(action)
-            has_override = prompt_manager.has_override(action)
+            has_override = prompt_manager.has_override(action, self.language)
             prefix = "✓ " if has_override else "  "
             self.prompts_listbox.insert(tk.END, f"{prefix}{label}")
 
@@ -276,16 +320,17 @@ class PromptsManagerWindow:
         self.label_entry.insert(0, prompt_manager.get_action_label(action))
         self.label_entry.config(state='readonly')
 
-        # Charger le prompt (override ou default)
-        prompt = prompt_manager.get_prompt(action)
+        # Charger le prompt (override ou default traduit)
+        prompt = prompt_manager.get_prompt(action, self.language)
         self.prompt_text.delete('1.0', tk.END)
         self.prompt_text.insert('1.0', prompt or "")
 
         # Activer reset si override
-        has_override = prompt_manager.has_override(action)
+        has_override = prompt_manager.has_override(action, self.language)
         self.reset_btn.config(state='normal' if has_override else 'disabled')
         self.delete_btn.config(state='disabled')
         self.save_btn.config(state='normal')
+        self._update_profile()
 
     def _load_custom_prompt(self, action_id: str, data: dict):
         """Charge un prompt custom."""
@@ -302,6 +347,52 @@ class PromptsManagerWindow:
         self.reset_btn.config(state='disabled')
         self.delete_btn.config(state='normal')
         self.save_btn.config(state='normal')
+        self._update_profile()
+
+    def _schedule_profile(self, event=None):
+        """Recalcule le coût du prompt après une pause de frappe."""
+        if self._profile_job is not None:
+            self.root.after_cancel(self._profile_job)
+        self._profile_job = self.root.after(300, self._update_profile)
+
+    def _update_profile(self):
+        """Affiche l'estimation locale du coût du prompt en cours d'édition."""
+        self._profile_job = None
+        prompt = self.prompt_text.get('1.0', 'end-1c').strip()
+        if not prompt or not self.current_selection:
+            self.cost_label.config(text="")
+            return
+
+        profile = prompt_profiler.profile_source(prompt, self.current_selection[1], self.language)
+        self.cost_label.config(
+            text=profile.format_summary(),
+            fg="#FF5555" if profile.dominates else self.colors["fg_secondary"]
+        )
+
+    def _update_profile_exact(self):
+        """Compte exactement les tokens du prompt via l'API (hors thread UI)."""
+        prompt = self.prompt_text.get('1.0', 'end-1c').strip()
+        if not prompt or not self.current_selection:
+            return
+
+        action = self.current_selection[1]
+        self.cost_label.config(text="Comptage en cours...")
+
+        def count():
+            profile = prompt_profiler.profile_source(prompt, action, self.language, exact=True)
+            self.root.after(0, lambda: self._show_exact_profile(profile))
+
+        threading.Thread(target=count, daemon=True).start()
+
+    def _show_exact_profile(self, profile):
+        """Affiche le résultat du comptage exact."""
+        text = profile.format_summary()
+        if not profile.exact:
+            text += "\n(API indisponible : estimation locale)"
+        self.cost_label.config(
+            text=text,
+            fg="#FF5555" if profile.dominates else self.colors["fg_secondary"]
+        )
 
     def _save(self):
         """Sauvegarde le prompt actuel."""
@@ -316,14 +407,16 @@ class PromptsManagerWindow:
             messagebox.showerror("Erreur", "Le prompt ne peut pas être vide")
             return
 
-        if "{text}" not in prompt:
-            messagebox.showerror("Erreur", "Le prompt doit contenir le placeholder {text}")
+        is_valid, error = validate_template(prompt)
+        if not is_valid:
+            messagebox.showerror("Erreur", error)
             return
 
         if prompt_type == 'default':
             # Override d'un prompt par défaut
-            prompt_manager.save_override(action_id, prompt)
-            messagebox.showinfo("Succès", "Prompt par défaut overridé")
+            prompt_manager.save_override(action_id, prompt, self.language)
+            language_name = translations.get_language_name(self.language)
+            messagebox.showinfo("Succès", f"Prompt par défaut overridé ({language_name})")
         else:
             # Custom prompt
             if not label:
@@ -345,7 +438,7 @@ class PromptsManagerWindow:
             return
 
         if messagebox.askyesno("Confirmer", "Réinitialiser ce prompt aux valeurs par défaut ?"):
-            prompt_manager.reset_to_default(action_id)
+            prompt_manager.reset_to_default(action_id, self.language)
             self._load_prompts()
             self._load_default_prompt(action_id)
 
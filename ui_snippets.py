@@ -1,14 +1,154 @@
 """Fenêtres de gestion et recherche de snippets."""
 
+import queue
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
-from typing import Callable, Optional
+import tkinter.font as tkfont
+from tkinter import ttk, messagebox, filedialog
+from typing import Callable, Optional, Sequence
+import hotkey_manager
+import snippet_io
 import snippet_manager
 import theme_manager
+from snippet_expander import normalize_abbreviation, validate_abbreviation
+from snippet_search import normalize
+
+# Nombre maximal de résultats de la recherche rapide
+SEARCH_RESULTS_LIMIT = 1000
+
+# Délai sans frappe avant de lancer la recherche (en ms)
+SEARCH_DELAY_MS = 120
+
+# Intervalle de relève des résultats pendant une recherche (en ms)
+SEARCH_POLL_MS = 15
+
+
+class VirtualList(tk.Frame):
+    """
+    Liste dont seules les lignes visibles existent dans le widget.
+
+    La Listbox ne contient que les quelques lignes affichées ; le
+    défilement et la sélection portent sur des index absolus dans les
+    éléments, et la barre de défilement représente la liste complète.
+    """
+
+    def __init__(self, parent: tk.Widget, colors: dict, format_item: Callable[[object], str], **listbox_options):
+        """
+        Args:
+            parent: Widget parent.
+            colors: Couleurs du thème.
+            format_item: Texte affiché pour un élément.
+            **listbox_options: Options de la Listbox interne.
+        """
+        super().__init__(parent, bg=colors["bg"])
+        self.format_item = format_item
+        self.items: Sequence = ()
+        self.top = 0
+        self.selected = -1
+        self.rows = 1
+
+        self.scrollbar = ttk.Scrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.listbox = tk.Listbox(
+            self,
+            bg=colors["bg"],
+            fg=colors["fg"],
+            selectbackground=colors["accent"],
+            selectforeground=colors["bg"],
+            activestyle='none',
+            exportselection=False,
+            **listbox_options
+        )
+        self.listbox.pack(side='left', fill='both', expand=True)
+        self._line_height = max(1, tkfont.Font(font=self.listbox.cget('font')).metrics('linespace') + 1)
+
+        self.listbox.bind('<Configure>', self._on_configure)
+        self.listbox.bind('<Button-1>', self._on_click)
+        self.listbox.bind('<MouseWheel>', lambda e: self.scroll(-e.delta // 120 * 3))
+        self.listbox.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.listbox.bind('<Button-5>', lambda e: self.scroll(3))
+
+    def set_items(self, items: Sequence) -> None:
+        """Remplace les éléments (sélection sur le premier)."""
+        self.items = items
+        self.top = 0
+        self.selected = 0 if items else -1
+        self._render()
+
+    def get_selected(self) -> Optional[object]:
+        """Retourne l'élément sélectionné ou None."""
+        if 0 <= self.selected < len(self.items):
+            return self.items[self.selected]
+        return None
+
+    def move_selection(self, delta: int) -> None:
+        """Déplace la sélection (flèches, pages) et fait défiler pour la garder visible."""
+        if not self.items:
+            return
+        self.selected = max(0, min(len(self.items) - 1, self.selected + delta))
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + self.rows:
+            self.top = self.selected - self.rows + 1
+        self._render()
+
+    def scroll(self, delta: int) -> None:
+        """Fait défiler de delta lignes."""
+        self._scroll_to(self.top + delta)
+
+    def _scroll_to(self, top: int) -> None:
+        top = max(0, min(top, len(self.items) - self.rows))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _on_scrollbar(self, *args) -> None:
+        if args[0] == 'moveto':
+            self._scroll_to(round(float(args[1]) * len(self.items)))
+        elif args[0] == 'scroll':
+            step = self.rows if args[2] == 'pages' else 1
+            self.scroll(int(args[1]) * step)
+
+    def _on_configure(self, event: tk.Event) -> None:
+        rows = max(1, event.height // self._line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self._scroll_to(self.top)
+            self._render()
+
+    def _on_click(self, event: tk.Event) -> str:
+        row = self.listbox.nearest(event.y)
+        if 0 <= self.top + row < len(self.items):
+            self.selected = self.top + row
+            self._render()
+        return 'break'
+
+    def _render(self) -> None:
+        """Affiche les lignes visibles et met à jour la barre de défilement."""
+        visible = self.items[self.top:self.top + self.rows]
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(tk.END, *(self.format_item(item) for item in visible))
+        if self.top <= self.selected < self.top + len(visible):
+            self.listbox.select_set(self.selected - self.top)
+
+        total = len(self.items)
+        if total > self.rows:
+            self.scrollbar.set(self.top / total, (self.top + len(visible)) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
 
 
 class SnippetSearchWindow:
-    """Fenêtre de recherche rapide de snippets."""
+    """
+    Fenêtre de recherche rapide de snippets.
+
+    La recherche est lancée après SEARCH_DELAY_MS sans frappe, dans un
+    thread qui dépose son résultat dans une file, relevée par le thread UI
+    (Tk n'est appelé que depuis celui-ci) ; un résultat arrivé après une
+    requête plus récente est ignoré.
+    Une requête qui prolonge la précédente est affinée à partir de son
+    résultat.
+    """
 
     def __init__(self, on_select: Callable[[dict], None]):
         """
@@ -19,7 +159,11 @@ class SnippetSearchWindow:
         """
         self.on_select = on_select
         self.colors = theme_manager.get_current_theme()
-        self.filtered_snippets = []
+        self.result: Optional[snippet_manager.SearchResult] = None
+        self._search_job = None
+        self._search_seq = 0
+        self._results: "queue.Queue[tuple]" = queue.Queue()  # (seq, résultat) déposés par les threads
+        self._searching = 0  # Recherches lancées dont le résultat n'est pas encore relevé
 
         self.root = tk.Tk()
         self.root.title("Rechercher un snippet")
@@ -35,7 +179,7 @@ class SnippetSearchWindow:
 
         self._create_widgets()
         self._bind_keys()
-        self._update_results("")
+        self._show_results(self._search_seq, snippet_manager.search("", SEARCH_RESULTS_LIMIT))
 
     def _create_widgets(self):
         """Crée les widgets."""
@@ -54,7 +198,7 @@ class SnippetSearchWindow:
         ).pack(side='left', padx=(0, 5))
 
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', lambda *args: self._update_results(self.search_var.get()))
+        self.search_var.trace('w', lambda *args: self._schedule_search())
 
         self.search_entry = tk.Entry(
             search_frame,
@@ -67,24 +211,14 @@ class SnippetSearchWindow:
         self.search_entry.pack(side='left', fill='x', expand=True)
         self.search_entry.focus_set()
 
-        # Liste de résultats
-        list_frame = tk.Frame(main_frame, bg=self.colors["bg"])
-        list_frame.pack(fill='both', expand=True)
-
-        scrollbar = ttk.Scrollbar(list_frame)
-        scrollbar.pack(side='right', fill='y')
-
-        self.listbox = tk.Listbox(
-            list_frame,
-            bg=self.colors["bg"],
-            fg=self.colors["fg"],
-            selectbackground=self.colors["accent"],
-            selectforeground=self.colors["bg"],
-            font=('Segoe UI', 10),
-            yscrollcommand=scrollbar.set
+        # Liste de résultats (seules les lignes visibles sont rendues)
+        self.results_list = VirtualList(
+            main_frame,
+            self.colors,
+            lambda snippet: snippet.get('label') or 'Sans nom',
+            font=('Segoe UI', 10)
         )
-        self.listbox.pack(side='left', fill='both', expand=True)
-        scrollbar.config(command=self.listbox.yview)
+        self.results_list.pack(fill='both', expand=True)
 
         # Info
         tk.Label(
@@ -99,27 +233,86 @@ class SnippetSearchWindow:
         """Configure les raccourcis."""
         self.root.bind('<Return>', lambda e: self._select())
         self.root.bind('<Escape>', lambda e: self.root.destroy())
-        self.listbox.bind('<Double-Button-1>', lambda e: self._select())
-
-    def _update_results(self, query: str):
-        """Met à jour la liste de résultats."""
-        self.listbox.delete(0, tk.END)
-        self.filtered_snippets = snippet_manager.search_snippets(query)
-
-        for snippet in self.filtered_snippets:
-            label = snippet.get('label', 'Sans nom')
-            self.listbox.insert(tk.END, label)
+        self.root.bind('<Up>', lambda e: self.results_list.move_selection(-1))
+        self.root.bind('<Down>', lambda e: self.results_list.move_selection(1))
+        self.root.bind('<Prior>', lambda e: self.results_list.move_selection(-self.results_list.rows))
+        self.root.bind('<Next>', lambda e: self.results_list.move_selection(self.results_list.rows))
+        self.results_list.listbox.bind('<Double-Button-1>', lambda e: self._select())
+
+    def _schedule_search(self):
+        """Relance le délai de recherche à chaque frappe."""
+        if self._search_job:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DELAY_MS, self._start_search)
+
+    def _start_search(self):
+        """Lance la recherche de la requête courante hors du thread UI."""
+        self._search_job = None
+        self._search_seq += 1
+        seq = self._search_seq
+        query = self.search_var.get()
+        previous = self.result
+
+        def search():
+            # Toujours déposer un résultat (ou l'erreur) : le thread UI décompte les recherches
+            try:
+                result = snippet_manager.search(query, SEARCH_RESULTS_LIMIT, previous)
+            except Exception as e:
+                result = e
+            self._results.put((seq, result))
+
+        threading.Thread(target=search, daemon=True).start()
+        self._searching += 1
+        if self._searching == 1:
+            self.root.after(SEARCH_POLL_MS, self._poll_results)
+
+    def _poll_results(self):
+        """Affiche les résultats déposés par les threads de recherche (thread UI)."""
+        while True:
+            try:
+                seq, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._searching -= 1
+            if isinstance(result, Exception):
+                self._show_search_error(seq, result)
+            else:
+                self._show_results(seq, result)
+        if self._searching:
+            self.root.after(SEARCH_POLL_MS, self._poll_results)
+
+    def _show_results(self, seq: int, result: snippet_manager.SearchResult):
+        """Affiche un résultat, sauf s'il a été dépassé par une requête plus récente."""
+        if seq != self._search_seq:
+            return
+        self.result = result
+        self.results_list.set_items(result.snippets)
 
-        if self.filtered_snippets:
-            self.listbox.select_set(0)
+    def _show_search_error(self, seq: int, error: Exception):
+        """Vide la liste après l'échec d'une recherche (contenu illisible...)."""
+        if seq != self._search_seq:
+            return
+        print(f"Erreur recherche : {error}")
+        self.result = None
+        self.results_list.set_items([])
 
     def _select(self):
         """Sélectionne le snippet actuel."""
-        selection = self.listbox.curselection()
-        if selection and self.filtered_snippets:
-            snippet = self.filtered_snippets[selection[0]]
+        # Frappe pas encore cherchée : rechercher tout de suite
+        if self._search_job or self.result is None or self.result.query != normalize(self.search_var.get()):
+            if self._search_job:
+                self.root.after_cancel(self._search_job)
+                self._search_job = None
+            self._search_seq += 1
+            self._show_results(
+                self._search_seq,
+                snippet_manager.search(self.search_var.get(), SEARCH_RESULTS_LIMIT, self.result)
+            )
+
+        snippet = self.results_list.get_selected()
+        if snippet is not None:
             self.root.destroy()
-            self.on_select(snippet)
+            self.on_select(snippet_manager.with_content(snippet))
 
     def show(self):
         """Affiche la fenêtre."""
@@ -211,6 +404,28 @@ class SnippetsManagerWindow:
             pady=5
         ).pack(side='left', padx=(5, 0))
 
+        tk.Button(
+            btn_frame,
+            text="Exporter...",
+            command=self._export_snippets,
+            bg=self.colors["button_bg"],
+            fg=self.colors["button_fg"],
+            relief='flat',
+            padx=15,
+            pady=5
+        ).pack(side='left', padx=(15, 0))
+
+        tk.Button(
+            btn_frame,
+            text="Importer...",
+            command=self._import_snippets,
+            bg=self.colors["button_bg"],
+            fg=self.colors["button_fg"],
+            relief='flat',
+            padx=15,
+            pady=5
+        ).pack(side='left', padx=(5, 0))
+
         tk.Button(
             btn_frame,
             text="Fermer",
@@ -232,7 +447,9 @@ class SnippetsManagerWindow:
         for snippet in self.snippets:
             label = snippet.get('label', 'Sans nom')
             slot = snippet.get('hotkey_slot')
-            hotkey = f"Ctrl+Shift+{slot}" if slot else "(aucun)"
+            hotkey = hotkey_manager.format_snippet_slot(slot) if slot else "(aucun)"
+            if snippet.get('abbreviation'):
+                hotkey = f"{hotkey}  {snippet['abbreviation']}" if slot else snippet['abbreviation']
 
             self.tree.insert('', 'end', values=(label, hotkey, ''), tags=(snippet['id'],))
 
@@ -270,6 +487,57 @@ class SnippetsManagerWindow:
             snippet_manager.delete_snippet(snippet_id)
             self._load_snippets()
 
+    def _import_snippets(self):
+        """Importe un fichier de snippets (JSON Lines ou CSV)."""
+        path = filedialog.askopenfilename(
+            parent=self.root,
+            title="Importer des snippets",
+            filetypes=[("Snippets", "*.jsonl *.ndjson *.csv"), ("Tous les fichiers", "*.*")]
+        )
+        if not path:
+            return
+
+        replace = messagebox.askyesnocancel(
+            "Importer",
+            "Remplacer les snippets déjà présents (même ID) ?\n\n"
+            "Oui : remplacer    Non : conserver les existants",
+            parent=self.root
+        )
+        if replace is None:
+            return
+
+        try:
+            report = snippet_io.import_snippets(path, on_conflict="replace" if replace else "skip")
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Importer", f"Import impossible : {e}", parent=self.root)
+            return
+
+        message = (f"{report.added} ajouté(s), {report.updated} remplacé(s), "
+                   f"{report.skipped} ignoré(s).")
+        if report.errors:
+            lines = "\n".join(f"Ligne {line} : {error}" for line, error in report.errors[:10])
+            message += f"\n\n{len(report.errors)} enregistrement(s) rejeté(s) :\n{lines}"
+        messagebox.showinfo("Importer", message, parent=self.root)
+        self._load_snippets()
+
+    def _export_snippets(self):
+        """Exporte tous les snippets (JSON Lines ou CSV selon l'extension)."""
+        path = filedialog.asksaveasfilename(
+            parent=self.root,
+            title="Exporter les snippets",
+            defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv")]
+        )
+        if not path:
+            return
+
+        try:
+            count = snippet_io.export_snippets(path)
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Exporter", f"Export impossible : {e}", parent=self.root)
+            return
+        messagebox.showinfo("Exporter", f"{count} snippet(s) exporté(s).", parent=self.root)
+
     def show(self):
         """Affiche la fenêtre."""
         self.root.mainloop()
@@ -373,21 +641,45 @@ class SnippetEditDialog:
         ).pack(side='left', padx=(0, 5))
 
         self.slot_var = tk.StringVar(value="Aucun")
-        slot_values = ["Aucun"] + [f"Ctrl+Shift+{i} (slot {i})" for i in range(1, 10)]
+        slot_values = ["Aucun"] + [
+            f"{hotkey_manager.format_snippet_slot(i)} (slot {i})"
+            for i in range(1, snippet_manager.MAX_HOTKEY_SLOT + 1)
+        ]
 
         if self.snippet and self.snippet.get('hotkey_slot'):
             slot = self.snippet['hotkey_slot']
-            self.slot_var.set(f"Ctrl+Shift+{slot} (slot {slot})")
+            self.slot_var.set(slot_values[slot] if slot < len(slot_values) else "Aucun")
 
         slot_menu = ttk.Combobox(
             hotkey_frame,
             textvariable=self.slot_var,
             values=slot_values,
             state='readonly',
-            width=25
+            width=28
         )
         slot_menu.pack(side='left')
 
+        # Abréviation (expansion à la frappe)
+        tk.Label(
+            hotkey_frame,
+            text="Abréviation :",
+            bg=self.colors["bg"],
+            fg=self.colors["fg"]
+        ).pack(side='left', padx=(15, 5))
+
+        self.abbreviation_entry = tk.Entry(
+            hotkey_frame,
+            bg=self.colors["bg"],
+            fg=self.colors["fg"],
+            insertbackground=self.colors["text_cursor"],
+            font=('Segoe UI', 10),
+            width=12
+        )
+        self.abbreviation_entry.pack(side='left')
+
+        if self.snippet and self.snippet.get('abbreviation'):
+            self.abbreviation_entry.insert(0, self.snippet['abbreviation'])
+
         # Boutons
         btn_frame = tk.Frame(main_frame, bg=self.colors["bg"])
         btn_frame.pack(fill='x')
@@ -432,9 +724,29 @@ class SnippetEditDialog:
             except:
                 pass
 
-        # Sauvegarder
         snippet_id = self.snippet['id'] if self.snippet else None
-        snippet_manager.save_snippet(label, content, slot, snippet_id)
+
+        # Vérifier l'abréviation
+        abbreviation = normalize_abbreviation(self.abbreviation_entry.get())
+        if abbreviation is not None:
+            error = validate_abbreviation(abbreviation)
+            if error:
+                messagebox.showerror("Erreur", error, parent=self.dialog)
+                return
+            other = snippet_manager.find_abbreviation_conflict(abbreviation, snippet_id)
+            if other is not None:
+                if other.get('abbreviation') == abbreviation:
+                    message = (f"L'abréviation « {abbreviation} » est utilisée par « {other.get('label', '')} ».\n"
+                               "La lui retirer ?")
+                else:
+                    message = (f"L'abréviation « {abbreviation} » chevauche « {other['abbreviation']} » "
+                               f"(snippet « {other.get('label', '')} ») : seule la plus courte sera reconnue.\n"
+                               "Continuer ?")
+                if not messagebox.askyesno("Abréviation", message, parent=self.dialog):
+                    return
+
+        # Sauvegarder
+        snippet_manager.save_snippet(label, content, slot, snippet_id, abbreviation)
 
         self.result = True
         self.dialog.destroy()
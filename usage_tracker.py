@@ -1,16 +1,21 @@
 """Suivi de l'utilisation de l'API Claude."""
 
-import json
+import calendar
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Mapping
 from config import get_app_dir
+import storage
+from storage import JsonStore, thaw
 
 # Pricing Claude Haiku 4.5 (par million de tokens)
 # Source: https://www.anthropic.com/pricing
 PRICE_INPUT_PER_MILLION = 0.25  # $0.25 per 1M input tokens
 PRICE_OUTPUT_PER_MILLION = 1.25  # $1.25 per 1M output tokens
 
+# Délai de regroupement des écritures de usage_stats.json (en secondes)
+USAGE_WRITE_DELAY = 2.0
+
 
 def get_usage_file_path() -> Path:
     """Retourne le chemin du fichier de suivi d'utilisation."""
@@ -47,47 +52,170 @@ def get_current_month() -> str:
     return datetime.now().strftime("%Y-%m")
 
 
-def load_usage_stats() -> Dict[str, Any]:
+def _default_stats() -> Dict[str, Any]:
+    """Retourne des statistiques vides pour le mois en cours."""
+    return {
+        "requests_count": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "month": get_current_month(),
+        "last_updated": datetime.now().isoformat()
+    }
+
+
+# Compteurs cumulés par track_request
+COUNTERS = ("requests_count", "input_tokens", "output_tokens")
+
+
+class _UsageStore(JsonStore):
     """
-    Charge les statistiques d'utilisation depuis le fichier JSON.
+    usage_stats.json dont les compteurs sont ajoutés, pas remplacés.
+
+    Les requêtes de ce processus sont cumulées en mémoire (_pending) et
+    ajoutées, à l'écriture différée, aux compteurs relus sur disque sous
+    le verrou inter-processus : plusieurs processus ne s'écrasent pas.
+    Le snapshot publié comprend les compteurs en attente.
+    """
+
+    def __init__(self):
+        super().__init__(get_usage_file_path, _default_stats, write_delay=USAGE_WRITE_DELAY)
+        self._pending = _default_stats()
+        self._replace = False
+
+    def add(self, input_tokens: int, output_tokens: int) -> None:
+        """
+        Ajoute une requête aux compteurs (écriture différée).
+
+        Args:
+            input_tokens: Nombre de tokens en entrée.
+            output_tokens: Nombre de tokens en sortie.
+        """
+        with self._lock:
+            data = thaw(self.read())
+            if self._pending["month"] != get_current_month():
+                self._pending = _default_stats()
+            self._pending["requests_count"] += 1
+            self._pending["input_tokens"] += input_tokens
+            self._pending["output_tokens"] += output_tokens
+            self._pending["last_updated"] = datetime.now().isoformat()
+            request = dict(self._pending, requests_count=1, input_tokens=input_tokens, output_tokens=output_tokens)
+            self._publish(_merge_counts(data, request))
+            self._writer.schedule()
+
+    def write(self, data: Mapping[str, Any]) -> bool:
+        """Remplace les statistiques (réinitialisation) : les compteurs en attente sont abandonnés."""
+        with self._lock:
+            self._pending = _default_stats()
+            self._replace = True
+            return super().write(data)
+
+    def _loaded(self, data: Dict[str, Any], text: str) -> Dict[str, Any]:
+        """Ajoute les compteurs en attente au contenu relu sur disque."""
+        return _merge_counts(data, self._pending)
+
+    def _discard_pending_write(self) -> None:
+        """Une modification externe ne remplace pas les compteurs en attente : ils y seront ajoutés."""
+        if not any(self._pending[key] for key in COUNTERS):
+            super()._discard_pending_write()
+
+    def _write_current(self) -> bool:
+        """Ajoute les compteurs en attente à ceux du fichier et écrit le résultat."""
+        with self._lock, self.lock():
+            pending = self._pending
+            if self._replace or not any(pending[key] for key in COUNTERS):
+                # Réinitialisation : le snapshot (requêtes suivantes comprises) remplace le fichier
+                self._replace = False
+                self._pending = _default_stats()
+                return super()._write_current()
+            try:
+                data, _, _ = self._parse(self.path)
+            except FileNotFoundError:
+                data = _default_stats()
+            except (ValueError, OSError) as e:
+                print(f"Erreur lecture {self.path.name}: {e}")
+                data = _default_stats()
+            self._publish(_merge_counts(data, pending))
+            self._pending = _default_stats()
+            if super()._write_current():
+                return True
+            # Échec : les compteurs restent en attente pour la prochaine écriture
+            self._pending = pending
+            return False
+
+
+def _merge_counts(data: Dict[str, Any], pending: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ajoute des compteurs en attente à des statistiques.
+
+    Args:
+        data: Statistiques (modifiées et retournées).
+        pending: Compteurs à ajouter, avec leur mois.
 
     Returns:
-        Dictionnaire contenant les stats. Réinitialise si nouveau mois.
+        Statistiques du mois le plus récent des deux ; les compteurs d'un
+        mois plus ancien sont abandonnés.
     """
-    # Migrer le fichier si nécessaire (première fois)
-    migrate_usage_file_if_needed()
+    if not any(pending[key] for key in COUNTERS) or pending["month"] < data.get("month", ""):
+        return data
+    if pending["month"] != data.get("month"):
+        data = _default_stats()
+        data["month"] = pending["month"]
+    for key in COUNTERS:
+        data[key] = data.get(key, 0) + pending[key]
+    data["last_updated"] = pending["last_updated"]
+    return data
 
-    usage_file = get_usage_file_path()
-    current_month = get_current_month()
 
-    # Valeurs par défaut
-    default_stats = {
-        "requests_count": 0,
-        "input_tokens": 0,
-        "output_tokens": 0,
-        "month": current_month,
-        "last_updated": datetime.now().isoformat()
-    }
+# usage_stats.json : écrit à chaque requête, les écritures sont regroupées
+_store = _UsageStore()
+
+# La migration depuis le dossier de l'exe n'est vérifiée qu'une fois
+_migration_checked = False
 
-    # Si le fichier n'existe pas, retourner les valeurs par défaut
-    if not usage_file.exists():
-        save_usage_stats(default_stats)
-        return default_stats
+# Module database si le backend SQLite est actif (journal d'événements), déterminé au premier accès
+_database = None
 
-    try:
-        with open(usage_file, 'r', encoding='utf-8') as f:
-            stats = json.load(f)
 
-        # Si on est dans un nouveau mois, réinitialiser
-        if stats.get("month") != current_month:
-            stats = default_stats.copy()
-            save_usage_stats(stats)
+def _ensure_migrated() -> None:
+    """Migre le fichier de l'exe dir vers AppData au premier accès (puis vers SQLite si actif)."""
+    global _migration_checked, _database
+    if not _migration_checked:
+        migrate_usage_file_if_needed()
+        config_dir = get_usage_file_path().parent
+        if storage.get_backend(config_dir) == "sqlite":
+            import database
+            database.import_usage_file(config_dir, _store)
+            _database = database
+        _migration_checked = True
 
-        return stats
 
-    except (json.JSONDecodeError, IOError):
-        # En cas d'erreur, retourner les valeurs par défaut
-        return default_stats
+def _current_month_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Retourne stats, ou des stats vides si elles datent d'un mois précédent."""
+    if stats.get("month") != get_current_month():
+        return _default_stats()
+    return stats
+
+
+def load_usage_stats() -> Dict[str, Any]:
+    """
+    Charge les statistiques d'utilisation depuis le fichier JSON.
+
+    Returns:
+        Dictionnaire contenant les stats. Réinitialise si nouveau mois.
+    """
+    # Migrer le fichier si nécessaire (première fois)
+    _ensure_migrated()
+
+    if _database is not None:
+        return _database.get_usage_totals(get_usage_file_path().parent, get_current_month())
+
+    stats = thaw(_store.read())
+
+    # Si on est dans un nouveau mois, réinitialiser
+    current = _current_month_stats(stats)
+    if current is not stats:
+        save_usage_stats(current)
+    return current
 
 
 def save_usage_stats(stats: Dict[str, Any]) -> None:
@@ -97,14 +225,12 @@ def save_usage_stats(stats: Dict[str, Any]) -> None:
     Args:
         stats: Dictionnaire contenant les stats à sauvegarder.
     """
-    usage_file = get_usage_file_path()
     stats["last_updated"] = datetime.now().isoformat()
-
-    try:
-        with open(usage_file, 'w', encoding='utf-8') as f:
-            json.dump(stats, f, indent=2, ensure_ascii=False)
-    except IOError:
-        pass  # Ignorer les erreurs d'écriture
+    _ensure_migrated()
+    if _database is not None:
+        _database.replace_usage_totals(get_usage_file_path().parent, stats)
+        return
+    _store.write(stats)
 
 
 def track_request(input_tokens: int, output_tokens: int) -> None:
@@ -115,11 +241,16 @@ def track_request(input_tokens: int, output_tokens: int) -> None:
         input_tokens: Nombre de tokens en entrée.
         output_tokens: Nombre de tokens en sortie.
     """
-    stats = load_usage_stats()
-    stats["requests_count"] += 1
-    stats["input_tokens"] += input_tokens
-    stats["output_tokens"] += output_tokens
-    save_usage_stats(stats)
+    _ensure_migrated()
+
+    if _database is not None:
+        now = datetime.now()
+        _database.record_usage(
+            get_usage_file_path().parent, now.isoformat(), now.strftime("%Y-%m"), input_tokens, output_tokens
+        )
+        return
+
+    _store.add(input_tokens, output_tokens)
 
 
 def calculate_cost(input_tokens: int, output_tokens: int) -> float:
@@ -158,16 +289,37 @@ def get_usage_summary() -> Dict[str, Any]:
     }
 
 
+def get_projected_monthly_requests() -> float:
+    """
+    Projette le nombre de requêtes du mois à partir du rythme actuel.
+
+    Returns:
+        Nombre de requêtes estimé sur le mois complet.
+    """
+    stats = load_usage_stats()
+    now = datetime.now()
+    days_in_month = calendar.monthrange(now.year, now.month)[1]
+    # Fraction du mois écoulée (au moins une journée pour éviter les extrapolations extrêmes)
+    elapsed_days = max(1.0, now.day - 1 + now.hour / 24)
+    return stats["requests_count"] * days_in_month / elapsed_days
+
+
+def get_average_input_tokens() -> float:
+    """
+    Retourne le nombre moyen de tokens en entrée par requête ce mois-ci.
+
+    Returns:
+        Moyenne, ou 0.0 si aucune requête.
+    """
+    stats = load_usage_stats()
+    if not stats["requests_count"]:
+        return 0.0
+    return stats["input_tokens"] / stats["requests_count"]
+
+
 def reset_monthly_stats() -> None:
     """Réinitialise les statistiques mensuelles (pour tests ou reset manuel)."""
-    default_stats = {
-        "requests_count": 0,
-        "input_tokens": 0,
-        "output_tokens": 0,
-        "month": get_current_month(),
-        "last_updated": datetime.now().isoformat()
-    }
-    save_usage_stats(default_stats)
+    save_usage_stats(_default_stats())
 
 
 def format_usage_display() -> str: